@@ -1,7 +1,6 @@
 import sys
 import os
-from sqlalchemy import create_engine, or_
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import or_
 from getpass import getpass # Para ingresar la contraseña de forma más segura
 
 # Ajusta la ruta para que Python pueda encontrar tus módulos de la aplicación
@@ -14,18 +13,13 @@ try:
     from app.core.config import settings
     from app.models import modelos # Asegúrate que modelos.py esté accesible
     from app.crud.auth import hash_password # Importa tu función de hash
-    from app.database import Base # Si tus modelos heredan de una Base común en database.py
+    from app.database import Base, SessionLocal, engine # Mismo motor y pool que la API
 except ImportError as e:
     print(f"Error al importar módulos: {e}")
     print("Asegúrate de que el script esté en la ubicación correcta y que PYTHONPATH esté configurado si es necesario.")
     print(f"Project root intentado: {project_root}")
     sys.exit(1)
 
-# Configuración de la base de datos
-DATABASE_URL = settings.DATABASE_URL
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
 def update_user_password():
     db = SessionLocal()
     try:
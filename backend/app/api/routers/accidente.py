@@ -1,17 +1,24 @@
 # Fastapi_React/Backend/app/api/routers/accidente.py
-from datetime import date
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query ,  status 
+import asyncio
+import json
+from datetime import date, datetime, timedelta, timezone
+from typing import Annotated, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models.proxy import AccidentProxy
+from app.database import SessionLocal, get_async_db, get_db
 from app.schemas import schemas # Asegúrate que importe schemas
 from app.crud import accidente as crud_accidente # Renombrado para claridad
-from app.models import modelos
+from app.crud import sensor as crud_sensor
+from app.models import modelos, exportacion, trama_sensor
+from app.models.indice_espacial import BBox, parsear_bbox
 from app.crud.auth import obtener_usuario_actual
 
 router = APIRouter()
-proxy = AccidentProxy()
+proxy = crud_accidente.proxy  # Una sola instancia compartida del caché
 
 # --- ZONA ---
 @router.post("/zonas/", response_model=schemas.ZonaRead) # Cambiado a ZonaRead
@@ -183,9 +190,109 @@ def crear_accidente_endpoint(
 ):
     return crud_accidente.crear_accidente(db=db, accidente_data=accidente_data, usuario_id=usuario_actual.id)
 
+MAX_ACCIDENTES_BULK = 50_000
+MAX_BYTES_BULK = 32 * 1024 * 1024  # ~650 bytes por accidente al máximo de registros
+
+async def _leer_cuerpo(request: Request, maximo: int, detalle: str) -> bytes:
+    """El cuerpo de la petición, cortando con 413 apenas supera `maximo` bytes (no se lee entero antes)."""
+    declarado = request.headers.get("content-length")
+    if declarado and declarado.isdigit() and int(declarado) > maximo:
+        raise HTTPException(status_code=413, detail=detalle)
+    cuerpo = bytearray()
+    async for parte in request.stream():
+        cuerpo += parte
+        if len(cuerpo) > maximo:
+            raise HTTPException(status_code=413, detail=detalle)
+    return bytes(cuerpo)
+
+def _leer_registros(cuerpo: bytes, content_type: str) -> list:
+    """Arreglo JSON o NDJSON (un objeto por línea). Lanza ValueError si no se puede leer."""
+    texto = cuerpo.decode("utf-8").strip()
+    if "ndjson" not in content_type and texto.startswith("["):
+        registros = json.loads(texto)
+    else:
+        registros = [json.loads(linea) for linea in texto.splitlines() if linea.strip()]
+    if not isinstance(registros, list):
+        raise ValueError("Se esperaba un arreglo JSON o NDJSON")
+    return registros
+
+def _validar_registros(cuerpo: bytes, content_type: str) -> Tuple[list, list]:
+    """(índice, AccidenteCreateInput) de los válidos y {índice, error} de los demás. CPU pura: va al threadpool."""
+    try:
+        registros = _leer_registros(cuerpo, content_type)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Cuerpo inválido: {e}")
+    if len(registros) > MAX_ACCIDENTES_BULK:
+        raise HTTPException(status_code=413, detail=f"Máximo {MAX_ACCIDENTES_BULK} accidentes por petición")
+
+    validos, errores = [], []
+    for indice, registro in enumerate(registros):
+        try:
+            validos.append((indice, schemas.AccidenteCreateInput.model_validate(registro)))
+        except ValidationError as e:
+            detalle = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            errores.append({"indice": indice, "error": detalle})
+    return validos, errores
+
+@router.post("/accidentes/bulk")
+async def crear_accidentes_bulk(
+    request: Request,
+    db: Session = Depends(get_db),
+    usuario_actual: modelos.Usuario = Depends(obtener_usuario_actual)
+):
+    """
+    Alta masiva de accidentes: un arreglo JSON o NDJSON (`Content-Type: application/x-ndjson`)
+    de objetos con el formato de `POST /accidentes/`. Responde, por cada registro en el
+    orden recibido, el `id` creado o el `error`.
+    """
+    cuerpo = await _leer_cuerpo(request, MAX_BYTES_BULK, f"Máximo {MAX_BYTES_BULK // (1024 * 1024)} MiB por petición")
+    # Parsear y validar miles de registros no debe frenar el event loop
+    validos, errores = await run_in_threadpool(_validar_registros, cuerpo, request.headers.get("content-type", ""))
+    resultados = await run_in_threadpool(crud_accidente.crear_accidentes_lote, db, validos, usuario_actual.id)
+    resultados = sorted(errores + resultados, key=lambda r: r["indice"])
+    insertados = sum(1 for r in resultados if "id" in r)
+    return {"insertados": insertados, "errores": len(resultados) - insertados, "resultados": resultados}
+
+def _accidentes_ndjson(tamano_lote: int):
+    # La sesión se abre dentro del generador: la de `get_db` ya está cerrada
+    # cuando StreamingResponse empieza a consumir el cuerpo.
+    db = SessionLocal()
+    try:
+        for lote in crud_accidente.iterar_accidentes(db, tamano_lote=tamano_lote):
+            yield "".join(
+                schemas.AccidenteRead.model_validate(acc).model_dump_json() + "\n" for acc in lote
+            )
+    finally:
+        db.close()
+
 @router.get("/accidentes/", response_model=list[schemas.AccidenteRead])
-def listar_accidentes(db: Session = Depends(get_db)):
-    return crud_accidente.obtener_accidentes(db)
+def listar_accidentes(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Tamaño de página (paginación por cursor)"),
+    after: Optional[str] = Query(None, description="Cursor devuelto en el header X-Next-Cursor de la página anterior"),
+    stream: bool = Query(False, description="Transmitir todos los accidentes como NDJSON, por lotes"),
+    db: Session = Depends(get_db),
+):
+    """
+    Sin parámetros devuelve el listado completo (compatibilidad con el chatbot).
+    Con `limit`/`after` pagina por (fecha, id); si hay más datos, el cursor de la
+    siguiente página viaja en el header `X-Next-Cursor`.
+    Con `stream=true` responde `application/x-ndjson`, un accidente por línea.
+    """
+    if stream:
+        return StreamingResponse(_accidentes_ndjson(limit or 500), media_type="application/x-ndjson")
+
+    despues_de = None
+    if after:
+        try:
+            despues_de = crud_accidente.decodificar_cursor(after)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor 'after' inválido")
+
+    accidentes = crud_accidente.obtener_accidentes(db, limit=limit, despues_de=despues_de)
+    if limit is not None and len(accidentes) == limit:
+        response.headers["X-Next-Cursor"] = crud_accidente.codificar_cursor(accidentes[-1])
+    return accidentes
 
 @router.get("/accidentes/{accidente_id}", response_model=schemas.AccidenteRead)
 def obtener_accidente_endpoint(accidente_id: int, db: Session = Depends(get_db)): 
@@ -205,14 +312,166 @@ def eliminar_accidente_endpoint(
         raise HTTPException(status_code=404, detail="Accidente no encontrado")
     return {"mensaje": "Accidente eliminado"}
 
+def _etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidatos = [valor.strip().removeprefix("W/") for valor in if_none_match.split(",")]
+    return "*" in candidatos or etag in candidatos
+
+def _acepta_gzip(accept_encoding: Optional[str]) -> bool:
+    """True si `Accept-Encoding` admite gzip con q > 0, explícitamente o por `*`."""
+    calidades = {}
+    for parte in (accept_encoding or "").split(","):
+        codificacion, _, parametros = parte.partition(";")
+        codificacion = codificacion.strip().lower()
+        if not codificacion:
+            continue
+        calidad = 1.0
+        for parametro in parametros.split(";"):
+            nombre, _, valor = parametro.partition("=")
+            if nombre.strip().lower() == "q":
+                try:
+                    calidad = float(valor)
+                except ValueError:
+                    calidad = 0.0  # Ante la duda, sin comprimir
+        calidades["gzip" if codificacion == "x-gzip" else codificacion] = calidad
+    return calidades.get("gzip", calidades.get("*", 0.0)) > 0
+
 @router.get("/proxy/", response_model=list[schemas.AccidenteRead])
-def listar_accidentes_proxy(refrescar: bool = Query(False, description="Forzar actualización desde la BD en el proxy")):
-    accidentes = proxy.obtener_accidentes(refrescar)
-    if not accidentes:
+def listar_accidentes_proxy(
+    request: Request,
+    refrescar: bool = Query(False, description="Forzar actualización desde la BD en el proxy"),
+):
+    """
+    Sirve los bytes ya codificados del proxy. Responde 304 si el cliente envía
+    `If-None-Match` con el ETag vigente y gzip si lo acepta.
+    """
+    snapshot = proxy.obtener_snapshot(refrescar)
+    if snapshot is None or not snapshot.total:
         raise HTTPException(status_code=404, detail="No se encontraron accidentes")
-    return accidentes
+
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if _etag_coincide(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if _acepta_gzip(request.headers.get("accept-encoding")):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=snapshot.cuerpo_gzip, media_type="application/json", headers=headers)
+    return Response(content=snapshot.cuerpo, media_type="application/json", headers=headers)
+
+##------ ESTADÍSTICAS ----------###
+@router.get("/api/accidentes/stats")
+def obtener_estadisticas_accidentes(
+    group_by: str = Query("", description=f"Dimensiones separadas por coma: {', '.join(crud_accidente.DIMENSIONES_STATS)}"),
+    fecha_desde: Optional[date] = Query(None, description="Filtrar por fecha desde (YYYY-MM-DD)"),
+    fecha_hasta: Optional[date] = Query(None, description="Filtrar por fecha hasta (YYYY-MM-DD)"),
+    barrio_id: Optional[int] = Query(None, description="Filtrar por ID de barrio"),
+    zona_id: Optional[int] = Query(None, description="Filtrar por ID de zona"),
+    tipo_accidente_id: Optional[int] = Query(None, description="Filtrar por ID de tipo de accidente"),
+    gravedad_id: Optional[int] = Query(None, description="Filtrar por ID de gravedad"),
+    db: Session = Depends(get_db)
+):
+    """
+    Cantidad de accidentes y suma de víctimas por grupo, p. ej.
+    `/api/accidentes/stats?group_by=zona,tipo&fecha_desde=2024-01-01`.
+    """
+    dimensiones = tuple(dict.fromkeys(d.strip() for d in group_by.split(",") if d.strip()))
+    try:
+        return crud_accidente.obtener_estadisticas(
+            db, dimensiones,
+            fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, barrio_id=barrio_id,
+            zona_id=zona_id, tipo_accidente_id=tipo_accidente_id, gravedad_id=gravedad_id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+##------ SERIES DE TIEMPO ----------###
+@router.get("/api/accidentes/serie")
+def obtener_serie_accidentes(
+    freq: str = Query("month", description="Frecuencia: day, week o month"),
+    ventana: Optional[int] = Query(None, ge=1, le=366, description="Periodos de la media móvil (por defecto 7 días, 4 semanas o 3 meses)"),
+    fecha_desde: Optional[date] = Query(None, description="Filtrar por fecha desde (YYYY-MM-DD)"),
+    fecha_hasta: Optional[date] = Query(None, description="Filtrar por fecha hasta (YYYY-MM-DD)"),
+    barrio_id: Optional[int] = Query(None, description="Filtrar por ID de barrio"),
+    zona_id: Optional[int] = Query(None, description="Filtrar por ID de zona"),
+    tipo_accidente_id: Optional[int] = Query(None, description="Filtrar por ID de tipo de accidente"),
+    gravedad_id: Optional[int] = Query(None, description="Filtrar por ID de gravedad"),
+    db: Session = Depends(get_db)
+):
+    """
+    Serie de accidentes y víctimas por periodo, en columnas paralelas (`serie.periodo`,
+    `serie.accidentes`, ...) con media móvil, valor del año anterior, variación
+    interanual y línea base estacional.
+    """
+    try:
+        return crud_accidente.obtener_serie(
+            db, freq=freq, ventana=ventana,
+            fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, barrio_id=barrio_id,
+            zona_id=zona_id, tipo_accidente_id=tipo_accidente_id, gravedad_id=gravedad_id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+##------ EXPORTACIÓN ----------###
+def _exportacion(formato: str, filtros: dict):
+    # Sesión propia: la de `get_db` se cierra antes de que empiece el streaming
+    db = SessionLocal()
+    try:
+        yield from exportacion.ESCRITORES[formato](crud_accidente.iterar_exportacion(db, **filtros))
+    finally:
+        db.close()
+
+@router.get("/api/accidentes/export")
+def exportar_accidentes(
+    format: str = Query("csv", description="Formato: csv, geojson o parquet"),
+    barrio_id: Optional[int] = Query(None, description="Filtrar por ID de barrio"),
+    fecha_desde: Optional[date] = Query(None, description="Filtrar por fecha desde (YYYY-MM-DD)"),
+    fecha_hasta: Optional[date] = Query(None, description="Filtrar por fecha hasta (YYYY-MM-DD)"),
+    tipo_accidente_id: Optional[int] = Query(None, description="Filtrar por ID de tipo de accidente"),
+    gravedad_id: Optional[int] = Query(None, description="Filtrar por ID de gravedad"),
+    bbox: Optional[str] = Query(None, description="Área: minLng,minLat,maxLng,maxLat"),
+):
+    """
+    Descarga los accidentes filtrados (mismos filtros que el mapa) en CSV, GeoJSON o
+    Parquet. Se transmite por lotes desde un cursor del servidor, sin armar la lista completa.
+    """
+    if format not in exportacion.FORMATOS:
+        raise HTTPException(status_code=400, detail=f"Formato no soportado: {format}. Use {', '.join(exportacion.FORMATOS)}")
+    if format == "parquet" and not exportacion.parquet_disponible():
+        raise HTTPException(status_code=501, detail="La exportación a Parquet requiere pyarrow en el servidor")
+    filtros = dict(
+        barrio_id=barrio_id, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+        tipo_accidente_id=tipo_accidente_id, gravedad_id=gravedad_id, bbox=_bbox_o_400(bbox),
+    )
+    media_type, extension = exportacion.FORMATOS[format]
+    return StreamingResponse(
+        _exportacion(format, filtros),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="accidentes.{extension}"'},
+    )
+
+##------ HOTSPOTS ----------###
+@router.get("/api/hotspots", response_model=List[schemas.HotspotRead])
+def obtener_hotspots(
+    limit: int = Query(20, ge=1, le=500, description="Cantidad máxima de hotspots"),
+    min_accidentes: int = Query(1, ge=1, description="Mínimo de accidentes por hotspot"),
+    db: Session = Depends(get_db)
+):
+    """
+    Zonas de mayor concentración de accidentes (ponderadas por gravedad), de mayor a
+    menor. Las calcula un job en segundo plano; aquí solo se leen los resultados.
+    """
+    return crud_accidente.obtener_hotspots(db, limit=limit, min_accidentes=min_accidentes)
 
 ##------ MAPA ----------###
+def _bbox_o_400(bbox: Optional[str]) -> Optional[BBox]:
+    if bbox is None:
+        return None
+    try:
+        return parsear_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"bbox inválido: {e}")
+
 @router.get("/api/accidentes/mapa", response_model=List[dict])
 def obtener_accidentes_mapa(
     barrio_id: Optional[int] = Query(None, description="Filtrar por ID de barrio"),
@@ -220,77 +479,274 @@ def obtener_accidentes_mapa(
     fecha_hasta: Optional[date] = Query(None, description="Filtrar por fecha hasta (YYYY-MM-DD)"), # NUEVO
     tipo_accidente_id: Optional[int] = Query(None, description="Filtrar por ID de tipo de accidente"), # NUEVO
     gravedad_id: Optional[int] = Query(None, description="Filtrar por ID de gravedad"), # NUEVO
+    limit: Optional[int] = Query(None, ge=1, description="Máximo de puntos (por defecto, todos)"),
+    bbox: Optional[str] = Query(None, description="Área visible: minLng,minLat,maxLng,maxLat"),
     db: Session = Depends(get_db)
 ):
     """
     Obtiene los datos de accidentes para mostrar en el mapa.
-    Opcionalmente filtra por barrio, rango de fechas, tipo de accidente y gravedad.
+    Opcionalmente filtra por barrio, rango de fechas, tipo de accidente, gravedad y bbox.
+    Se sirve desde el almacén columnar en memoria, sin consultar la BD.
     """
-    # Llamada a la función CRUD actualizada
-    accidentes = crud_accidente.obtener_accidentes_filtrados_mapa(
+    return crud_accidente.obtener_puntos_mapa(
+        bbox=_bbox_o_400(bbox),
         db=db,
         barrio_id=barrio_id,
         fecha_desde=fecha_desde,
         fecha_hasta=fecha_hasta,
         tipo_accidente_id=tipo_accidente_id,
-        gravedad_id=gravedad_id
+        gravedad_id=gravedad_id,
+        limit=limit,
     )
 
-    resultados = []
-    for acc in accidentes:
-        ubicacion = acc.ubicacion
-        tipo_accidente_nombre = acc.tipo_accidente.nombre if acc.tipo_accidente else "Sin tipo"
-
-        if ubicacion and ubicacion.latitud and ubicacion.longitud:
-            primer_via_nombre = ubicacion.primer_via.nombre_via if ubicacion.primer_via and ubicacion.primer_via.nombre_via else ""
-            segunda_via_nombre = ubicacion.segunda_via.nombre_via if ubicacion.segunda_via and ubicacion.segunda_via.nombre_via else ""
-
-            direccion_partes = []
-            if primer_via_nombre:
-                direccion_partes.append(primer_via_nombre)
-            if segunda_via_nombre:
-                direccion_partes.append(f"con {segunda_via_nombre}")
-            direccion = " ".join(direccion_partes).strip() or "Dirección no definida"
-            
-            barrio_nombre = ubicacion.barrio.nombre if ubicacion.barrio else "Sin barrio"
-            complemento = ubicacion.complemento or "Sin complemento"
-
-            # Construcción de la descripción
-            descripcion_parts = [f"ID Acc: {acc.id}", tipo_accidente_nombre]
-            if direccion != "Dirección no definida":
-                 descripcion_parts.append(direccion)
-            if barrio_nombre != "Sin barrio":
-                 descripcion_parts.append(f"Barrio: {barrio_nombre}")
-            if complemento != "Sin complemento":
-                 descripcion_parts.append(f"Comp: {complemento}")
-            if acc.fecha:
-                descripcion_parts.append(f"Fecha: {acc.fecha.strftime('%Y-%m-%d')}")
-            if acc.gravedad: # Asumiendo que la relación 'gravedad' existe y tiene 'nivel_gravedad'
-                descripcion_parts.append(f"Gravedad: {acc.gravedad.nivel_gravedad}")
-
-
-            descripcion = " | ".join(descripcion_parts)
+def _validar_tile(z: int, x: int, y: int, max_zoom: int):
+    if not 0 <= z <= max_zoom or not 0 <= x < 2 ** z or not 0 <= y < 2 ** z:
+        raise HTTPException(status_code=404, detail="Tile fuera de rango")
 
-            try:
-                lat = float(ubicacion.latitud)
-                lng = float(ubicacion.longitud)
-                resultados.append({
-                    "id": acc.id,
-                    "lat": lat,
-                    "lng": lng,
-                    "descripcion": descripcion
-                })
-            except (ValueError, TypeError):
-                print(f"Error al procesar lat/lng para accidente {acc.id}: {ubicacion.latitud}, {ubicacion.longitud}")
-                pass 
-    return resultados
+@router.get("/api/accidentes/mapa/clusters")
+def obtener_clusters_mapa(
+    zoom: int = Query(..., ge=0, le=22, description="Nivel de zoom del mapa"),
+    bbox: Optional[str] = Query(None, description="Área visible: minLng,minLat,maxLng,maxLat"),
+    barrio_id: Optional[int] = Query(None, description="Filtrar por ID de barrio"),
+    fecha_desde: Optional[date] = Query(None, description="Filtrar por fecha desde (YYYY-MM-DD)"),
+    fecha_hasta: Optional[date] = Query(None, description="Filtrar por fecha hasta (YYYY-MM-DD)"),
+    tipo_accidente_id: Optional[int] = Query(None, description="Filtrar por ID de tipo de accidente"),
+    gravedad_id: Optional[int] = Query(None, description="Filtrar por ID de gravedad"),
+    db: Session = Depends(get_db)
+):
+    """
+    Clusters de accidentes para el zoom pedido: centroide, cantidad y desglose por
+    gravedad (id -> cantidad). Los clusters de un solo accidente incluyen su `id`.
+    """
+    clusters = crud_accidente.obtener_clusters_mapa(
+        db=db,
+        zoom=zoom,
+        bbox=_bbox_o_400(bbox),
+        barrio_id=barrio_id,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        tipo_accidente_id=tipo_accidente_id,
+        gravedad_id=gravedad_id,
+    )
+    return {"zoom": zoom, "total": sum(c["count"] for c in clusters), "clusters": clusters}
+
+@router.get("/tiles/heat/{z}/{x}/{y}.png")
+def obtener_tile_calor_png(
+    z: int,
+    x: int,
+    y: int,
+    fecha_desde: Optional[date] = Query(None, description="Filtrar por fecha desde (YYYY-MM-DD)"),
+    fecha_hasta: Optional[date] = Query(None, description="Filtrar por fecha hasta (YYYY-MM-DD)"),
+    tipo_accidente_id: Optional[int] = Query(None, description="Filtrar por ID de tipo de accidente"),
+    gravedad_id: Optional[int] = Query(None, description="Filtrar por ID de gravedad"),
+    db: Session = Depends(get_db)
+):
+    """Tile XYZ de 256x256 px con la densidad de accidentes, para usar como capa en Leaflet."""
+    _validar_tile(z, x, y, crud_accidente.MAX_ZOOM_CALOR)
+    png = crud_accidente.obtener_tile_calor(
+        db, z, x, y, formato="png",
+        fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+        tipo_accidente_id=tipo_accidente_id, gravedad_id=gravedad_id,
+    )
+    return Response(content=png, media_type="image/png", headers={"Cache-Control": "public, max-age=60"})
+
+@router.get("/tiles/heat/{z}/{x}/{y}.json")
+def obtener_tile_calor_json(
+    z: int,
+    x: int,
+    y: int,
+    fecha_desde: Optional[date] = Query(None, description="Filtrar por fecha desde (YYYY-MM-DD)"),
+    fecha_hasta: Optional[date] = Query(None, description="Filtrar por fecha hasta (YYYY-MM-DD)"),
+    tipo_accidente_id: Optional[int] = Query(None, description="Filtrar por ID de tipo de accidente"),
+    gravedad_id: Optional[int] = Query(None, description="Filtrar por ID de gravedad"),
+    db: Session = Depends(get_db)
+):
+    """Misma densidad que el PNG, como grilla 64x64 de valores en [0, 1] (filas de norte a sur)."""
+    _validar_tile(z, x, y, crud_accidente.MAX_ZOOM_CALOR)
+    grilla = crud_accidente.obtener_tile_calor(
+        db, z, x, y, formato="json",
+        fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+        tipo_accidente_id=tipo_accidente_id, gravedad_id=gravedad_id,
+    )
+    return {"z": z, "x": x, "y": y, "resolucion": len(grilla), "densidad": grilla}
+
+@router.get("/tiles/accidentes/{z}/{x}/{y}.mvt")
+def obtener_tile_mvt(
+    z: int,
+    x: int,
+    y: int,
+    fecha_desde: Optional[date] = Query(None, description="Filtrar por fecha desde (YYYY-MM-DD)"),
+    fecha_hasta: Optional[date] = Query(None, description="Filtrar por fecha hasta (YYYY-MM-DD)"),
+    tipo_accidente_id: Optional[int] = Query(None, description="Filtrar por ID de tipo de accidente"),
+    gravedad_id: Optional[int] = Query(None, description="Filtrar por ID de gravedad"),
+    db: Session = Depends(get_db)
+):
+    """Mapbox Vector Tile con las capas "accidentes" (desde zoom 11) y "barrios" (agregados)."""
+    _validar_tile(z, x, y, crud_accidente.MAX_ZOOM_MVT)
+    tile = crud_accidente.obtener_tile_mvt(
+        db, z, x, y,
+        fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+        tipo_accidente_id=tipo_accidente_id, gravedad_id=gravedad_id,
+    )
+    return Response(
+        content=tile,
+        media_type="application/vnd.mapbox-vector-tile",
+        headers={"Cache-Control": "public, max-age=60"},
+    )
 
 # --- LECTURA SENSOR --- #
 
-@router.post("/lectura_sensor/", response_model=schemas.LecturaSensorOut)
-async def registrar_lectura_sensor(lectura: schemas.LecturaSensorCreate, db: Session = Depends(get_db)):
-    return crud_accidente.create_lectura_sensor(db, lectura)
+@router.post("/lectura_sensor/", response_model=schemas.LecturaSensorAceptada, status_code=202)
+async def registrar_lectura_sensor(lectura: schemas.LecturaSensorCreate):
+    # Se responde apenas la lectura queda en el buffer; el insert va en el próximo lote
+    try:
+        pendientes = crud_sensor.recibir_lectura(lectura)
+    except crud_sensor.BufferLleno as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {"pendientes": pendientes}
+
+async def _eventos_sse(request: Request, cola):
+    try:
+        while True:
+            try:
+                yield await asyncio.wait_for(cola.get(), timeout=15)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": ping\n\n"  # Comentario SSE: mantiene viva la conexión a través de proxies
+    finally:
+        crud_sensor.hub_lecturas.desuscribir(cola)
+
+@router.get("/lectura_sensor/stream")
+async def stream_lecturas_sensores(
+    request: Request,
+    replay: int = Query(50, ge=0, description="Lecturas recientes a enviar al conectarse"),
+):
+    """Server-Sent Events: cada lectura nueva se envía una vez, sin consultar la BD."""
+    ultimo_id = request.headers.get("last-event-id")
+    cola = crud_sensor.hub_lecturas.suscribir(
+        replay=min(replay, crud_sensor.hub_lecturas.max_replay),
+        ultimo_id=int(ultimo_id) if ultimo_id and ultimo_id.isdigit() else None,
+    )
+    return StreamingResponse(
+        _eventos_sse(request, cola),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/lectura_sensor/stream/estado")
+def estado_stream_sensor():
+    return crud_sensor.hub_lecturas.estado()
+
+MAX_LECTURAS_TRAMA = 10_000
+MAX_BYTES_TRAMA = trama_sensor.ENCABEZADO.size + MAX_LECTURAS_TRAMA * trama_sensor.LECTURA.itemsize
+
+@router.post("/lectura_sensor/lote", status_code=202)
+async def registrar_lote_binario(request: Request):
+    """
+    Lote de lecturas en el formato binario de `trama_sensor` (8 bytes por lectura).
+    Pensado para el modo por lotes del firmware, que reutiliza la conexión HTTP.
+    """
+    trama = await _leer_cuerpo(request, MAX_BYTES_TRAMA, f"Máximo {MAX_LECTURAS_TRAMA} lecturas por trama")
+    try:
+        aceptadas, pendientes = crud_sensor.recibir_trama(trama)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except crud_sensor.BufferLleno as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return {"aceptadas": aceptadas, "pendientes": pendientes}
+
+@router.get("/lectura_sensor/buffer")
+def estado_buffer_sensor():
+    return crud_sensor.buffer_lecturas.estado()
 
 @router.get("/lectura_sensor/", response_model=list[schemas.LecturaSensorOut])
-async def obtener_lecturas_sensores(db: Session = Depends(get_db)):
-    return crud_accidente.get_lecturas_sensores(db)
\ No newline at end of file
+async def obtener_lecturas_sensores(
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=10_000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Sin rango devuelve las `limit` más recientes; el costo no crece con la tabla
+    return await crud_sensor.get_lecturas_sensores(db, desde=desde, hasta=hasta, limit=limit)
+
+@router.get("/lectura_sensor/reciente")
+async def lecturas_sensores_recientes(
+    minutos: int = Query(60, ge=1, le=60 * 24 * 31),
+    puntos: int = Query(0, ge=0, le=5000, description="Submuestrear a N puntos promediados (0 = todas)"),
+    sensor_id: Optional[int] = Query(None, description="Solo ese equipo; por defecto toda la flota"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Ventanas cortas salen del buffer circular en memoria, sin consultar la BD.
+    # Las lecturas se guardan en UTC naive, así que la ventana se mide igual.
+    desde = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=minutos)
+    return await crud_sensor.get_lecturas_recientes(db, desde=desde, puntos=puntos, sensor_id=sensor_id)
+
+@router.get("/lectura_sensor/ultima")
+async def ultima_lectura_sensor(
+    sensor_id: Optional[int] = Query(None, description="Solo ese equipo; por defecto la más reciente de la flota"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    ultima = await crud_sensor.get_ultima_lectura(db, sensor_id=sensor_id)
+    if ultima is None:
+        raise HTTPException(status_code=404, detail="Todavía no hay lecturas")
+    return ultima
+
+@router.get("/lectura_sensor/anomalias")
+async def anomalias_lecturas_sensores(
+    sensor_id: Optional[int] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Lecturas marcadas por el detector en línea (salto brusco o z-score alto), más recientes primero."""
+    return await crud_sensor.get_anomalias(db, sensor_id=sensor_id, desde=desde, hasta=hasta, limit=limit)
+
+# --- SENSORES (EQUIPOS) --- #
+IdSensor = Annotated[int, Path(ge=1, le=schemas.SENSOR_ID_MAXIMO)]
+
+@router.get("/sensores")
+async def listar_sensores(db: AsyncSession = Depends(get_async_db)):
+    return await crud_sensor.get_sensores(db)
+
+@router.put("/sensores/{sensor_id}", response_model=schemas.SensorRead)
+async def guardar_sensor(
+    sensor_id: IdSensor,
+    datos: schemas.SensorUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    usuario_actual: modelos.Usuario = Depends(obtener_usuario_actual)
+):
+    return await crud_sensor.actualizar_sensor(db, sensor_id, datos)
+
+@router.get("/sensores/{sensor_id}/lecturas", response_model=list[schemas.LecturaSensorOut])
+async def lecturas_de_sensor(
+    sensor_id: IdSensor,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=10_000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await crud_sensor.get_lecturas_sensores(db, desde=desde, hasta=hasta, limit=limit, sensor_id=sensor_id)
+
+@router.get("/sensores/{sensor_id}/ultima")
+def ultima_lectura_de_sensor(sensor_id: IdSensor):
+    # Sale del mapa en memoria que se actualiza con cada lectura recibida
+    ultima = crud_sensor.ultimas_por_sensor.get(sensor_id)
+    if ultima is None:
+        raise HTTPException(status_code=404, detail="El sensor no tiene lecturas")
+    return ultima
+
+@router.get("/lectura_sensor/resumen")
+async def resumen_lecturas_sensores(
+    resolucion: Optional[str] = Query(None, description="minute, hour o day; por defecto según la ventana"),
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    sensor_id: Optional[int] = Query(None, description="Solo ese equipo; por defecto toda la flota"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        return await crud_sensor.get_resumen_sensor(db, resolucion=resolucion, desde=desde, hasta=hasta,
+                                                    sensor_id=sensor_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
@@ -5,10 +5,28 @@ load_dotenv()  # Carga variables desde un archivo .env
 
 class Settings:
     PROJECT_NAME: str = "API FastAPI"
-    DATABASE_URL: str = "mysql+pymysql://root@localhost/accidentesbaq"
+    DATABASE_URL: str = os.getenv("DATABASE_URL", "mysql+pymysql://root@localhost/accidentesbaq")
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")  # Vacío: se deriva de DATABASE_URL
+    # Pool de conexiones (aplica a cada motor, sync y async)
+    DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() == "true"  # Loguea cada sentencia SQL
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # Segundos esperando una conexión libre
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Menor que wait_timeout de MySQL
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # 0 = sin límite
     SECRET_KEY: str = "clave_super_secreta"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 1 día
+    TILES_CACHE_DIR: str = os.getenv("TILES_CACHE_DIR", "cache/tiles")  # Caché en disco de tiles vectoriales
+    HOTSPOTS_INTERVALO_SEG: int = int(os.getenv("HOTSPOTS_INTERVALO_SEG", "300"))  # 0 desactiva el job en la API (con varios workers, dejarlo en uno solo)
+    # Ingesta diferida de lecturas de sensor: se insertan por lotes de SENSOR_LOTE o cada SENSOR_INTERVALO_SEG
+    SENSOR_LOTE: int = int(os.getenv("SENSOR_LOTE", "500"))
+    SENSOR_INTERVALO_SEG: float = float(os.getenv("SENSOR_INTERVALO_SEG", "1"))
+    SENSOR_MAX_PENDIENTES: int = int(os.getenv("SENSOR_MAX_PENDIENTES", "100000"))  # Más allá responde 503
+    SENSOR_REPLAY: int = int(os.getenv("SENSOR_REPLAY", "200"))  # Lecturas que recibe un cliente nuevo del stream
+    SENSOR_ANILLO: int = int(os.getenv("SENSOR_ANILLO", "100000"))  # Lecturas recientes en memoria (20 bytes c/u)
+    SENSOR_SPILL: str = os.getenv("SENSOR_SPILL", "cache/sensor_pendientes.jsonl")  # Vacío: sin respaldo en disco; con varios workers, .1, .2...
     
 
 settings = Settings()
\ No newline at end of file
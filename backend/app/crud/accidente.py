@@ -1,13 +1,24 @@
 # Fastapi_React/Backend/app/crud/accidente.py
-from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func 
-from app.models.sensor import LecturaSensor
+from typing import Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import bindparam, func, and_, or_, select, insert, inspect, text, tuple_, update
 from app.schemas import schemas
 from app.models import modelos, proxy
+from app.models.cargas import CARGA_ACCIDENTE_READ, CARGA_MAPA
 from app.crud import auth # Asegúrate que auth.py esté en la misma carpeta (crud) o ajusta la importación
-from datetime import date
+from contextlib import contextmanager
+from datetime import date, datetime
+import hashlib
+import threading
+import time
+import numpy as np
 from app.models.proxy import AccidentProxy
+from app.models.almacen import AlmacenAccidentes
+from app.models.indice_espacial import BBox
+from app.models.clusters import IndiceClusters
+from app.models.cache import CacheLRU, CacheTilesDisco
+from app.models import mapa_calor, mvt, series, hotspots, exportacion
+from app.core.config import settings
 
 
 # --- ZONA ---
@@ -172,35 +183,192 @@ def crear_accidente(db: Session, accidente_data: schemas.AccidenteCreateInput, u
     db_accidente_data['usuario_id'] = usuario_id
     db_accidente = modelos.Accidente(**db_accidente_data)
     db.add(db_accidente)
+    db.flush()
+    # El rollup se ajusta en la misma transacción que el insert
+    ajustar_resumen(db, [_clave_resumen(db, db_accidente)], signo=1)
     db.commit()
     db.refresh(db_accidente)
+    almacen.agregar(db, [db_accidente.id])
+    coordenadas = almacen.coordenadas(db_accidente.id)
+    invalidar_tiles_calor(coordenadas)
+    invalidar_tiles_mvt(coordenadas)
+    marcar_celdas_hotspots(coordenadas)
+    invalidar_agregados()
     return db_accidente
 
-def obtener_accidentes(db: Session): # Para listado general, puede no necesitar todas las relaciones
-    return db.query(modelos.Accidente).order_by(modelos.Accidente.fecha.desc()).all()
+def codificar_cursor(accidente: modelos.Accidente) -> str:
+    """Cursor opaco para paginación keyset: 'YYYY-MM-DD_id' del último accidente de la página."""
+    return f"{accidente.fecha.isoformat()}_{accidente.id}"
+
+def decodificar_cursor(cursor: str) -> Tuple[date, int]:
+    """Inverso de `codificar_cursor`. Lanza ValueError si el cursor no es válido."""
+    fecha_txt, _, id_txt = cursor.partition("_")
+    return date.fromisoformat(fecha_txt), int(id_txt)
+
+def obtener_accidentes(
+    db: Session,
+    limit: Optional[int] = None,
+    despues_de: Optional[Tuple[date, int]] = None,
+) -> List[modelos.Accidente]:
+    """
+    Listado general ordenado por (fecha, id) descendente.
+    Con `despues_de` continúa justo después de esa clave (paginación keyset): la BD
+    salta directo a la posición usando el índice de `fecha` (que en InnoDB incluye
+    la PK), sin OFFSET y sin releer las páginas anteriores.
+    """
+    query = db.query(modelos.Accidente).options(*CARGA_ACCIDENTE_READ)
+    if despues_de is not None:
+        fecha, accidente_id = despues_de
+        query = query.filter(or_(
+            modelos.Accidente.fecha < fecha,
+            and_(modelos.Accidente.fecha == fecha, modelos.Accidente.id < accidente_id),
+        ))
+    query = query.order_by(modelos.Accidente.fecha.desc(), modelos.Accidente.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def iterar_accidentes(db: Session, tamano_lote: int = 500) -> Iterator[List[modelos.Accidente]]:
+    """
+    Recorre toda la tabla en lotes de `tamano_lote` usando el mismo cursor keyset.
+    Cada lote se libera de la sesión antes de pedir el siguiente, así la memoria
+    se mantiene constante sin importar el tamaño de la tabla.
+    """
+    despues_de = None
+    while True:
+        lote = obtener_accidentes(db, limit=tamano_lote, despues_de=despues_de)
+        if not lote:
+            return
+        yield lote
+        despues_de = (lote[-1].fecha, lote[-1].id)
+        db.expunge_all()
+        if len(lote) < tamano_lote:
+            return
 
 def obtener_accidente(db: Session, accidente_id: int) -> Optional[modelos.Accidente]:
     """
     Obtiene un accidente específico por su ID, cargando todas sus relaciones
     para una vista detallada.
     """
-    return db.query(modelos.Accidente).options(
-        joinedload(modelos.Accidente.usuario),
-        joinedload(modelos.Accidente.tipo_accidente),
-        joinedload(modelos.Accidente.condicion_victima),
-        joinedload(modelos.Accidente.gravedad), 
-        joinedload(modelos.Accidente.ubicacion).joinedload(modelos.Ubicacion.barrio).joinedload(modelos.Barrio.zona),
-        joinedload(modelos.Accidente.ubicacion).joinedload(modelos.Ubicacion.primer_via).joinedload(modelos.Via.tipo_via),
-        joinedload(modelos.Accidente.ubicacion).joinedload(modelos.Ubicacion.segunda_via).joinedload(modelos.Via.tipo_via)
-    ).filter(modelos.Accidente.id == accidente_id).first()
+    return db.query(modelos.Accidente).options(*CARGA_ACCIDENTE_READ)\
+        .filter(modelos.Accidente.id == accidente_id).first()
 
 def eliminar_accidente(db: Session, accidente_id: int):
     accidente_obj = obtener_accidente(db, accidente_id) 
     if accidente_obj:
+        ajustar_resumen(db, [_clave_resumen(db, accidente_obj)], signo=-1)
         db.delete(accidente_obj)
         db.commit()
+        coordenadas = almacen.coordenadas(accidente_id)
+        almacen.eliminar(accidente_id)
+        invalidar_tiles_calor(coordenadas)
+        invalidar_tiles_mvt(coordenadas)
+        marcar_celdas_hotspots(coordenadas)
+        invalidar_agregados()
     return accidente_obj
 
+def _ids_existentes(db: Session, columna, valores) -> set:
+    valores = list(set(valores))
+    existentes = set()
+    for i in range(0, len(valores), 1000):
+        existentes.update(v for (v,) in db.query(columna).filter(columna.in_(valores[i:i + 1000])))
+    return existentes
+
+def _autoinc_consecutivo(db: Session) -> bool:
+    """
+    True si en esta sesión de MySQL/MariaDB un INSERT de varias filas recibe ids
+    consecutivos desde `lastrowid`: lock mode 0 o 1 y sin `auto_increment_increment`
+    (Galera y multi-primario usan lock mode 2 y/o saltos de id).
+    """
+    if db.get_bind().dialect.name != "mysql":
+        return False
+    modo, incremento = db.execute(text("SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment")).one()
+    return int(modo) in (0, 1) and int(incremento) == 1
+
+def _insertar_filas(db: Session, filas: List[dict]) -> List[int]:
+    """Inserta un lote y devuelve los ids en el mismo orden."""
+    tabla = modelos.Accidente.__table__
+    if db.get_bind().dialect.insert_executemany_returning:
+        resultado = db.execute(insert(tabla).returning(tabla.c.id, sort_by_parameter_order=True), filas)
+        return [fila.id for fila in resultado]
+    # MySQL / MariaDB < 10.5 no tienen RETURNING: una sola sentencia solo si el servidor
+    # garantiza ids consecutivos; si no, fila por fila (más lento, pero los ids son ciertos)
+    if _autoinc_consecutivo(db):
+        resultado = db.execute(insert(tabla).values(filas))
+        return list(range(resultado.lastrowid, resultado.lastrowid + len(filas)))
+    return [db.execute(insert(tabla).values(**fila)).inserted_primary_key[0] for fila in filas]
+
+def crear_accidentes_lote(
+    db: Session,
+    accidentes: List[Tuple[int, schemas.AccidenteCreateInput]],
+    usuario_id: int,
+    tamano_lote: int = 1000,
+) -> List[dict]:
+    """
+    Alta masiva. `accidentes` son pares (índice en la petición, datos ya validados).
+    Se verifican las FK de todos de una vez y luego se inserta por lotes, una
+    transacción por lote (junto con el ajuste del rollup). Devuelve por índice
+    `{"indice", "id"}` o `{"indice", "error"}`; un lote que falla no afecta a los demás.
+    """
+    A = modelos.Accidente
+    catalogos = {
+        "condicion_victima_id": _ids_existentes(db, modelos.CondicionVictima.id, (a.condicion_victima_id for _, a in accidentes)),
+        "gravedad_victima_id": _ids_existentes(db, modelos.GravedadVictima.id, (a.gravedad_victima_id for _, a in accidentes)),
+        "tipo_accidente_id": _ids_existentes(db, modelos.TipoAccidente.id, (a.tipo_accidente_id for _, a in accidentes)),
+    }
+    ubicaciones = list({a.ubicacion_id for _, a in accidentes})
+    barrio_por_ubicacion = {}
+    for i in range(0, len(ubicaciones), 1000):
+        barrio_por_ubicacion.update(
+            db.query(modelos.Ubicacion.id, modelos.Ubicacion.barrio_id)
+            .filter(modelos.Ubicacion.id.in_(ubicaciones[i:i + 1000])).all()
+        )
+
+    resultados, validos = [], []
+    for indice, accidente in accidentes:
+        faltantes = [campo for campo, ids in catalogos.items() if getattr(accidente, campo) not in ids]
+        if accidente.ubicacion_id not in barrio_por_ubicacion:
+            faltantes.append("ubicacion_id")
+        if faltantes:
+            resultados.append({"indice": indice, "error": f"No existe: {', '.join(faltantes)}"})
+        else:
+            validos.append((indice, accidente))
+
+    creados = []
+    for i in range(0, len(validos), tamano_lote):
+        lote = validos[i:i + tamano_lote]
+        filas = []
+        for _, accidente in lote:
+            fila = accidente.dict()
+            if isinstance(fila["fecha"], datetime):
+                fila["fecha"] = fila["fecha"].date()
+            fila["usuario_id"] = usuario_id
+            filas.append(fila)
+        try:
+            ids = _insertar_filas(db, filas)
+            ajustar_resumen(db, [
+                (f["fecha"], barrio_por_ubicacion[f["ubicacion_id"]], f["tipo_accidente_id"],
+                 f["gravedad_victima_id"], f["cantidad_victima"])
+                for f in filas
+            ], signo=1)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            resultados.extend({"indice": indice, "error": f"Error al insertar el lote: {getattr(e, 'orig', e)}"} for indice, _ in lote)
+            continue
+        resultados.extend({"indice": indice, "id": acc_id} for (indice, _), acc_id in zip(lote, ids))
+        creados.extend(ids)
+
+    if creados:
+        for i in range(0, len(creados), tamano_lote):
+            almacen.agregar(db, creados[i:i + tamano_lote])
+        puntos = [almacen.coordenadas(acc_id) for acc_id in creados]
+        invalidar_tiles_calor(*puntos)
+        invalidar_tiles_mvt(*puntos)
+        marcar_celdas_hotspots(*puntos)
+        invalidar_agregados()
+    return sorted(resultados, key=lambda r: r["indice"])
+
 def obtener_accidentes_filtrados_mapa(
     db: Session,
     barrio_id: Optional[int] = None,
@@ -211,13 +379,7 @@ def obtener_accidentes_filtrados_mapa(
     limit: int = 100 
 ) -> List[modelos.Accidente]:
 
-    query = db.query(modelos.Accidente).options(
-        joinedload(modelos.Accidente.ubicacion).joinedload(modelos.Ubicacion.barrio),
-        joinedload(modelos.Accidente.ubicacion).joinedload(modelos.Ubicacion.primer_via),
-        joinedload(modelos.Accidente.ubicacion).joinedload(modelos.Ubicacion.segunda_via),
-        joinedload(modelos.Accidente.tipo_accidente),
-        joinedload(modelos.Accidente.gravedad) 
-    )
+    query = db.query(modelos.Accidente).options(*CARGA_MAPA)
 
     if barrio_id is not None:
         # Asegúrate de que el join sea correcto si Accidente.ubicacion_id es la FK a Ubicacion.id
@@ -236,6 +398,687 @@ def obtener_accidentes_filtrados_mapa(
     query = query.limit(limit)
     return query.all()
 
+# --- EXPORTACIÓN ---
+def _consulta_exportacion(
+    barrio_id: Optional[int] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    tipo_accidente_id: Optional[int] = None,
+    gravedad_id: Optional[int] = None,
+    bbox: Optional[BBox] = None,
+):
+    A, U, B = modelos.Accidente, modelos.Ubicacion, modelos.Barrio
+    primer_via, segunda_via = aliased(modelos.Via), aliased(modelos.Via)
+    primer_tipo, segundo_tipo = aliased(modelos.TipoVia), aliased(modelos.TipoVia)
+
+    def texto_via(via, tipo):
+        # "CALLE 72B" a partir del tipo, número, sufijo y nombre de la vía
+        partes = [func.coalesce(tipo.nombre, ""), func.coalesce(via.numero_via, "") + func.coalesce(via.sufijo_via, ""),
+                  func.coalesce(via.nombre_via, "")]
+        texto = partes[0] + " " + partes[1] + " " + partes[2]
+        return func.nullif(func.trim(texto), "")
+
+    # Mismo orden que exportacion.COLUMNAS
+    consulta = select(
+        A.id, A.fecha, A.sexo_victima, A.edad_victima, A.cantidad_victima,
+        U.latitud, U.longitud, U.complemento,
+        texto_via(primer_via, primer_tipo), texto_via(segunda_via, segundo_tipo),
+        U.barrio_id, B.nombre, B.zona_id, modelos.Zona.nombre,
+        A.tipo_accidente_id, modelos.TipoAccidente.nombre,
+        A.gravedad_victima_id, modelos.GravedadVictima.nivel_gravedad,
+        A.condicion_victima_id, modelos.CondicionVictima.rol_victima,
+    ).select_from(A)\
+        .outerjoin(U, A.ubicacion_id == U.id)\
+        .outerjoin(B, U.barrio_id == B.id)\
+        .outerjoin(modelos.Zona, B.zona_id == modelos.Zona.id)\
+        .outerjoin(primer_via, U.primer_via_id == primer_via.id)\
+        .outerjoin(segunda_via, U.segunda_via_id == segunda_via.id)\
+        .outerjoin(primer_tipo, primer_via.tipo_via_id == primer_tipo.id)\
+        .outerjoin(segundo_tipo, segunda_via.tipo_via_id == segundo_tipo.id)\
+        .outerjoin(modelos.TipoAccidente, A.tipo_accidente_id == modelos.TipoAccidente.id)\
+        .outerjoin(modelos.GravedadVictima, A.gravedad_victima_id == modelos.GravedadVictima.id)\
+        .outerjoin(modelos.CondicionVictima, A.condicion_victima_id == modelos.CondicionVictima.id)
+
+    if barrio_id is not None:
+        consulta = consulta.where(U.barrio_id == barrio_id)
+    if fecha_desde is not None:
+        consulta = consulta.where(A.fecha >= fecha_desde)
+    if fecha_hasta is not None:
+        consulta = consulta.where(A.fecha <= fecha_hasta)
+    if tipo_accidente_id is not None:
+        consulta = consulta.where(A.tipo_accidente_id == tipo_accidente_id)
+    if gravedad_id is not None:
+        consulta = consulta.where(A.gravedad_victima_id == gravedad_id)
+    if bbox is not None:
+        min_lng, min_lat, max_lng, max_lat = bbox
+        consulta = consulta.where(U.longitud.between(min_lng, max_lng), U.latitud.between(min_lat, max_lat))
+    return consulta.order_by(A.id)
+
+def iterar_exportacion(db: Session, tamano_lote: int = 2000, **filtros) -> Iterator[List[tuple]]:
+    """
+    Lotes de filas planas para exportar, leídos con un cursor del lado del servidor
+    (`yield_per`): nunca hay más de `tamano_lote` filas en memoria.
+    """
+    resultado = db.execute(_consulta_exportacion(**filtros).execution_options(yield_per=tamano_lote))
+    try:
+        for particion in resultado.partitions():
+            yield [tuple(fila) for fila in particion]
+    finally:
+        resultado.close()
+
+# --- ALMACÉN COLUMNAR (MAPA) ---
+almacen = AlmacenAccidentes()
+def obtener_puntos_mapa(
+    db: Session,
+    barrio_id: Optional[int] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    tipo_accidente_id: Optional[int] = None,
+    gravedad_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    bbox: Optional[BBox] = None,
+) -> List[dict]:
+    """
+    Mismos filtros que `obtener_accidentes_filtrados_mapa`, resueltos con máscaras
+    NumPy sobre el almacén en memoria. Devuelve todos los puntos con coordenadas;
+    con `bbox` solo los del área visible, buscados por celdas de la grilla espacial.
+    """
+    almacen.asegurar_cargado(db)
+    return almacen.puntos_filtrados(
+        limit=limit,
+        bbox=bbox,
+        barrio_id=barrio_id,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        tipo_accidente_id=tipo_accidente_id,
+        gravedad_id=gravedad_id,
+    )
+
+# --- CLUSTERS DEL MAPA ---
+cache_clusters = CacheLRU(max_entradas=32)
+def obtener_clusters_mapa(
+    db: Session,
+    zoom: int,
+    bbox: Optional[BBox] = None,
+    barrio_id: Optional[int] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    tipo_accidente_id: Optional[int] = None,
+    gravedad_id: Optional[int] = None,
+) -> List[dict]:
+    """
+    Clusters del nivel `zoom` dentro de `bbox`. El índice de todos los niveles se
+    construye una vez por combinación de filtros y versión del almacén.
+    """
+    almacen.asegurar_cargado(db)
+    filtros = dict(
+        barrio_id=barrio_id,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        tipo_accidente_id=tipo_accidente_id,
+        gravedad_id=gravedad_id,
+    )
+
+    def construir():
+        with almacen.lock:
+            indices = almacen.filtrar(con_coordenadas=True, **filtros)
+            return IndiceClusters(
+                ids=almacen.columna("id")[indices],
+                lat=almacen.columna("lat")[indices],
+                lng=almacen.columna("lng")[indices],
+                gravedad_id=almacen.columna("gravedad_id")[indices],
+            )
+
+    clave = (almacen.version, tuple(sorted(filtros.items())))
+    return cache_clusters.obtener(clave, construir).consultar(zoom, bbox)
+
+# --- MAPA DE CALOR ---
+MAX_ZOOM_CALOR = 19
+cache_tiles_calor = CacheLRU(max_entradas=1024)
+
+def obtener_tile_calor(
+    db: Session,
+    z: int,
+    x: int,
+    y: int,
+    formato: str = "png",
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    tipo_accidente_id: Optional[int] = None,
+    gravedad_id: Optional[int] = None,
+):
+    """
+    Tile de calor como PNG (bytes) o como grilla de densidad (formato "json").
+    Solo se leen del almacén los puntos del tile y su margen, vía la grilla espacial.
+    """
+    almacen.asegurar_cargado(db)
+    filtros = dict(
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        tipo_accidente_id=tipo_accidente_id,
+        gravedad_id=gravedad_id,
+    )
+
+    def construir():
+        with almacen.lock:
+            indices = almacen.filtrar(bbox=mapa_calor.bbox_tile(z, x, y, mapa_calor.MARGEN_PX), **filtros)
+            lat = almacen.columna("lat")[indices]
+            lng = almacen.columna("lng")[indices]
+        dens = mapa_calor.densidad(lat, lng, z, x, y)
+        if formato == "json":
+            return mapa_calor.grilla_json(dens, z)
+        return mapa_calor.codificar_png(mapa_calor.colorear(mapa_calor.intensidad(dens, z)))
+
+    clave = (z, x, y, formato, tuple(sorted(filtros.items())))
+    return cache_tiles_calor.obtener(clave, construir)
+
+def _tiles_afectados(puntos, max_zoom: int) -> set:
+    coordenadas = [p for p in puntos if p is not None]
+    if not coordenadas:
+        return set()
+    lat, lng = zip(*coordenadas)
+    return mapa_calor.tiles_afectados(lat, lng, zooms=range(max_zoom + 1))
+
+def invalidar_tiles_calor(*puntos: Optional[Tuple[float, float]]):
+    """Descarta del caché solo los tiles (de todos los zooms) que cubren los puntos y su margen."""
+    afectados = _tiles_afectados(puntos, MAX_ZOOM_CALOR)
+    if afectados:
+        cache_tiles_calor.invalidar(lambda clave: clave[:3] in afectados)
+
+# --- TILES VECTORIALES (MVT) ---
+MAX_ZOOM_MVT = 20
+MAX_FILTROS_MVT = 32  # Combinaciones de filtros con tiles en disco
+cache_tiles_mvt = CacheTilesDisco(settings.TILES_CACHE_DIR, max_filtros=MAX_FILTROS_MVT)
+
+def _clave_filtros(filtros: dict) -> str:
+    texto = "&".join(f"{k}={v}" for k, v in sorted(filtros.items()) if v is not None)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+
+def obtener_tile_mvt(
+    db: Session,
+    z: int,
+    x: int,
+    y: int,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    tipo_accidente_id: Optional[int] = None,
+    gravedad_id: Optional[int] = None,
+) -> bytes:
+    """
+    Tile vectorial con las capas "accidentes" y "barrios". Se guarda en disco bajo
+    un hash de los filtros; si el archivo existe se sirve tal cual.
+    """
+    almacen.asegurar_cargado(db)
+    filtros = dict(
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        tipo_accidente_id=tipo_accidente_id,
+        gravedad_id=gravedad_id,
+    )
+    clave = _clave_filtros(filtros)
+    generacion = cache_tiles_mvt.generacion
+    tile = cache_tiles_mvt.leer(almacen.huella, clave, (z, x, y))
+    if tile is not None:
+        return tile
+
+    margen_px = 256 * mvt.BUFFER / mvt.EXTENT
+    with almacen.lock:
+        indices = almacen.filtrar(bbox=mapa_calor.bbox_tile(z, x, y, margen_px), **filtros)
+        columnas = {
+            nombre: almacen.columna(nombre)[indices]
+            for nombre in ("id", "lat", "lng", "tipo_accidente_id", "gravedad_id", "barrio_id")
+        }
+    tile = mvt.construir_tile(
+        z, x, y,
+        ids=columnas["id"], lat=columnas["lat"], lng=columnas["lng"],
+        tipo_accidente_id=columnas["tipo_accidente_id"],
+        gravedad_id=columnas["gravedad_id"],
+        barrio_id=columnas["barrio_id"],
+    )
+    cache_tiles_mvt.guardar(clave, (z, x, y), tile, generacion)
+    return tile
+
+def invalidar_tiles_mvt(*puntos: Optional[Tuple[float, float]]):
+    """Borra del disco, para todas las combinaciones de filtros, los tiles que contienen los puntos."""
+    afectados = _tiles_afectados(puntos, MAX_ZOOM_MVT)
+    if afectados:
+        cache_tiles_mvt.invalidar(almacen.huella, afectados)
+
+# --- RESUMEN DIARIO ---
+# (fecha, barrio_id, tipo_accidente_id, gravedad_victima_id, cantidad_victima)
+FilaResumen = Tuple[date, Optional[int], int, int, Optional[int]]
+
+def _clave_resumen(db: Session, accidente: modelos.Accidente) -> FilaResumen:
+    fecha = accidente.fecha.date() if isinstance(accidente.fecha, datetime) else accidente.fecha
+    barrio_id = db.query(modelos.Ubicacion.barrio_id)\
+        .filter(modelos.Ubicacion.id == accidente.ubicacion_id).scalar()
+    return fecha, barrio_id, accidente.tipo_accidente_id, accidente.gravedad_victima_id, accidente.cantidad_victima
+
+def _insert_dialecto(db: Session):
+    dialecto = db.get_bind().dialect.name
+    if dialecto == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+    elif dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialecto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert no soportado para el dialecto {dialecto}")
+    return dialecto, insert
+
+def ajustar_resumen(db: Session, filas: List[FilaResumen], signo: int) -> None:
+    """
+    Suma (`signo` = 1) o resta (`signo` = -1) las filas dadas al rollup diario con
+    un único upsert por lote. No hace commit: debe ir en la transacción del cambio.
+    """
+    R = modelos.ResumenAccidenteDiario
+    deltas = {}
+    for fecha, barrio_id, tipo_accidente_id, gravedad_id, victimas in filas:
+        clave = (fecha, barrio_id or 0, tipo_accidente_id, gravedad_id)
+        accidentes_previos, victimas_previas = deltas.get(clave, (0, 0))
+        deltas[clave] = (accidentes_previos + signo, victimas_previas + signo * (victimas or 0))
+    if not deltas:
+        return
+
+    valores = [
+        dict(fecha=fecha, barrio_id=barrio_id, tipo_accidente_id=tipo, gravedad_victima_id=gravedad,
+             accidentes=accidentes, victimas=victimas)
+        for (fecha, barrio_id, tipo, gravedad), (accidentes, victimas) in deltas.items()
+    ]
+    dialecto, insert = _insert_dialecto(db)
+    stmt = insert(R)
+    if dialecto == "mysql":
+        stmt = stmt.on_duplicate_key_update(
+            accidentes=R.accidentes + stmt.inserted.accidentes,
+            victimas=R.victimas + stmt.inserted.victimas,
+        )
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[R.fecha, R.barrio_id, R.tipo_accidente_id, R.gravedad_victima_id],
+            set_=dict(accidentes=R.accidentes + stmt.excluded.accidentes, victimas=R.victimas + stmt.excluded.victimas),
+        )
+    db.execute(stmt, valores)
+    if signo < 0:
+        # Las celdas que quedan en cero se borran para no inflar la tabla
+        db.query(R).filter(R.accidentes <= 0, or_(*(
+            and_(R.fecha == v["fecha"], R.barrio_id == v["barrio_id"],
+                 R.tipo_accidente_id == v["tipo_accidente_id"], R.gravedad_victima_id == v["gravedad_victima_id"])
+            for v in valores
+        ))).delete(synchronize_session=False)
+
+def reconstruir_resumen(db: Session) -> int:
+    """Recalcula el rollup completo desde `accidente_accidente` con un INSERT ... SELECT. Devuelve las filas creadas."""
+    R, A, U = modelos.ResumenAccidenteDiario, modelos.Accidente, modelos.Ubicacion
+    seleccion = select(
+        A.fecha,
+        func.coalesce(U.barrio_id, 0),
+        A.tipo_accidente_id,
+        A.gravedad_victima_id,
+        func.count(A.id),
+        func.coalesce(func.sum(A.cantidad_victima), 0),
+    ).select_from(A).outerjoin(U, A.ubicacion_id == U.id)\
+        .group_by(A.fecha, func.coalesce(U.barrio_id, 0), A.tipo_accidente_id, A.gravedad_victima_id)
+    db.query(R).delete(synchronize_session=False)
+    db.execute(insert(R).from_select(
+        ["fecha", "barrio_id", "tipo_accidente_id", "gravedad_victima_id", "accidentes", "victimas"], seleccion,
+    ))
+    db.commit()
+    invalidar_agregados()
+    return db.query(func.count()).select_from(R).scalar()
+
+def asegurar_resumen(db: Session) -> None:
+    """Crea la tabla del rollup si no existe y, en ese caso, la llena desde los accidentes."""
+    tabla = modelos.ResumenAccidenteDiario.__table__
+    if not inspect(db.get_bind()).has_table(tabla.name):
+        tabla.create(db.get_bind())
+        reconstruir_resumen(db)
+
+# --- ESTADÍSTICAS AGREGADAS ---
+class _FuenteStats:
+    """Columnas de la tabla sobre la que se agrega: los hechos o el rollup diario."""
+    def __init__(self, desde_resumen: bool):
+        A, U = modelos.Accidente, modelos.Ubicacion
+        self.desde_resumen = desde_resumen
+        if desde_resumen:
+            R = modelos.ResumenAccidenteDiario
+            self.tabla = R
+            self.fecha, self.tipo, self.gravedad = R.fecha, R.tipo_accidente_id, R.gravedad_victima_id
+            self.barrio = R.barrio_id
+            self.accidentes = func.coalesce(func.sum(R.accidentes), 0)
+            self.victimas = func.coalesce(func.sum(R.victimas), 0)
+        else:
+            self.tabla = A
+            self.fecha, self.tipo, self.gravedad = A.fecha, A.tipo_accidente_id, A.gravedad_victima_id
+            self.barrio = U.barrio_id
+            self.accidentes = func.count(A.id)
+            self.victimas = func.coalesce(func.sum(A.cantidad_victima), 0)
+
+def _dimensiones_stats(fuente: _FuenteStats):
+    A, B = modelos.Accidente, modelos.Barrio
+    anio, mes = func.extract("year", fuente.fecha), func.extract("month", fuente.fecha)
+    # En el rollup, barrio_id = 0 representa "sin barrio"
+    barrio = func.nullif(fuente.barrio, 0) if fuente.desde_resumen else fuente.barrio
+    # nombre -> (columnas (etiqueta, expresión) que se agrupan, tablas de catálogo que necesita)
+    return {
+        "zona": ([("zona_id", B.zona_id), ("zona", modelos.Zona.nombre)], ("barrio", "zona")),
+        "barrio": ([("barrio_id", barrio), ("barrio", B.nombre)], ("barrio",)),
+        "tipo": ([("tipo_accidente_id", fuente.tipo), ("tipo", modelos.TipoAccidente.nombre)], ("tipo",)),
+        "gravedad": ([("gravedad_id", fuente.gravedad), ("gravedad", modelos.GravedadVictima.nivel_gravedad)], ("gravedad",)),
+        "condicion": ([("condicion_victima_id", A.condicion_victima_id), ("condicion", modelos.CondicionVictima.rol_victima)], ("condicion",)),
+        "sexo": ([("sexo", A.sexo_victima)], ()),
+        "mes": ([("anio", anio), ("mes", mes)], ()),
+    }
+
+DIMENSIONES_STATS = ("zona", "barrio", "tipo", "gravedad", "condicion", "sexo", "mes")
+# Dimensiones que guarda el rollup diario; el resto se agrega sobre la tabla de hechos
+DIMENSIONES_RESUMEN = frozenset({"zona", "barrio", "tipo", "gravedad", "mes"})
+cache_stats = CacheLRU(max_entradas=128)
+
+def obtener_estadisticas(
+    db: Session,
+    group_by: Tuple[str, ...],
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    barrio_id: Optional[int] = None,
+    zona_id: Optional[int] = None,
+    tipo_accidente_id: Optional[int] = None,
+    gravedad_id: Optional[int] = None,
+) -> dict:
+    """
+    Conteo de accidentes y suma de víctimas agrupados por las dimensiones pedidas,
+    en un único GROUP BY. Si todas las dimensiones están en el rollup diario se lee
+    de ahí (miles de filas en vez de la tabla completa). El resultado se cachea por
+    consulta hasta el próximo alta o baja de accidente. Lanza ValueError si alguna
+    dimensión no existe.
+    """
+    desconocidas = [d for d in group_by if d not in DIMENSIONES_STATS]
+    if desconocidas:
+        raise ValueError(f"Dimensiones no soportadas: {', '.join(desconocidas)}")
+    filtros = dict(
+        fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, barrio_id=barrio_id,
+        zona_id=zona_id, tipo_accidente_id=tipo_accidente_id, gravedad_id=gravedad_id,
+    )
+    clave = (tuple(group_by), tuple(sorted(filtros.items())))
+    return cache_stats.obtener(clave, lambda: _calcular_estadisticas(db, group_by, **filtros))
+
+def _calcular_estadisticas(db: Session, group_by, fecha_desde, fecha_hasta, barrio_id, zona_id, tipo_accidente_id, gravedad_id) -> dict:
+    A, U, B = modelos.Accidente, modelos.Ubicacion, modelos.Barrio
+    fuente = _FuenteStats(desde_resumen=set(group_by) <= DIMENSIONES_RESUMEN)
+    dimensiones = _dimensiones_stats(fuente)
+    columnas = [expr.label(etiqueta) for d in group_by for etiqueta, expr in dimensiones[d][0]]
+    catalogos = {c for d in group_by for c in dimensiones[d][1]}
+    if barrio_id is not None:
+        catalogos.add("ubicacion")
+    if zona_id is not None:
+        catalogos.add("barrio")
+
+    query = db.query(
+        *columnas,
+        fuente.accidentes.label("accidentes"),
+        fuente.victimas.label("victimas"),
+    ).select_from(fuente.tabla)
+    if not fuente.desde_resumen and catalogos & {"ubicacion", "barrio", "zona"}:
+        query = query.outerjoin(U, A.ubicacion_id == U.id)
+    if catalogos & {"barrio", "zona"}:
+        query = query.outerjoin(B, fuente.barrio == B.id)
+    if "zona" in catalogos:
+        query = query.outerjoin(modelos.Zona, B.zona_id == modelos.Zona.id)
+    if "tipo" in catalogos:
+        query = query.outerjoin(modelos.TipoAccidente, fuente.tipo == modelos.TipoAccidente.id)
+    if "gravedad" in catalogos:
+        query = query.outerjoin(modelos.GravedadVictima, fuente.gravedad == modelos.GravedadVictima.id)
+    if "condicion" in catalogos:
+        query = query.outerjoin(modelos.CondicionVictima, A.condicion_victima_id == modelos.CondicionVictima.id)
+
+    if fecha_desde is not None:
+        query = query.filter(fuente.fecha >= fecha_desde)
+    if fecha_hasta is not None:
+        query = query.filter(fuente.fecha <= fecha_hasta)
+    if barrio_id is not None:
+        query = query.filter(fuente.barrio == barrio_id)
+    if zona_id is not None:
+        query = query.filter(B.zona_id == zona_id)
+    if tipo_accidente_id is not None:
+        query = query.filter(fuente.tipo == tipo_accidente_id)
+    if gravedad_id is not None:
+        query = query.filter(fuente.gravedad == gravedad_id)
+
+    if columnas:
+        query = query.group_by(*columnas).order_by(*columnas)
+
+    grupos = []
+    for fila in query.all():
+        grupo = dict(fila._mapping)
+        if "mes" in group_by:
+            grupo["mes"] = f"{int(grupo.pop('anio'))}-{int(grupo['mes']):02d}"
+        grupo["accidentes"] = int(grupo["accidentes"])
+        grupo["victimas"] = int(grupo["victimas"])
+        grupos.append(grupo)
+    return {
+        "group_by": list(group_by),
+        "total": {
+            "accidentes": sum(g["accidentes"] for g in grupos),
+            "victimas": sum(g["victimas"] for g in grupos),
+        },
+        "grupos": grupos,
+    }
+
+def invalidar_agregados() -> None:
+    """Descarta las estadísticas y series cacheadas tras un cambio en los accidentes."""
+    cache_stats.invalidar()
+    cache_series.invalidar()
+
+# --- SERIES DE TIEMPO ---
+cache_series = CacheLRU(max_entradas=64)
+
+def obtener_serie(
+    db: Session,
+    freq: str = "month",
+    ventana: Optional[int] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    barrio_id: Optional[int] = None,
+    zona_id: Optional[int] = None,
+    tipo_accidente_id: Optional[int] = None,
+    gravedad_id: Optional[int] = None,
+) -> dict:
+    """
+    Accidentes y víctimas por día, semana o mes con media móvil, variación interanual
+    y línea base estacional. Los conteos diarios salen del rollup y el resto se calcula
+    con NumPy; el resultado se cachea por combinación de filtros. Lanza ValueError si
+    la frecuencia no existe.
+    """
+    if freq not in series.FRECUENCIAS:
+        raise ValueError(f"Frecuencia no soportada: {freq}. Use {', '.join(series.FRECUENCIAS)}")
+    ventana = ventana or series.VENTANA_POR_DEFECTO[freq]
+    filtros = dict(
+        fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, barrio_id=barrio_id,
+        zona_id=zona_id, tipo_accidente_id=tipo_accidente_id, gravedad_id=gravedad_id,
+    )
+    clave = (freq, ventana, tuple(sorted(filtros.items())))
+    return cache_series.obtener(clave, lambda: _calcular_serie(db, freq, ventana, **filtros))
+
+def _calcular_serie(db: Session, freq, ventana, fecha_desde, fecha_hasta, barrio_id, zona_id, tipo_accidente_id, gravedad_id) -> dict:
+    R = modelos.ResumenAccidenteDiario
+    query = db.query(R.fecha, func.sum(R.accidentes), func.sum(R.victimas))
+    if zona_id is not None:
+        query = query.join(modelos.Barrio, R.barrio_id == modelos.Barrio.id)\
+            .filter(modelos.Barrio.zona_id == zona_id)
+    if fecha_desde is not None:
+        query = query.filter(R.fecha >= fecha_desde)
+    if fecha_hasta is not None:
+        query = query.filter(R.fecha <= fecha_hasta)
+    if barrio_id is not None:
+        query = query.filter(R.barrio_id == barrio_id)
+    if tipo_accidente_id is not None:
+        query = query.filter(R.tipo_accidente_id == tipo_accidente_id)
+    if gravedad_id is not None:
+        query = query.filter(R.gravedad_victima_id == gravedad_id)
+    filas = query.group_by(R.fecha).order_by(R.fecha).all()
+
+    fechas = np.array([fila[0] for fila in filas], dtype="datetime64[D]")
+    accidentes = np.array([fila[1] for fila in filas], dtype=np.float64)
+    victimas = np.array([fila[2] or 0 for fila in filas], dtype=np.float64)
+    return series.construir_serie(fechas, accidentes, victimas, freq, ventana)
+
+# --- HOTSPOTS ---
+_hotspots_lock = threading.Lock()
+# Celdas con altas o bajas desde la última corrida (las marca este proceso)
+_celdas_sucias: set = set()
+_celdas_sucias_lock = threading.Lock()
+# Estado de la última corrida de este proceso; None = la próxima es completa
+_grilla_hotspots: Optional[hotspots.GrillaHotspots] = None
+_NOMBRE_LOCK_HOTSPOTS = "accidente_hotspots"
+
+def asegurar_tablas_hotspots(db: Session) -> None:
+    for modelo in (modelos.HotspotCelda, modelos.Hotspot):
+        modelo.__table__.create(db.get_bind(), checkfirst=True)
+
+def marcar_celdas_hotspots(*puntos: Optional[Tuple[float, float]]):
+    """Anota las celdas de los puntos (lat, lng) para que el próximo job las recalcule."""
+    celdas = {hotspots.celda(lat, lng) for lat, lng in (p for p in puntos if p is not None)}
+    if celdas:
+        with _celdas_sucias_lock:
+            _celdas_sucias.update(celdas)
+
+@contextmanager
+def _lock_consultivo(db: Session, nombre: str):
+    """
+    Lock consultivo de la BD (MySQL/MariaDB y PostgreSQL) sobre una conexión propia,
+    así el commit de la sesión no lo suelta. Entrega False si otro proceso lo tiene.
+    """
+    motor = db.get_bind()
+    if motor.dialect.name not in ("mysql", "postgresql"):
+        yield True
+        return
+    with motor.connect() as conexion:
+        if motor.dialect.name == "mysql":
+            tomado = conexion.execute(text("SELECT GET_LOCK(:nombre, 0)"), {"nombre": nombre}).scalar() == 1
+            soltar = text("SELECT RELEASE_LOCK(:nombre)")
+        else:
+            tomado = conexion.execute(text("SELECT pg_try_advisory_lock(hashtext(:nombre))"), {"nombre": nombre}).scalar()
+            soltar = text("SELECT pg_advisory_unlock(hashtext(:nombre))")
+        try:
+            yield bool(tomado)
+        finally:
+            if tomado:
+                conexion.execute(soltar, {"nombre": nombre})
+
+def _acumular_celdas_almacen(celdas: set) -> dict:
+    """Acumulados actuales de `celdas` (None si quedó vacía), leyendo solo su bbox del almacén."""
+    with almacen.lock:
+        indices = almacen.filtrar(bbox=hotspots.bbox_celdas(celdas), con_coordenadas=True)
+        lat = almacen.columna("lat")[indices]
+        lng = almacen.columna("lng")[indices]
+        gravedad_id = almacen.columna("gravedad_id")[indices]
+    acumulados = hotspots.acumular_celdas(lat, lng, gravedad_id)
+    return {c: acumulados.get(c) for c in celdas}
+
+def _guardar_celdas(db: Session, cambios: dict) -> None:
+    C = modelos.HotspotCelda
+    celdas = list(cambios)
+    for i in range(0, len(celdas), 500):
+        lote = celdas[i:i + 500]
+        db.query(C).filter(tuple_(C.celda_x, C.celda_y).in_(lote)).delete(synchronize_session=False)
+    filas = [
+        dict(celda_x=x, celda_y=y, accidentes=a[0], peso=a[1], suma_lat=a[2], suma_lng=a[3])
+        for (x, y), a in cambios.items() if a is not None
+    ]
+    if filas:
+        db.execute(insert(C), filas)
+
+def _recalcular_hotspots(db: Session) -> dict:
+    """Corrida completa: acumula todo el almacén, sincroniza la tabla de celdas y reemplaza los hotspots."""
+    global _grilla_hotspots
+    with almacen.lock:
+        mascara = almacen.mascara(con_coordenadas=True)
+        lat = almacen.columna("lat")[mascara]
+        lng = almacen.columna("lng")[mascara]
+        gravedad_id = almacen.columna("gravedad_id")[mascara]
+    nuevas = hotspots.acumular_celdas(lat, lng, gravedad_id)
+
+    C, H = modelos.HotspotCelda, modelos.Hotspot
+    anteriores = {
+        (x, y): (n, p, sl, sg)
+        for x, y, n, p, sl, sg in db.query(C.celda_x, C.celda_y, C.accidentes, C.peso, C.suma_lat, C.suma_lng)
+    }
+    cambiadas = hotspots.celdas_cambiadas(anteriores, nuevas)
+    _guardar_celdas(db, {c: nuevas.get(c) for c in cambiadas})
+    grilla = hotspots.GrillaHotspots(nuevas)
+    db.query(H).delete(synchronize_session=False)
+    if grilla.hotspots:
+        db.execute(insert(H), list(grilla.hotspots.values()))
+    db.commit()
+    _grilla_hotspots = grilla
+    return {"celdas_actualizadas": len(cambiadas), "hotspots": len(grilla.hotspots)}
+
+def _actualizar_hotspots_incremental(db: Session, sucias: set) -> dict:
+    """Recalcula solo las celdas sucias, y los hotspots de su entorno."""
+    H = modelos.Hotspot
+    actuales = _acumular_celdas_almacen(sucias)
+    previas = {c: _grilla_hotspots.celdas.get(c) for c in sucias}
+    cambios = {c: actuales[c] for c in hotspots.celdas_cambiadas(
+        {c: a for c, a in previas.items() if a is not None},
+        {c: a for c, a in actuales.items() if a is not None},
+    )}
+    if not cambios:
+        return {"celdas_actualizadas": 0, "hotspots": None}
+    _guardar_celdas(db, cambios)
+    borrados, nuevos, rangos = _grilla_hotspots.actualizar(cambios)
+    for i in range(0, len(borrados), 500):
+        db.query(H).filter(H.id.in_(borrados[i:i + 500])).delete(synchronize_session=False)
+    if nuevos:
+        db.execute(insert(H), nuevos)
+    if rangos:
+        db.execute(
+            update(H).where(H.id == bindparam("hotspot_id")).values(rango=bindparam("nuevo_rango")),
+            [{"hotspot_id": hotspot_id, "nuevo_rango": rango} for hotspot_id, rango in rangos.items()],
+        )
+    db.commit()
+    return {"celdas_actualizadas": len(cambios), "hotspots": len(_grilla_hotspots.hotspots)}
+
+def actualizar_hotspots(db: Session, forzar: bool = False) -> dict:
+    """
+    Job de hotspots. La primera corrida del proceso (o con `forzar`) acumula todo
+    el almacén y reescribe las celdas que cambiaron y la tabla de hotspots. Las
+    siguientes solo recalculan las celdas que `marcar_celdas_hotspots` anotó en
+    altas y bajas, y reescriben los hotspots de su entorno (más los rangos que se
+    movieron); sin celdas anotadas no toca la BD.
+
+    Un lock consultivo evita dos corridas simultáneas. Las celdas sucias y el
+    almacén son de este proceso, así que con varios workers el job debe correr en
+    uno solo (HOTSPOTS_INTERVALO_SEG=0 en el resto).
+    """
+    global _grilla_hotspots
+    with _hotspots_lock, _lock_consultivo(db, _NOMBRE_LOCK_HOTSPOTS) as tomado:
+        inicio = time.perf_counter()
+        if not tomado:
+            return {"celdas_actualizadas": 0, "hotspots": None, "segundos": 0.0}
+        almacen.asegurar_cargado(db)
+        with _celdas_sucias_lock:
+            sucias = set(_celdas_sucias)
+            _celdas_sucias.clear()
+        try:
+            if _grilla_hotspots is None or forzar:
+                resultado = _recalcular_hotspots(db)
+            elif sucias:
+                resultado = _actualizar_hotspots_incremental(db, sucias)
+            else:
+                resultado = {"celdas_actualizadas": 0, "hotspots": None}
+        except Exception:
+            # La grilla en memoria pudo quedar adelantada respecto de la BD
+            db.rollback()
+            _grilla_hotspots = None
+            raise
+        resultado["segundos"] = round(time.perf_counter() - inicio, 3)
+        return resultado
+
+def obtener_hotspots(db: Session, limit: int = 20, min_accidentes: int = 1) -> List[modelos.Hotspot]:
+    return db.query(modelos.Hotspot)\
+        .filter(modelos.Hotspot.accidentes >= min_accidentes)\
+        .order_by(modelos.Hotspot.rango)\
+        .limit(limit).all()
+
 # --- PROXY ---
 proxy = AccidentProxy()
 def obtener_proxy(refrescar: bool = False):
@@ -245,14 +1088,24 @@ def obtener_proxy(refrescar: bool = False):
     """
     return proxy.obtener_accidentes(refrescar)
 
-# --- LECTURA SENSOR ---
-
-def create_lectura_sensor(db: Session, lectura: schemas.LecturaSensorCreate):
-    db_lectura = LecturaSensor(**lectura.dict())
-    db.add(db_lectura)
-    db.commit()
-    db.refresh(db_lectura)
-    return db_lectura
-
-def get_lecturas_sensores(db: Session):
-    return db.query(LecturaSensor).all()
\ No newline at end of file
+def asegurar_indices_accidente(db: Session) -> List[str]:
+    """
+    Crea los índices de `accidente_accidente` que declara el modelo y la tabla no
+    tiene (el volcado original no trae el de `updated`, que usa el refresco del
+    proxy); `create_all` no los agrega a una tabla existente. Se compara por
+    columnas y no por nombre, porque las FK del volcado ya tienen sus índices con
+    los nombres de Django. Devuelve los creados.
+    """
+    bind = db.get_bind()
+    tabla = modelos.Accidente.__table__
+    inspector = inspect(bind)
+    cubiertas = [tuple(indice["column_names"]) for indice in inspector.get_indexes(tabla.name)]
+    cubiertas.append(tuple(inspector.get_pk_constraint(tabla.name)["constrained_columns"]))
+    creados = []
+    for indice in sorted(tabla.indexes, key=lambda i: i.name):
+        columnas = tuple(columna.name for columna in indice.columns)
+        if not any(existente[:len(columnas)] == columnas for existente in cubiertas):
+            indice.create(bind)
+            cubiertas.append(columnas)
+            creados.append(indice.name)
+    return creados
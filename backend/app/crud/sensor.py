@@ -0,0 +1,871 @@
+# Fastapi_React/Backend/app/crud/sensor.py
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import delete, exc, func, insert, inspect, select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import anillo_sensor, anomalias, sensor, trama_sensor
+from app.models.sensor import AnomaliaSensor, LecturaSensor, ResumenLecturaSensor, Sensor
+from app.schemas import schemas
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+
+    def _bloquear(archivo) -> bool:
+        try:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+except ImportError:  # Windows
+    import msvcrt
+
+    def _bloquear(archivo) -> bool:
+        try:
+            msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+
+# --- LECTURA SENSOR ---
+# Versiones async: los endpoints del sensor reciben muchas peticiones pequeñas y no
+# deben bloquear el event loop mientras esperan a la BD.
+
+async def get_lecturas_sensores(db: AsyncSession, desde: Optional[datetime] = None, hasta: Optional[datetime] = None,
+                                limit: int = 500, sensor_id: Optional[int] = None) -> List[LecturaSensor]:
+    """
+    Lecturas más recientes primero dentro de [desde, hasta). Con `sensor_id` usa el
+    índice (sensor_id, fecha_hora) y solo recorre las lecturas de ese equipo.
+    """
+    consulta = select(LecturaSensor)
+    if sensor_id is not None:
+        consulta = consulta.where(LecturaSensor.sensor_id == sensor_id)
+    if desde is not None:
+        consulta = consulta.where(LecturaSensor.fecha_hora >= desde)
+    if hasta is not None:
+        consulta = consulta.where(LecturaSensor.fecha_hora < hasta)
+    consulta = consulta.order_by(LecturaSensor.fecha_hora.desc(), LecturaSensor.id.desc()).limit(limit)
+    resultado = await db.execute(consulta)
+    return list(resultado.scalars().all())
+
+
+# --- RESUMEN POR MINUTO / HORA / DÍA ---
+RESOLUCIONES = ("minute", "hour", "day")
+# Ventana máxima que se sirve en cada resolución cuando no se pide una explícita (~360-720 puntos)
+_VENTANA_RESOLUCION = (("minute", timedelta(hours=6)), ("hour", timedelta(days=30)))
+
+# (lecturas, temp_min, temp_max, temp_suma, hum_min, hum_max, hum_suma)
+Agregado = List[float]
+
+
+def inicio_periodo(fecha_hora: datetime, resolucion: str) -> datetime:
+    if resolucion == "minute":
+        return fecha_hora.replace(second=0, microsecond=0)
+    if resolucion == "hour":
+        return fecha_hora.replace(minute=0, second=0, microsecond=0)
+    if resolucion == "day":
+        return fecha_hora.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Resolución no válida: {resolucion}. Usa una de {', '.join(RESOLUCIONES)}")
+
+
+def resolucion_para(desde: Optional[datetime], hasta: Optional[datetime]) -> str:
+    """La resolución más fina que mantiene acotada la cantidad de puntos de la ventana."""
+    if desde is None:
+        return "day"
+    ventana = (hasta or datetime.now(timezone.utc).replace(tzinfo=None)) - desde  # Lecturas en UTC naive
+    for resolucion, maxima in _VENTANA_RESOLUCION:
+        if ventana <= maxima:
+            return resolucion
+    return "day"
+
+
+def acumular_resumen(filas: Iterable[Tuple[int, datetime, float, float]],
+                     acumulado: Optional[Dict[Tuple[str, int, datetime], Agregado]] = None):
+    """Agrega (sensor_id, fecha_hora, temperatura, humedad) por equipo, resolución e intervalo."""
+    acumulado = {} if acumulado is None else acumulado
+    for sensor_id, fecha_hora, temperatura, humedad in filas:
+        for resolucion in RESOLUCIONES:
+            clave = (resolucion, sensor_id, inicio_periodo(fecha_hora, resolucion))
+            previo = acumulado.get(clave)
+            if previo is None:
+                acumulado[clave] = [1, temperatura, temperatura, temperatura, humedad, humedad, humedad]
+            else:
+                previo[0] += 1
+                previo[1] = min(previo[1], temperatura)
+                previo[2] = max(previo[2], temperatura)
+                previo[3] += temperatura
+                previo[4] = min(previo[4], humedad)
+                previo[5] = max(previo[5], humedad)
+                previo[6] += humedad
+    return acumulado
+
+
+def _valores_resumen(acumulado: Dict[Tuple[str, int, datetime], Agregado]) -> List[dict]:
+    return [
+        dict(resolucion=resolucion, sensor_id=sensor_id, periodo=periodo, lecturas=n,
+             temperatura_min=tmin, temperatura_max=tmax, temperatura_suma=tsuma,
+             humedad_min=hmin, humedad_max=hmax, humedad_suma=hsuma)
+        for (resolucion, sensor_id, periodo), (n, tmin, tmax, tsuma, hmin, hmax, hsuma) in acumulado.items()
+    ]
+
+
+def _upsert_resumen(dialecto: str):
+    """INSERT que, si el intervalo ya existe, combina mín/máx y suma conteos y sumas."""
+    R = ResumenLecturaSensor
+    if dialecto == "mysql":
+        from sqlalchemy.dialects.mysql import insert as insert_dialecto
+    elif dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as insert_dialecto
+    elif dialecto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+    else:
+        raise NotImplementedError(f"Upsert no soportado para el dialecto {dialecto}")
+    stmt = insert_dialecto(R)
+    nuevo = stmt.inserted if dialecto == "mysql" else stmt.excluded
+    # SQLite no tiene LEAST/GREATEST; min()/max() con dos argumentos son escalares
+    menor = func.min if dialecto == "sqlite" else func.least
+    mayor = func.max if dialecto == "sqlite" else func.greatest
+    cambios = dict(
+        lecturas=R.lecturas + nuevo.lecturas,
+        temperatura_min=menor(R.temperatura_min, nuevo.temperatura_min),
+        temperatura_max=mayor(R.temperatura_max, nuevo.temperatura_max),
+        temperatura_suma=R.temperatura_suma + nuevo.temperatura_suma,
+        humedad_min=menor(R.humedad_min, nuevo.humedad_min),
+        humedad_max=mayor(R.humedad_max, nuevo.humedad_max),
+        humedad_suma=R.humedad_suma + nuevo.humedad_suma,
+    )
+    if dialecto == "mysql":
+        return stmt.on_duplicate_key_update(**cambios)
+    return stmt.on_conflict_do_update(index_elements=[R.resolucion, R.sensor_id, R.periodo], set_=cambios)
+
+
+async def sumar_al_resumen(conexion: AsyncConnection, filas: List[dict]) -> None:
+    """Suma un lote recién insertado al resumen, en la misma transacción del insert."""
+    acumulado = acumular_resumen((f["sensor_id"], f["fecha_hora"], f["temperatura"], f["humedad"]) for f in filas)
+    if acumulado:
+        await conexion.execute(_upsert_resumen(conexion.dialect.name), _valores_resumen(acumulado))
+
+
+def reconstruir_resumen_sensor(db: Session, tamano_lote: int = 10_000) -> int:
+    """Recalcula el resumen recorriendo `lectura_sensor` por partes. Devuelve las filas del resumen."""
+    filas = db.execute(
+        # Una carga directa del volcado puede traer lecturas sin equipo (anteriores a `sensor_id`)
+        select(func.coalesce(LecturaSensor.sensor_id, SENSOR_POR_DEFECTO), LecturaSensor.fecha_hora,
+               LecturaSensor.temperatura, LecturaSensor.humedad)
+        .execution_options(yield_per=tamano_lote)
+    )
+    acumulado = {}
+    for parte in filas.partitions():
+        acumular_resumen(parte, acumulado)
+    valores = _valores_resumen(acumulado)
+    db.execute(delete(ResumenLecturaSensor))
+    for i in range(0, len(valores), tamano_lote):
+        db.execute(insert(ResumenLecturaSensor), valores[i:i + tamano_lote])
+    db.commit()
+    return len(valores)
+
+
+def asegurar_tablas_sensor(db: Session) -> None:
+    """
+    Crea las tablas e índices que falten. En una BD anterior a los equipos agrega
+    `lectura_sensor.sensor_id` y asigna las lecturas existentes al equipo por
+    defecto; el resumen de entonces no separaba equipos, así que se descarta
+    (se puede recalcular entero desde las lecturas). Llena el resumen si está
+    vacío y hay lecturas.
+    """
+    bind = db.get_bind()
+    sensor.Base.metadata.create_all(bind)
+    columnas = {columna["name"] for columna in inspect(bind).get_columns(LecturaSensor.__tablename__)}
+    if "sensor_id" not in columnas:
+        db.execute(text(f"ALTER TABLE {LecturaSensor.__tablename__} ADD COLUMN sensor_id INTEGER NULL"))
+        db.commit()
+    if db.get(Sensor, SENSOR_POR_DEFECTO) is None:
+        db.add(Sensor(id=SENSOR_POR_DEFECTO, nombre="ESP32 original"))
+        db.commit()
+    if db.query(LecturaSensor.id).filter(LecturaSensor.sensor_id.is_(None)).first() is not None:
+        db.execute(update(LecturaSensor).where(LecturaSensor.sensor_id.is_(None)).values(sensor_id=SENSOR_POR_DEFECTO))
+        db.commit()
+    columnas_resumen = {columna["name"] for columna in inspect(bind).get_columns(ResumenLecturaSensor.__tablename__)}
+    if "sensor_id" not in columnas_resumen:
+        ResumenLecturaSensor.__table__.drop(bind)
+        ResumenLecturaSensor.__table__.create(bind)
+    _sensores_registrados.update(db.scalars(select(Sensor.id)))
+    existentes = {indice["name"] for indice in inspect(bind).get_indexes(LecturaSensor.__tablename__)}
+    for indice in LecturaSensor.__table__.indexes:
+        if indice.name not in existentes:
+            indice.create(bind)
+    if db.query(ResumenLecturaSensor.resolucion).first() is None and db.query(LecturaSensor.id).first() is not None:
+        logger.info("Resumen de sensor reconstruido: %d filas", reconstruir_resumen_sensor(db))
+
+
+async def get_resumen_sensor(db: AsyncSession, resolucion: Optional[str] = None, desde: Optional[datetime] = None,
+                             hasta: Optional[datetime] = None, sensor_id: Optional[int] = None) -> dict:
+    """
+    Serie mín/máx/promedio en la resolución pedida (o la adecuada para la ventana),
+    de un equipo o, sin `sensor_id`, de toda la flota (combinando los equipos de
+    cada intervalo).
+    """
+    resolucion = resolucion or resolucion_para(desde, hasta)
+    if resolucion not in RESOLUCIONES:
+        raise ValueError(f"Resolución no válida: {resolucion}. Usa una de {', '.join(RESOLUCIONES)}")
+    R = ResumenLecturaSensor
+    consulta = select(
+        R.periodo,
+        func.sum(R.lecturas).label("lecturas"),
+        func.min(R.temperatura_min).label("temperatura_min"),
+        func.max(R.temperatura_max).label("temperatura_max"),
+        func.sum(R.temperatura_suma).label("temperatura_suma"),
+        func.min(R.humedad_min).label("humedad_min"),
+        func.max(R.humedad_max).label("humedad_max"),
+        func.sum(R.humedad_suma).label("humedad_suma"),
+    ).where(R.resolucion == resolucion)
+    if sensor_id is not None:
+        consulta = consulta.where(R.sensor_id == sensor_id)
+    if desde is not None:
+        consulta = consulta.where(R.periodo >= inicio_periodo(desde, resolucion))
+    if hasta is not None:
+        consulta = consulta.where(R.periodo < hasta)
+    filas = (await db.execute(consulta.group_by(R.periodo).order_by(R.periodo))).all()
+    return {
+        "resolucion": resolucion,
+        "sensor_id": sensor_id,
+        "serie": [
+            {
+                "periodo": f.periodo,
+                "lecturas": f.lecturas,
+                "temperatura_min": f.temperatura_min,
+                "temperatura_max": f.temperatura_max,
+                "temperatura_promedio": round(f.temperatura_suma / f.lecturas, 2),
+                "humedad_min": f.humedad_min,
+                "humedad_max": f.humedad_max,
+                "humedad_promedio": round(f.humedad_suma / f.lecturas, 2),
+            }
+            for f in filas
+        ],
+    }
+
+
+# --- EQUIPOS ---
+SENSOR_POR_DEFECTO = 1  # Equipo de las lecturas sin sensor_id (el firmware JSON original)
+_sensores_registrados = set()  # Ids que ya existen en la tabla `sensor`
+# Última lectura de cada equipo, por fecha_hora; se actualiza al recibir, sin consultar la BD
+ultimas_por_sensor: Dict[int, dict] = {}
+
+
+def _actualizar_ultima(fila: dict) -> None:
+    previa = ultimas_por_sensor.get(fila["sensor_id"])
+    if previa is None or fila["fecha_hora"] >= previa["fecha_hora"]:
+        ultimas_por_sensor[fila["sensor_id"]] = fila
+
+
+async def registrar_sensores(conexion: AsyncConnection, ids: Iterable[int]) -> set:
+    """
+    Da de alta los equipos que mandan lecturas por primera vez (la FK lo exige).
+    Devuelve los ids verificados; el llamador los suma a `_sensores_registrados`
+    recién cuando la transacción hizo commit, si no un rollback los dejaría
+    marcados como existentes sin estar en la tabla.
+    """
+    nuevos = set(ids) - _sensores_registrados
+    if not nuevos:
+        return nuevos
+    existentes = set((await conexion.execute(select(Sensor.id).where(Sensor.id.in_(nuevos)))).scalars())
+    faltantes = nuevos - existentes
+    if faltantes:
+        await conexion.execute(insert(Sensor), [{"id": i, "nombre": f"Sensor {i}"} for i in sorted(faltantes)])
+        logger.info("Equipos nuevos registrados: %s", sorted(faltantes))
+    return nuevos
+
+
+async def get_sensores(db: AsyncSession) -> List[dict]:
+    sensores = (await db.execute(select(Sensor).order_by(Sensor.id))).scalars().all()
+    return [
+        {"id": s.id, "nombre": s.nombre, "latitud": s.latitud, "longitud": s.longitud,
+         "ultima_lectura": ultimas_por_sensor.get(s.id)}
+        for s in sensores
+    ]
+
+
+async def actualizar_sensor(db: AsyncSession, sensor_id: int, datos: schemas.SensorUpdate) -> Sensor:
+    """Crea o modifica un equipo (nombre y ubicación en la vía)."""
+    equipo = await db.get(Sensor, sensor_id)
+    if equipo is None:
+        equipo = Sensor(id=sensor_id)
+        db.add(equipo)
+    for campo, valor in datos.dict(exclude_unset=True).items():
+        setattr(equipo, campo, valor)
+    await db.commit()
+    await db.refresh(equipo)
+    _sensores_registrados.add(sensor_id)
+    return equipo
+
+
+# --- DIFUSIÓN EN VIVO (SSE) ---
+class HubLecturas:
+    """
+    Pub/sub en proceso para `/lectura_sensor/stream`. Cada lectura se serializa una
+    sola vez como evento SSE y se reparte a las colas de los suscriptores; las
+    últimas `max_replay` quedan en memoria para que un cliente nuevo (o uno que
+    se reconecta con Last-Event-ID) arranque sin consultar la BD.
+
+    El id de cada evento es la fecha_hora de la lectura en microsegundos UTC
+    (nunca más adelante que el reloj del servidor), subido en 1 si hace falta para
+    que sea creciente. Así sobrevive a un reinicio: el replay que se precarga de la
+    BD vuelve a tener los mismos ids y un cliente que se reconecta con su
+    Last-Event-ID recibe solo lo que no vio. Entran en un Number de JS (< 2^53).
+    """
+    def __init__(self, max_replay: int = 200, max_cola: int = 500):
+        self._replay = deque(maxlen=max_replay)  # (secuencia, evento)
+        self._suscriptores = set()
+        self.max_cola = max_cola
+        self.secuencia = 0
+        self.descartados = 0
+
+    @property
+    def max_replay(self) -> int:
+        return self._replay.maxlen
+
+    @property
+    def suscriptores(self) -> int:
+        return len(self._suscriptores)
+
+    def publicar(self, lectura: dict, tipo: str = "lectura") -> None:
+        ahora = time.time_ns() // 1000
+        fecha_hora = lectura.get("fecha_hora")
+        base = min(anillo_sensor.a_microsegundos(fecha_hora), ahora) if isinstance(fecha_hora, datetime) else ahora
+        self.secuencia = max(self.secuencia + 1, base)
+        datos = json.dumps(
+            {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in lectura.items()},
+            separators=(",", ":"),
+        )
+        evento = f"id: {self.secuencia}\nevent: {tipo}\ndata: {datos}\n\n"
+        self._replay.append((self.secuencia, evento))
+        for cola in self._suscriptores:
+            if cola.full():
+                # Cliente lento: pierde el evento más viejo en vez de frenar a los demás
+                cola.get_nowait()
+                self.descartados += 1
+            cola.put_nowait(evento)
+
+    def suscribir(self, replay: int = 0, ultimo_id: Optional[int] = None) -> asyncio.Queue:
+        """Cola con el replay inicial: lo posterior a `ultimo_id` si se reconecta, si no las `replay` últimas."""
+        cola = asyncio.Queue(maxsize=self.max_cola)
+        if ultimo_id is not None:
+            pendientes = [evento for secuencia, evento in self._replay if secuencia > ultimo_id]
+        else:
+            pendientes = [evento for _, evento in self._replay][-replay:] if replay else []
+        for evento in pendientes[-self.max_cola:]:
+            cola.put_nowait(evento)
+        self._suscriptores.add(cola)
+        return cola
+
+    def desuscribir(self, cola: asyncio.Queue) -> None:
+        self._suscriptores.discard(cola)
+
+    def precargar(self, lecturas: Iterable[dict]) -> None:
+        """Llena el replay al arrancar (de la más vieja a la más nueva)."""
+        for lectura in lecturas:
+            self.publicar(lectura)
+
+    def estado(self) -> dict:
+        return {
+            "suscriptores": self.suscriptores,
+            "secuencia": self.secuencia,
+            "replay": len(self._replay),
+            "descartados": self.descartados,
+        }
+
+
+hub_lecturas = HubLecturas(max_replay=settings.SENSOR_REPLAY)
+
+
+# --- LECTURAS RECIENTES EN MEMORIA ---
+anillo_lecturas = anillo_sensor.AnilloLecturas(settings.SENSOR_ANILLO)
+
+
+async def precargar_memoria(db: AsyncSession) -> int:
+    """Llena el buffer circular y el replay del stream con las últimas lecturas (una consulta)."""
+    consulta = (
+        select(LecturaSensor.fecha_hora, LecturaSensor.temperatura, LecturaSensor.humedad, LecturaSensor.sensor_id)
+        .order_by(LecturaSensor.fecha_hora.desc(), LecturaSensor.id.desc())
+        .limit(anillo_lecturas.capacidad + 1)
+    )
+    filas = (await db.execute(consulta)).all()
+    hay_mas = len(filas) > anillo_lecturas.capacidad
+    filas = filas[:anillo_lecturas.capacidad][::-1]
+    anillo_lecturas.precargar(filas, hay_mas=hay_mas)  # (fecha_hora, temperatura, humedad, sensor_id)
+    hub_lecturas.precargar(
+        {"temperatura": temperatura, "humedad": humedad, "fecha_hora": fecha_hora, "sensor_id": sensor_id}
+        for fecha_hora, temperatura, humedad, sensor_id in filas[-hub_lecturas.max_replay:]
+    )
+
+    # Última lectura por equipo: MAX(fecha_hora) agrupado sale del índice (sensor_id, fecha_hora)
+    maximos = (
+        select(LecturaSensor.sensor_id, func.max(LecturaSensor.fecha_hora).label("fecha_hora"))
+        .group_by(LecturaSensor.sensor_id).subquery()
+    )
+    ultimas = await db.execute(
+        select(LecturaSensor.sensor_id, LecturaSensor.fecha_hora, LecturaSensor.temperatura, LecturaSensor.humedad)
+        .join(maximos, (LecturaSensor.sensor_id == maximos.c.sensor_id) & (LecturaSensor.fecha_hora == maximos.c.fecha_hora))
+    )
+    for sensor_id, fecha_hora, temperatura, humedad in ultimas:
+        _actualizar_ultima({"sensor_id": sensor_id, "fecha_hora": fecha_hora,
+                            "temperatura": temperatura, "humedad": humedad})
+    _sensores_registrados.update((await db.execute(select(Sensor.id))).scalars())
+    # El detector arranca con la media/varianza de las lecturas recientes; lo que marque aquí ya se vio antes
+    for fecha_hora, temperatura, humedad, sensor_id in filas:
+        if sensor_id is not None:
+            detector_anomalias.evaluar(sensor_id, fecha_hora, {"temperatura": temperatura, "humedad": humedad})
+    return len(filas)
+
+
+def _columnar(fecha_us, temperatura, humedad) -> dict:
+    return {
+        "fecha_hora": np.datetime_as_string(anillo_sensor.a_datetime(np.asarray(fecha_us)), unit="s").tolist(),
+        "temperatura": np.round(np.asarray(temperatura, dtype=np.float64), 2).tolist(),
+        "humedad": np.round(np.asarray(humedad, dtype=np.float64), 2).tolist(),
+    }
+
+
+async def get_lecturas_recientes(db: AsyncSession, desde: datetime, hasta: Optional[datetime] = None,
+                                 puntos: int = 0, sensor_id: Optional[int] = None) -> dict:
+    """
+    Serie columnar de la ventana pedida, ordenada por fecha_hora, de un equipo o
+    (sin `sensor_id`) de toda la flota. Sale del buffer circular cuando lo cubre;
+    si no, se lee de la BD. `puntos` > 0 la submuestrea.
+    """
+    if anillo_lecturas.cubre(desde):
+        fecha, temperatura, humedad = anillo_lecturas.ventana(desde, hasta, sensor_id)
+        origen = "memoria"
+    else:
+        consulta = select(LecturaSensor.fecha_hora, LecturaSensor.temperatura, LecturaSensor.humedad) \
+            .where(LecturaSensor.fecha_hora >= desde)
+        if sensor_id is not None:
+            consulta = consulta.where(LecturaSensor.sensor_id == sensor_id)
+        if hasta is not None:
+            consulta = consulta.where(LecturaSensor.fecha_hora < hasta)
+        filas = (await db.execute(consulta.order_by(LecturaSensor.fecha_hora, LecturaSensor.id))).all()
+        fecha = np.array([anillo_sensor.a_microsegundos(f) for f, _, _ in filas], dtype=np.int64)
+        temperatura = np.array([t for _, t, _ in filas], dtype=np.float32)
+        humedad = np.array([h for _, _, h in filas], dtype=np.float32)
+        origen = "bd"
+    lecturas = len(fecha)
+    fecha, temperatura, humedad = anillo_sensor.submuestrear(fecha, temperatura, humedad, puntos)
+    return {"origen": origen, "sensor_id": sensor_id, "lecturas": lecturas, **_columnar(fecha, temperatura, humedad)}
+
+
+async def get_ultima_lectura(db: AsyncSession, sensor_id: Optional[int] = None) -> Optional[dict]:
+    """La lectura más reciente del equipo o, sin `sensor_id`, de toda la flota (con el equipo que la mandó)."""
+    ultima = anillo_lecturas.ultima(sensor_id)
+    if ultima is not None:
+        fecha_us, temperatura, humedad, equipo = ultima
+        return {"sensor_id": equipo,
+                "fecha_hora": np.datetime_as_string(anillo_sensor.a_datetime(np.int64(fecha_us)), unit="s"),
+                "temperatura": round(temperatura, 2), "humedad": round(humedad, 2)}
+    recientes = await get_lecturas_sensores(db, limit=1, sensor_id=sensor_id)
+    if not recientes:
+        return None
+    return {"sensor_id": recientes[0].sensor_id, "fecha_hora": recientes[0].fecha_hora.isoformat(),
+            "temperatura": recientes[0].temperatura, "humedad": recientes[0].humedad}
+
+
+# --- ANOMALÍAS EN LÍNEA ---
+detector_anomalias = anomalias.DetectorAnomalias()
+# Anomalías detectadas que todavía no se guardaron; se insertan con el próximo lote de lecturas
+_anomalias_pendientes: List[dict] = []
+MAX_ANOMALIAS_PENDIENTES = 10_000
+
+
+def _evaluar(fila: dict) -> None:
+    detectadas = detector_anomalias.evaluar(
+        fila["sensor_id"], fila["fecha_hora"], {"temperatura": fila["temperatura"], "humedad": fila["humedad"]}
+    )
+    for anomalia in detectadas:
+        if len(_anomalias_pendientes) < MAX_ANOMALIAS_PENDIENTES:
+            _anomalias_pendientes.append(anomalia)
+        hub_lecturas.publicar(anomalia, tipo="anomalia")
+
+
+async def get_anomalias(db: AsyncSession, sensor_id: Optional[int] = None, desde: Optional[datetime] = None,
+                        hasta: Optional[datetime] = None, limit: int = 100) -> List[dict]:
+    """Anomalías más recientes primero; incluye las detectadas que aún no llegaron a la BD."""
+    A = AnomaliaSensor
+    consulta = select(A)
+    if sensor_id is not None:
+        consulta = consulta.where(A.sensor_id == sensor_id)
+    if desde is not None:
+        consulta = consulta.where(A.fecha_hora >= desde)
+    if hasta is not None:
+        consulta = consulta.where(A.fecha_hora < hasta)
+    filas = (await db.execute(consulta.order_by(A.fecha_hora.desc(), A.id.desc()).limit(limit))).scalars().all()
+    columnas = [c.name for c in A.__table__.columns]
+    guardadas = [{c: getattr(f, c) for c in columnas} for f in filas]
+    pendientes = [
+        {**a, "id": None, "detectado": None} for a in _anomalias_pendientes
+        if (sensor_id is None or a["sensor_id"] == sensor_id)
+        and (desde is None or a["fecha_hora"] >= desde)
+        and (hasta is None or a["fecha_hora"] < hasta)
+    ]
+    return sorted(pendientes + guardadas, key=lambda a: a["fecha_hora"], reverse=True)[:limit]
+
+
+# --- INGESTA CON ESCRITURA DIFERIDA ---
+class BufferLleno(Exception):
+    """Hay más lecturas pendientes que `max_pendientes`: la BD no está absorbiendo la carga."""
+
+
+def _es_error_de_datos(error: BaseException) -> bool:
+    """
+    True si la BD (o el driver) rechaza las filas en sí, así que reintentar el mismo
+    lote fallaría igual; una conexión caída o un timeout no cuentan.
+    """
+    if isinstance(error, (exc.IntegrityError, exc.DataError)):
+        return True
+    if isinstance(error, exc.StatementError) and not isinstance(error, exc.DBAPIError):
+        return True  # El driver no pudo convertir un valor
+    return isinstance(error, (OverflowError, ValueError, TypeError))
+
+
+def _sin(filas: List[dict], quitar: List[dict]) -> List[dict]:
+    """`filas` sin los mismos objetos de `quitar` (por identidad: dos lecturas pueden ser iguales)."""
+    ids = {id(fila) for fila in quitar}
+    return [fila for fila in filas if id(fila) not in ids]
+
+
+class BufferLecturas:
+    """
+    Acumula lecturas en memoria y las inserta por lotes (un executemany por lote)
+    cuando se junta `tamano_lote` o pasan `intervalo` segundos. Cada lectura
+    aceptada se anota también en el spill (JSON por línea), que se reemplaza de
+    forma atómica con lo que quede pendiente tras cada volcado; si el proceso
+    muere, el siguiente arranque recupera desde ahí lo que no llegó a la BD.
+
+    Con varios workers cada proceso toma su propio spill: `ruta_spill` para el
+    primero y `<nombre>.1.jsonl`, `<nombre>.2.jsonl`... para los demás, reservados
+    con un lock del sistema operativo que se libera solo si el proceso muere. Un
+    worker que arranca toma una ranura libre y recupera lo que dejó el anterior.
+
+    Si la BD rechaza el lote por sus datos (FK, fuera de rango, NOT NULL) se parte
+    a la mitad hasta aislar las filas culpables, que van al log y a
+    `<spill>.rechazadas.jsonl`; el resto se guarda. Solo los errores de conexión
+    devuelven el lote a la cola para reintentarlo.
+    """
+    def __init__(self, tamano_lote: int = 500, intervalo: float = 1.0,
+                 max_pendientes: int = 100_000, ruta_spill: Optional[str] = None):
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self.max_pendientes = max_pendientes
+        self.ruta_spill = ruta_spill
+        self._pendientes: List[dict] = []
+        self._en_vuelo = 0  # Lecturas del lote que se está insertando
+        self._lleno: Optional[asyncio.Event] = None
+        self._volcado: Optional[asyncio.Lock] = None
+        self._tarea: Optional[asyncio.Task] = None
+        self._spill = None
+        self._ruta_activa: Optional[str] = None  # Spill de este proceso
+        self._lock_spill = None
+        self.insertadas = 0
+        self.lotes = 0
+        self.fallos = 0
+        self.rechazadas = 0
+
+    @property
+    def pendientes(self) -> int:
+        return len(self._pendientes) + self._en_vuelo
+
+    # --- Archivo de respaldo ---
+    def _tomar_spill(self):
+        """Reserva la primera ranura de spill que ningún proceso vivo tiene tomada."""
+        os.makedirs(os.path.dirname(self.ruta_spill) or ".", exist_ok=True)
+        base, extension = os.path.splitext(self.ruta_spill)
+        for ranura in itertools.count():
+            ruta = self.ruta_spill if ranura == 0 else f"{base}.{ranura}{extension}"
+            lock = open(ruta + ".lock", "a+")
+            if _bloquear(lock):
+                self._ruta_activa, self._lock_spill = ruta, lock
+                return
+            lock.close()
+
+    def _soltar_spill(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        if self._lock_spill is not None:
+            self._lock_spill.close()
+            self._lock_spill = None
+        self._ruta_activa = None
+
+    def _escribir_spill(self, filas: List[dict]):
+        if self._spill is None:
+            return
+        self._spill.writelines(json.dumps(fila, default=str) + "\n" for fila in filas)
+        self._spill.flush()
+
+    def _escribir_temporal(self, filas: List[dict]) -> str:
+        """Escribe `filas` en el temporal del spill con fsync. No toca `self`: corre en un hilo."""
+        temporal = self._ruta_activa + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            archivo.writelines(json.dumps(fila, default=str) + "\n" for fila in filas)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        return temporal
+
+    def _reemplazar_spill(self, temporal: str, nuevas: List[dict] = ()):
+        """Suma al temporal las `nuevas` y lo pone en lugar del spill (os.replace, nunca queda truncado)."""
+        if nuevas:
+            with open(temporal, "a", encoding="utf-8") as archivo:
+                archivo.writelines(json.dumps(fila, default=str) + "\n" for fila in nuevas)
+        if self._spill is not None:
+            self._spill.close()  # En Windows no se puede reemplazar un archivo abierto
+        os.replace(temporal, self._ruta_activa)
+        self._spill = open(self._ruta_activa, "a", encoding="utf-8")
+
+    def _reescribir_spill(self, filas: List[dict]):
+        """Reemplaza el spill por `filas` de forma síncrona (al arrancar, antes de recibir lecturas)."""
+        if self._ruta_activa is None:
+            return
+        self._reemplazar_spill(self._escribir_temporal(filas))
+
+    async def _reescribir_spill_async(self):
+        """
+        Reemplaza el spill por lo pendiente sin frenar el event loop: la escritura
+        grande y el fsync van a un hilo. Mientras tanto `agregar_filas` solo agrega al
+        final de la cola (y al spill viejo, que sigue abierto); esas lecturas se suman
+        al temporal justo antes del reemplazo. Se llama con `_volcado` tomado, así que
+        nadie más toca el principio de la cola.
+        """
+        if self._ruta_activa is None:
+            return
+        filas = self._pendientes[:]
+        temporal = await asyncio.to_thread(self._escribir_temporal, filas)
+        self._reemplazar_spill(temporal, self._pendientes[len(filas):])
+
+    def _rechazar(self, tabla: str, fila: dict, error: BaseException):
+        """Deja fuera de la cola una fila que la BD no acepta, con el motivo."""
+        self.rechazadas += 1
+        motivo = str(getattr(error, "orig", None) or error).splitlines()[0]
+        logger.error("Fila rechazada por la BD en %s: %r (%s)", tabla, fila, motivo)
+        if self._ruta_activa is None:
+            return
+        base, extension = os.path.splitext(self._ruta_activa)
+        with open(f"{base}.rechazadas{extension}", "a", encoding="utf-8") as archivo:
+            archivo.write(json.dumps({"tabla": tabla, "error": motivo, "fila": fila}, default=str) + "\n")
+
+    def _recuperar_spill(self) -> List[dict]:
+        if self._ruta_activa is None or not os.path.exists(self._ruta_activa):
+            return []
+        filas = []
+        with open(self._ruta_activa, encoding="utf-8") as archivo:
+            for linea in archivo:
+                try:
+                    fila = json.loads(linea)
+                    fila["fecha_hora"] = datetime.fromisoformat(fila["fecha_hora"])
+                    fila.setdefault("sensor_id", SENSOR_POR_DEFECTO)  # Spill de antes de los equipos
+                    filas.append(fila)
+                except (ValueError, KeyError, TypeError):
+                    # Última línea a medio escribir por una caída
+                    logger.warning("Línea inválida en %s: %r", self._ruta_activa, linea[:80])
+        return filas
+
+    # --- Ciclo de vida ---
+    async def iniciar(self, engine: AsyncEngine):
+        self._lleno = asyncio.Event()
+        self._volcado = asyncio.Lock()
+        if self.ruta_spill:
+            self._tomar_spill()
+            recuperadas = self._recuperar_spill()
+            if recuperadas:
+                logger.info("Recuperadas %d lecturas del spill %s", len(recuperadas), self._ruta_activa)
+                self._pendientes = recuperadas + self._pendientes
+            self._reescribir_spill(self._pendientes)
+        self._tarea = asyncio.create_task(self._ciclo(engine))
+
+    async def detener(self, engine: AsyncEngine):
+        """Cancela el ciclo y vuelca lo pendiente; si la BD falla, queda en el spill."""
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+        while self._pendientes:
+            try:
+                await self.volcar(engine)
+            except Exception:
+                logger.exception("No se pudieron volcar %d lecturas al apagar", len(self._pendientes))
+                break
+        self._soltar_spill()
+
+    def agregar(self, lectura: schemas.LecturaSensorCreate) -> int:
+        """Acepta la lectura sin tocar la BD; devuelve cuántas quedan pendientes."""
+        return self.agregar_filas([lectura.dict()])
+
+    def agregar_filas(self, filas: List[dict]) -> int:
+        """Acepta un lote ya validado (todo o nada) con las columnas de `lectura_sensor`."""
+        if self.pendientes + len(filas) > self.max_pendientes:
+            raise BufferLleno(f"Hay {self.pendientes} lecturas pendientes de guardar")
+        self._pendientes.extend(filas)
+        self._escribir_spill(filas)
+        if self._lleno is not None and len(self._pendientes) >= self.tamano_lote:
+            self._lleno.set()
+        return self.pendientes
+
+    async def _ciclo(self, engine: AsyncEngine):
+        while True:
+            vencido = False
+            try:
+                await asyncio.wait_for(self._lleno.wait(), timeout=self.intervalo)
+            except asyncio.TimeoutError:
+                vencido = True
+            self._lleno.clear()
+            try:
+                # Por tamaño solo salen lotes completos; al vencer el intervalo sale todo
+                while len(self._pendientes) >= self.tamano_lote or (vencido and self._pendientes):
+                    await self.volcar(engine)
+            except Exception:
+                # Las lecturas siguen en memoria y en el spill; se reintenta en el próximo ciclo
+                logger.exception("Falló el volcado de lecturas de sensor")
+                await asyncio.sleep(self.intervalo)
+
+    async def volcar(self, engine: AsyncEngine) -> int:
+        """Inserta hasta `tamano_lote` lecturas en una sola transacción."""
+        async with self._volcado:
+            lote = self._pendientes[:self.tamano_lote]
+            if not lote:
+                return 0
+            del self._pendientes[:len(lote)]
+            anomalias_lote = _anomalias_pendientes[:]
+            del _anomalias_pendientes[:len(anomalias_lote)]
+            self._en_vuelo = len(lote)
+            inicio = time.perf_counter()
+            # Filas ya guardadas o descartadas: no vuelven a la cola aunque después falle la conexión
+            lecturas_resueltas, anomalias_resueltas = [], []
+            try:
+                try:
+                    await self._insertar(engine, lote, anomalias_lote)
+                    insertadas = len(lote)
+                except Exception as e:
+                    if not _es_error_de_datos(e):
+                        raise
+                    logger.warning("La BD rechazó el lote de %d lecturas; se aíslan las filas inválidas", len(lote))
+                    insertadas = await self._aislar(engine, LecturaSensor, lote, lecturas_resueltas)
+                    await self._aislar(engine, AnomaliaSensor, anomalias_lote, anomalias_resueltas)
+            except BaseException:
+                # También ante una cancelación al apagar: lo no resuelto vuelve a la cola
+                self.fallos += 1
+                self._pendientes[:0] = _sin(lote, lecturas_resueltas)
+                _anomalias_pendientes[:0] = _sin(anomalias_lote, anomalias_resueltas)
+                raise
+            finally:
+                self._en_vuelo = 0
+            self.insertadas += insertadas
+            self.lotes += 1
+            # El spill solo guarda lo que todavía no está en la BD
+            await self._reescribir_spill_async()
+            logger.debug("Volcadas %d lecturas en %.1f ms", len(lote), 1000 * (time.perf_counter() - inicio))
+            return len(lote)
+
+    async def _insertar(self, engine: AsyncEngine, lecturas: List[dict], anomalias_lote: List[dict]) -> None:
+        """Lecturas (con su parte del resumen) y anomalías en una sola transacción."""
+        async with engine.begin() as conexion:
+            verificados = await registrar_sensores(conexion, {f["sensor_id"] for f in lecturas + anomalias_lote})
+            if lecturas:
+                await conexion.execute(insert(LecturaSensor.__table__), lecturas)
+                await sumar_al_resumen(conexion, lecturas)
+            if anomalias_lote:
+                await conexion.execute(insert(AnomaliaSensor.__table__), anomalias_lote)
+        _sensores_registrados.update(verificados)
+
+    async def _aislar(self, engine: AsyncEngine, modelo, filas: List[dict], resueltas: List[dict]) -> int:
+        """
+        Inserta `filas` (lecturas o anomalías) partiendo a la mitad cada parte que la BD
+        rechaza, hasta que cada fila rechazada queda sola y se descarta. Lo guardado y
+        lo descartado se anota en `resueltas`; un error que no es de datos se propaga.
+        Devuelve cuántas filas se guardaron.
+        """
+        if not filas:
+            return 0
+        try:
+            if modelo is LecturaSensor:
+                await self._insertar(engine, filas, [])
+            else:
+                await self._insertar(engine, [], filas)
+        except Exception as e:
+            if not _es_error_de_datos(e):
+                raise
+            if len(filas) == 1:
+                self._rechazar(modelo.__tablename__, filas[0], e)
+                resueltas.append(filas[0])
+                return 0
+            mitad = len(filas) // 2
+            return (await self._aislar(engine, modelo, filas[:mitad], resueltas)
+                    + await self._aislar(engine, modelo, filas[mitad:], resueltas))
+        resueltas.extend(filas)
+        return len(filas)
+
+    def estado(self) -> dict:
+        return {
+            "pendientes": self.pendientes,
+            "insertadas": self.insertadas,
+            "lotes": self.lotes,
+            "fallos": self.fallos,
+            "rechazadas": self.rechazadas,
+            "tamano_lote": self.tamano_lote,
+            "intervalo_seg": self.intervalo,
+            "spill": self._ruta_activa,
+        }
+
+
+buffer_lecturas = BufferLecturas(
+    tamano_lote=settings.SENSOR_LOTE,
+    intervalo=settings.SENSOR_INTERVALO_SEG,
+    max_pendientes=settings.SENSOR_MAX_PENDIENTES,
+    ruta_spill=settings.SENSOR_SPILL or None,
+)
+
+
+def recibir_lectura(lectura: schemas.LecturaSensorCreate) -> int:
+    """Encola la lectura para la BD, la suma al buffer en memoria y la difunde al stream."""
+    fila = lectura.dict()
+    if fila["fecha_hora"].tzinfo is not None:
+        # El firmware manda "...Z": se guarda como hora UTC naive, igual que las tramas binarias
+        fila["fecha_hora"] = fila["fecha_hora"].astimezone(timezone.utc).replace(tzinfo=None)
+    pendientes = buffer_lecturas.agregar_filas([fila])
+    anillo_lecturas.agregar(fila["fecha_hora"], fila["temperatura"], fila["humedad"], fila["sensor_id"])
+    _actualizar_ultima(fila)
+    hub_lecturas.publicar(fila)
+    _evaluar(fila)
+    return pendientes
+
+
+def recibir_trama(trama: bytes) -> Tuple[int, int]:
+    """
+    Decodifica una trama binaria del ESP32 (ver `trama_sensor`) y la procesa como
+    `recibir_lectura`, pero en bloque. Devuelve (aceptadas, pendientes).
+    Lanza ValueError si la trama no es válida.
+    """
+    sensor_id, fecha_hora, temperatura, humedad = trama_sensor.decodificar(trama)
+    fechas = fecha_hora.astype(object)  # datetime naive en UTC, como el "Z" del JSON
+    filas = [
+        {"sensor_id": s, "temperatura": t, "humedad": h, "fecha_hora": f}
+        for s, f, t, h in zip(sensor_id.tolist(), fechas, temperatura.tolist(), humedad.tolist())
+    ]
+    pendientes = buffer_lecturas.agregar_filas(filas)
+    anillo_lecturas.agregar_lote(fecha_hora.astype("datetime64[us]").astype(np.int64), temperatura, humedad, sensor_id)
+    for fila in filas:
+        _actualizar_ultima(fila)
+        hub_lecturas.publicar(fila)
+        _evaluar(fila)
+    return len(filas), pendientes
@@ -1,13 +1,191 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
 
-# Añade echo=True para ver las consultas SQL
-engine = create_engine(settings.DATABASE_URL, echo=True)
+
+# --- Métricas del pool de conexiones ---
+class MetricasPool:
+    """Espera por conexión, agotamientos del pool y edad de las conexiones abiertas."""
+    def __init__(self, muestras: int = 1000):
+        self._lock = threading.Lock()
+        self._esperas = deque(maxlen=muestras)  # Últimas esperas en segundos (para el p95)
+        self.esperas_total = 0
+        self.espera_max = 0.0
+        self.agotamientos = 0
+        self._abiertas: Dict[int, float] = {}  # id(conexión DBAPI) -> momento en que se abrió
+
+    def registrar_espera(self, segundos: float):
+        with self._lock:
+            self._esperas.append(segundos)
+            self.esperas_total += 1
+            self.espera_max = max(self.espera_max, segundos)
+
+    def registrar_agotamiento(self):
+        with self._lock:
+            self.agotamientos += 1
+
+    def conexion_abierta(self, dbapi_conn, _registro):
+        with self._lock:
+            self._abiertas[id(dbapi_conn)] = time.monotonic()
+
+    def conexion_cerrada(self, dbapi_conn, *_):
+        with self._lock:
+            self._abiertas.pop(id(dbapi_conn), None)
+
+    def resumen(self, pool) -> dict:
+        ahora = time.monotonic()
+        with self._lock:
+            esperas = sorted(self._esperas)
+            edades = [ahora - abierta for abierta in self._abiertas.values()]
+            esperas_total, espera_max, agotamientos = self.esperas_total, self.espera_max, self.agotamientos
+        en_uso = pool.checkedout() if hasattr(pool, "checkedout") else None
+        return {
+            "clase": type(pool).__name__,
+            "tamano": pool.size() if hasattr(pool, "size") else None,
+            "en_uso": en_uso,
+            "disponibles": pool.checkedin() if hasattr(pool, "checkedin") else None,
+            "overflow": max(pool.overflow(), 0) if hasattr(pool, "overflow") else None,
+            "esperas": {
+                "total": esperas_total,
+                "promedio_ms": round(1000 * sum(esperas) / len(esperas), 3) if esperas else 0.0,
+                "p95_ms": round(1000 * esperas[int(0.95 * (len(esperas) - 1))], 3) if esperas else 0.0,
+                "max_ms": round(1000 * espera_max, 3),
+            },
+            "agotamientos": agotamientos,
+            "conexiones": {
+                "abiertas": len(edades),
+                "edad_max_s": round(max(edades), 1) if edades else 0.0,
+                "edad_promedio_s": round(sum(edades) / len(edades), 1) if edades else 0.0,
+            },
+        }
+
+
+class _ColaMedida:
+    """Mezcla para QueuePool: mide cuánto tarda cada checkout y cuenta los timeouts."""
+    metricas: MetricasPool
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metricas.registrar_agotamiento()
+            raise
+        finally:
+            self.metricas.registrar_espera(time.perf_counter() - inicio)
+
+    def recreate(self):
+        nuevo = super().recreate()
+        nuevo.metricas = self.metricas
+        return nuevo
+
+
+class QueuePoolMedido(_ColaMedida, QueuePool):
+    pass
+
+
+class AsyncQueuePoolMedido(_ColaMedida, AsyncAdaptedQueuePool):
+    pass
+
+
+# Timeout por sentencia según el servidor (la variable de MariaDB va en segundos)
+def _sentencia_timeout(dialect, milisegundos: int) -> Optional[str]:
+    if dialect.name == "mysql":
+        if getattr(dialect, "is_mariadb", False):
+            return f"SET SESSION max_statement_time = {milisegundos / 1000:.3f}"
+        return f"SET SESSION max_execution_time = {milisegundos}"
+    if dialect.name == "postgresql":
+        return f"SET statement_timeout = {milisegundos}"
+    return None  # SQLite no tiene timeout por sentencia
+
+
+def _opciones_engine(url: str, pool_medido) -> dict:
+    opciones = {"echo": settings.DB_ECHO, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    url_sa = make_url(url)
+    if url_sa.get_backend_name() == "sqlite" and url_sa.database in (None, "", ":memory:"):
+        return opciones  # SQLite en memoria usa su propio pool de una conexión
+    opciones.update(
+        poolclass=pool_medido,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return opciones
+
+
+def _instrumentar(sync_engine) -> MetricasPool:
+    metricas = MetricasPool()
+    sync_engine.pool.metricas = metricas
+    event.listen(sync_engine, "connect", metricas.conexion_abierta)
+    event.listen(sync_engine, "close", metricas.conexion_cerrada)
+    event.listen(sync_engine, "close_detached", metricas.conexion_cerrada)
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        @event.listens_for(sync_engine, "connect")
+        def _fijar_timeout(dbapi_conn, _registro):
+            # El dialecto ya se inicializó con la primera conexión, así que distingue MariaDB de MySQL
+            sentencia = _sentencia_timeout(sync_engine.dialect, settings.DB_STATEMENT_TIMEOUT_MS)
+            if sentencia:
+                cursor = dbapi_conn.cursor()
+                cursor.execute(sentencia)
+                cursor.close()
+    return metricas
+
+
+def crear_engine(url: Optional[str] = None):
+    """Motor sync con el pool configurado en `Settings` (tamaño, overflow, reciclado, pre-ping, timeouts)."""
+    url = url or settings.DATABASE_URL
+    nuevo = create_engine(url, **_opciones_engine(url, QueuePoolMedido))
+    _instrumentar(nuevo)
+    return nuevo
+
+
+def crear_engine_async(url: Optional[str] = None):
+    """Igual que `crear_engine` pero con el driver async (por defecto derivado de DATABASE_URL)."""
+    url = url or settings.ASYNC_DATABASE_URL or url_async(settings.DATABASE_URL)
+    nuevo = create_async_engine(url, **_opciones_engine(url, AsyncQueuePoolMedido))
+    _instrumentar(nuevo.sync_engine)
+    return nuevo
+
+
+def metricas_pool(motor) -> dict:
+    """Estado actual del pool de `motor` (sync o async)."""
+    sync_engine = getattr(motor, "sync_engine", motor)
+    metricas = getattr(sync_engine.pool, "metricas", None) or MetricasPool()
+    return metricas.resumen(sync_engine.pool)
+
+
+# Driver async equivalente a cada backend de la URL sync
+_DRIVERS_ASYNC = {"mysql": "aiomysql", "sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+def url_async(url: str) -> str:
+    """Misma BD que `url` pero con el driver async (mysql+pymysql -> mysql+aiomysql, sqlite -> sqlite+aiosqlite)."""
+    url_sync = make_url(url)
+    backend = url_sync.get_backend_name()
+    if backend not in _DRIVERS_ASYNC:
+        raise ValueError(f"No hay driver async configurado para {backend}")
+    return url_sync.set(drivername=f"{backend}+{_DRIVERS_ASYNC[backend]}").render_as_string(hide_password=False)
+
+
+# Un único motor por proceso; DB_ECHO=true para ver las consultas SQL
+engine = crear_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
 
+# Motor async para los endpoints de E/S intensiva (sensores); mismas tablas que `engine`
+async_engine = crear_engine_async()
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency
@@ -17,3 +195,44 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency async: la sesión no bloquea el event loop mientras espera a la BD
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# --- Conteo de consultas (para tests y diagnóstico de N+1) ---
+class ContadorConsultas:
+    def __init__(self):
+        self.sentencias: List[str] = []
+
+    @property
+    def total(self) -> int:
+        return len(self.sentencias)
+
+    def _registrar(self, conn, cursor, statement, parameters, context, executemany):
+        self.sentencias.append(statement)
+
+@contextmanager
+def contar_consultas(bind=None):
+    """Registra cada sentencia SQL que `bind` (por defecto `engine`) ejecuta dentro del bloque."""
+    bind = bind or engine
+    contador = ContadorConsultas()
+    event.listen(bind, "before_cursor_execute", contador._registrar)
+    try:
+        yield contador
+    finally:
+        event.remove(bind, "before_cursor_execute", contador._registrar)
+
+@contextmanager
+def max_consultas(maximo: int, bind=None):
+    """
+    Falla con AssertionError si el bloque ejecuta más de `maximo` sentencias.
+    Uso en tests: `with max_consultas(12): client.get("/accidentes/?limit=100")`.
+    """
+    with contar_consultas(bind) as contador:
+        yield contador
+    assert contador.total <= maximo, (
+        f"Se ejecutaron {contador.total} consultas (máximo {maximo}):\n" + "\n".join(contador.sentencias)
+    )
@@ -0,0 +1,301 @@
+# Fastapi_React/Backend/app/models/almacen.py
+"""
+Almacén columnar en memoria de los accidentes, para el mapa y las consultas
+analíticas que solo necesitan ids, fecha, coordenadas y claves foráneas.
+
+Cada atributo es un arreglo NumPy; los filtros se resuelven con máscaras
+booleanas sobre columnas completas en lugar de consultas ORM por petición.
+"""
+import logging
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session, aliased
+
+from app.models.indice_espacial import BBox, GrillaEspacial
+
+logger = logging.getLogger(__name__)
+
+# Columna -> dtype. Las FKs nulas se guardan como -1 y las coordenadas nulas como NaN.
+COLUMNAS = {
+    "id": np.int64,
+    "fecha": "datetime64[D]",
+    "lat": np.float64,
+    "lng": np.float64,
+    "barrio_id": np.int32,
+    "zona_id": np.int32,
+    "tipo_accidente_id": np.int32,
+    "gravedad_id": np.int32,
+}
+
+
+def _descripcion(fila) -> str:
+    # Misma descripción que armaba el endpoint del mapa fila por fila.
+    direccion_partes = []
+    if fila.primer_via_nombre:
+        direccion_partes.append(fila.primer_via_nombre)
+    if fila.segunda_via_nombre:
+        direccion_partes.append(f"con {fila.segunda_via_nombre}")
+    direccion = " ".join(direccion_partes).strip()
+
+    descripcion_parts = [f"ID Acc: {fila.id}", fila.tipo_accidente_nombre or "Sin tipo"]
+    if direccion:
+        descripcion_parts.append(direccion)
+    if fila.barrio_nombre:
+        descripcion_parts.append(f"Barrio: {fila.barrio_nombre}")
+    if fila.complemento:
+        descripcion_parts.append(f"Comp: {fila.complemento}")
+    if fila.fecha:
+        descripcion_parts.append(f"Fecha: {fila.fecha.strftime('%Y-%m-%d')}")
+    if fila.nivel_gravedad:
+        descripcion_parts.append(f"Gravedad: {fila.nivel_gravedad}")
+    return " | ".join(descripcion_parts)
+
+
+def _consulta_filas():
+    # Importación local para evitar circularidad (modelos -> proxy -> ...)
+    from app.models.modelos import Accidente, Barrio, GravedadVictima, TipoAccidente, Ubicacion, Via
+
+    primer_via = aliased(Via)
+    segunda_via = aliased(Via)
+    return (
+        select(
+            Accidente.id,
+            Accidente.fecha,
+            Ubicacion.latitud,
+            Ubicacion.longitud,
+            Ubicacion.complemento,
+            Ubicacion.barrio_id,
+            Barrio.zona_id,
+            Barrio.nombre.label("barrio_nombre"),
+            Accidente.tipo_accidente_id,
+            TipoAccidente.nombre.label("tipo_accidente_nombre"),
+            Accidente.gravedad_victima_id.label("gravedad_id"),
+            GravedadVictima.nivel_gravedad,
+            primer_via.nombre_via.label("primer_via_nombre"),
+            segunda_via.nombre_via.label("segunda_via_nombre"),
+        )
+        .select_from(Accidente)
+        .outerjoin(Ubicacion, Accidente.ubicacion_id == Ubicacion.id)
+        .outerjoin(Barrio, Ubicacion.barrio_id == Barrio.id)
+        .outerjoin(TipoAccidente, Accidente.tipo_accidente_id == TipoAccidente.id)
+        .outerjoin(GravedadVictima, Accidente.gravedad_victima_id == GravedadVictima.id)
+        .outerjoin(primer_via, Ubicacion.primer_via_id == primer_via.id)
+        .outerjoin(segunda_via, Ubicacion.segunda_via_id == segunda_via.id)
+    )
+
+
+class AlmacenAccidentes:
+    """
+    Columnas NumPy con capacidad que crece al doble (inserciones amortizadas O(1)).
+    Los borrados marcan la fila en `_vivo` y se compactan cuando superan un cuarto
+    de las filas. `version` aumenta con cada cambio para invalidar cachés derivados.
+    """
+    def __init__(self, capacidad_inicial: int = 1024):
+        # Los índices de fila que devuelven las consultas solo son estables
+        # mientras se mantiene tomado `lock` (un borrado puede compactar).
+        self.lock = threading.RLock()
+        self.cargado = False
+        self.huella = ""
+        self.version = 0
+        self._indice: Optional[GrillaEspacial] = None
+        self._indice_version = -1
+        self._reiniciar(capacidad_inicial)
+
+    def _reiniciar(self, capacidad_inicial: int):
+        self._cols: Dict[str, np.ndarray] = {
+            nombre: np.empty(capacidad_inicial, dtype=dtype) for nombre, dtype in COLUMNAS.items()
+        }
+        self._vivo = np.zeros(capacidad_inicial, dtype=bool)
+        self._descripciones = np.empty(capacidad_inicial, dtype=object)
+        self._fila_por_id: Dict[int, int] = {}
+        self._n = 0
+        self._muertos = 0
+
+    # --- Carga y mantenimiento ---
+    def cargar(self, db: Session):
+        filas = db.execute(_consulta_filas()).all()
+        with self.lock:
+            self._reiniciar(max(1024, len(filas)))
+            self._anexar(filas)
+            self.cargado = True
+            # Identifica los datos de esta carga; los cachés persistentes la usan para
+            # no servir resultados de una BD que cambió mientras el proceso no corría.
+            ids = self._cols["id"][:self._n]
+            self.huella = f"{self._n}-{int(ids.sum())}-{int(ids.max()) if self._n else 0}"
+        logger.info("Almacén de accidentes cargado: %s filas", len(filas))
+
+    def asegurar_cargado(self, db: Session):
+        if not self.cargado:
+            self.cargar(db)
+
+    def agregar(self, db: Session, accidente_ids: Iterable[int]):
+        """Lee de la BD los accidentes recién creados y los añade al almacén."""
+        if not self.cargado:
+            return
+        from app.models.modelos import Accidente
+        ids = list(accidente_ids)
+        if not ids:
+            return
+        filas = db.execute(_consulta_filas().where(Accidente.id.in_(ids))).all()
+        with self.lock:
+            self._anexar(filas)
+
+    def eliminar(self, accidente_id: int):
+        with self.lock:
+            fila = self._fila_por_id.pop(accidente_id, None)
+            if fila is None:
+                return
+            self._vivo[fila] = False
+            self._muertos += 1
+            self.version += 1
+            if self._muertos * 4 > self._n:
+                self._compactar()
+
+    def coordenadas(self, accidente_id: int) -> Optional[Tuple[float, float]]:
+        """(lat, lng) de un accidente del almacén, o None si no está o no tiene coordenadas."""
+        with self.lock:
+            fila = self._fila_por_id.get(accidente_id)
+            if fila is None:
+                return None
+            lat, lng = float(self._cols["lat"][fila]), float(self._cols["lng"][fila])
+        if np.isnan(lat) or np.isnan(lng):
+            return None
+        return lat, lng
+
+    def _anexar(self, filas):
+        if not filas:
+            return
+        # Una fila ya presente (p. ej. recarga parcial) se reemplaza
+        for fila in filas:
+            if fila.id in self._fila_por_id:
+                self._vivo[self._fila_por_id.pop(fila.id)] = False
+                self._muertos += 1
+        self._reservar(self._n + len(filas))
+        inicio, fin = self._n, self._n + len(filas)
+        cols = self._cols
+        cols["id"][inicio:fin] = [f.id for f in filas]
+        cols["fecha"][inicio:fin] = [f.fecha for f in filas]
+        cols["lat"][inicio:fin] = [float(f.latitud) if f.latitud else np.nan for f in filas]
+        cols["lng"][inicio:fin] = [float(f.longitud) if f.longitud else np.nan for f in filas]
+        cols["barrio_id"][inicio:fin] = [f.barrio_id if f.barrio_id is not None else -1 for f in filas]
+        cols["zona_id"][inicio:fin] = [f.zona_id if f.zona_id is not None else -1 for f in filas]
+        cols["tipo_accidente_id"][inicio:fin] = [f.tipo_accidente_id for f in filas]
+        cols["gravedad_id"][inicio:fin] = [f.gravedad_id for f in filas]
+        self._descripciones[inicio:fin] = [_descripcion(f) for f in filas]
+        self._vivo[inicio:fin] = True
+        for posicion, fila in enumerate(filas, start=inicio):
+            self._fila_por_id[fila.id] = posicion
+        self._n = fin
+        self.version += 1
+
+    def _reservar(self, capacidad: int):
+        actual = len(self._vivo)
+        if capacidad <= actual:
+            return
+        nueva = max(capacidad, actual * 2)
+        for nombre, arreglo in self._cols.items():
+            ampliado = np.empty(nueva, dtype=arreglo.dtype)
+            ampliado[:self._n] = arreglo[:self._n]
+            self._cols[nombre] = ampliado
+        vivo = np.zeros(nueva, dtype=bool)
+        vivo[:self._n] = self._vivo[:self._n]
+        self._vivo = vivo
+        descripciones = np.empty(nueva, dtype=object)
+        descripciones[:self._n] = self._descripciones[:self._n]
+        self._descripciones = descripciones
+
+    def _compactar(self):
+        vivos = np.flatnonzero(self._vivo[:self._n])
+        n = len(vivos)
+        for nombre in self._cols:
+            self._cols[nombre][:n] = self._cols[nombre][vivos]
+        self._descripciones[:n] = self._descripciones[vivos]
+        self._descripciones[n:self._n] = None
+        self._vivo[:n] = True
+        self._vivo[n:self._n] = False
+        self._n = n
+        self._muertos = 0
+        self._fila_por_id = {int(acc_id): fila for fila, acc_id in enumerate(self._cols["id"][:n])}
+
+    # --- Consultas ---
+    def columna(self, nombre: str) -> np.ndarray:
+        """Vista de solo lectura de una columna (incluye filas borradas; combinar con `mascara`)."""
+        vista = self._cols[nombre][:self._n].view()
+        vista.flags.writeable = False
+        return vista
+
+    def indice(self) -> GrillaEspacial:
+        """Grilla espacial de las filas vivas con coordenadas; se reconstruye si cambió `version`."""
+        with self.lock:
+            if self._indice is None or self._indice_version != self.version:
+                n = self._n
+                lat, lng = self._cols["lat"][:n], self._cols["lng"][:n]
+                filas = np.flatnonzero(self._vivo[:n] & ~np.isnan(lat) & ~np.isnan(lng))
+                self._indice = GrillaEspacial(lat, lng, filas)
+                self._indice_version = self.version
+            return self._indice
+
+    def _cumple(
+        self,
+        sel,
+        barrio_id: Optional[int] = None,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None,
+        tipo_accidente_id: Optional[int] = None,
+        gravedad_id: Optional[int] = None,
+        con_coordenadas: bool = False,
+    ) -> np.ndarray:
+        # `sel` es un slice (tabla completa) o un arreglo de índices (candidatos del bbox)
+        cols = self._cols
+        mascara = self._vivo[sel].copy()
+        if barrio_id is not None:
+            mascara &= cols["barrio_id"][sel] == barrio_id
+        if fecha_desde is not None:
+            mascara &= cols["fecha"][sel] >= np.datetime64(fecha_desde, "D")
+        if fecha_hasta is not None:
+            mascara &= cols["fecha"][sel] <= np.datetime64(fecha_hasta, "D")
+        if tipo_accidente_id is not None:
+            mascara &= cols["tipo_accidente_id"][sel] == tipo_accidente_id
+        if gravedad_id is not None:
+            mascara &= cols["gravedad_id"][sel] == gravedad_id
+        if con_coordenadas:
+            mascara &= ~np.isnan(cols["lat"][sel]) & ~np.isnan(cols["lng"][sel])
+        return mascara
+
+    def mascara(self, **filtros) -> np.ndarray:
+        """Máscara booleana (sobre todas las filas) de las vivas que cumplen los filtros."""
+        return self._cumple(slice(0, self._n), **filtros)
+
+    def filtrar(self, limit: Optional[int] = None, bbox: Optional[BBox] = None, **filtros) -> np.ndarray:
+        """
+        Índices de fila que cumplen los filtros, ordenados por (fecha, id) descendente.
+        Con `bbox` solo se evalúan los candidatos que devuelve la grilla espacial.
+        """
+        with self.lock:
+            if bbox is not None:
+                candidatos = self.indice().consultar(bbox)
+                indices = candidatos[self._cumple(candidatos, **filtros)]
+            else:
+                indices = np.flatnonzero(self.mascara(**filtros))
+            orden = np.lexsort((-self._cols["id"][indices], -self._cols["fecha"][indices].astype(np.int64)))
+            indices = indices[orden]
+            return indices[:limit] if limit is not None else indices
+
+    def puntos(self, indices: np.ndarray) -> List[dict]:
+        """Formato del endpoint del mapa: id, lat, lng y descripción."""
+        ids = self._cols["id"][indices].tolist()
+        lats = self._cols["lat"][indices].tolist()
+        lngs = self._cols["lng"][indices].tolist()
+        descripciones = self._descripciones[indices].tolist()
+        return [
+            {"id": acc_id, "lat": lat, "lng": lng, "descripcion": descripcion}
+            for acc_id, lat, lng, descripcion in zip(ids, lats, lngs, descripciones)
+        ]
+
+    def puntos_filtrados(self, limit: Optional[int] = None, bbox: Optional[BBox] = None, **filtros) -> List[dict]:
+        with self.lock:
+            return self.puntos(self.filtrar(limit=limit, bbox=bbox, con_coordenadas=True, **filtros))
@@ -0,0 +1,156 @@
+# Fastapi_React/Backend/app/models/anillo_sensor.py
+"""
+Buffer circular de lecturas recientes en arrays de NumPy de capacidad fija.
+
+Cada lectura ocupa 20 bytes (fecha_hora como int64 en microsegundos,
+temperatura/humedad como float32 y el sensor_id como int32) en vez de un objeto
+`LecturaSensor`. Cuando se llena, la lectura nueva pisa a la más vieja. `cota`
+es la fecha_hora más reciente que ya no está en el buffer (descartada o nunca
+cargada): una ventana que empieza después de la cota está completa en memoria,
+para toda la flota y por lo tanto para cada equipo, y se puede servir sin
+consultar la BD. Hasta que `precargar` confirma qué hay en la BD la cota es
+desconocida y ninguna ventana se sirve desde memoria.
+"""
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+_SIN_COTA = np.iinfo(np.int64).min  # Todo lo que hay en la BD está en el buffer
+_COTA_DESCONOCIDA = np.iinfo(np.int64).max  # Sin precarga: cualquier ventana puede faltar
+
+
+def a_microsegundos(fecha_hora: datetime) -> int:
+    return int(np.datetime64(fecha_hora.replace(tzinfo=None), "us").astype(np.int64))
+
+
+def a_datetime(microsegundos: np.ndarray) -> np.ndarray:
+    return microsegundos.astype("datetime64[us]")
+
+
+class AnilloLecturas:
+    def __init__(self, capacidad: int):
+        self.capacidad = capacidad
+        self._fecha = np.zeros(capacidad, dtype=np.int64)
+        self._temperatura = np.zeros(capacidad, dtype=np.float32)
+        self._humedad = np.zeros(capacidad, dtype=np.float32)
+        self._sensor = np.zeros(capacidad, dtype=np.int32)
+        self._siguiente = 0  # Posición donde va la próxima lectura
+        self._cantidad = 0
+        self.cota = _COTA_DESCONOCIDA
+
+    def __len__(self) -> int:
+        return self._cantidad
+
+    @property
+    def bytes(self) -> int:
+        return self._fecha.nbytes + self._temperatura.nbytes + self._humedad.nbytes + self._sensor.nbytes
+
+    def agregar(self, fecha_hora: datetime, temperatura: float, humedad: float, sensor_id: int) -> None:
+        i = self._siguiente
+        if self._cantidad == self.capacidad:
+            self.cota = max(self.cota, int(self._fecha[i]))
+        else:
+            self._cantidad += 1
+        self._fecha[i] = a_microsegundos(fecha_hora)
+        self._temperatura[i] = temperatura
+        self._humedad[i] = humedad
+        self._sensor[i] = sensor_id
+        self._siguiente = (i + 1) % self.capacidad
+
+    def agregar_lote(self, fecha_us: np.ndarray, temperatura: np.ndarray, humedad: np.ndarray,
+                     sensor_id: np.ndarray) -> None:
+        """Como `agregar` pero vectorizado; `fecha_us` ya en microsegundos."""
+        fecha_us = np.asarray(fecha_us, dtype=np.int64)
+        n = len(fecha_us)
+        if n == 0:
+            return
+        if n > self.capacidad:
+            self.cota = max(self.cota, int(fecha_us[:n - self.capacidad].max()))
+            fecha_us, temperatura, humedad, sensor_id = (
+                a[n - self.capacidad:] for a in (fecha_us, temperatura, humedad, sensor_id)
+            )
+            n = self.capacidad
+        posiciones = (self._siguiente + np.arange(n)) % self.capacidad
+        # Mientras no se llena, `_siguiente` == `_cantidad`: las primeras `libres` posiciones están vacías
+        libres = self.capacidad - self._cantidad
+        if n > libres:
+            self.cota = max(self.cota, int(self._fecha[posiciones[libres:]].max()))
+        self._fecha[posiciones] = fecha_us
+        self._temperatura[posiciones] = temperatura
+        self._humedad[posiciones] = humedad
+        self._sensor[posiciones] = sensor_id
+        self._cantidad = min(self.capacidad, self._cantidad + n)
+        self._siguiente = (self._siguiente + n) % self.capacidad
+
+    def precargar(self, lecturas: Iterable[Tuple[datetime, float, float, int]], hay_mas: bool) -> None:
+        """
+        Llena el buffer con lecturas de la más vieja a la más nueva. `hay_mas` indica
+        que en la BD quedaron lecturas anteriores sin cargar; si no, las cargadas
+        son todas (o la tabla está vacía) y la cota deja de ser desconocida.
+        """
+        self.cota = _SIN_COTA
+        primera = None
+        for fecha_hora, temperatura, humedad, sensor_id in lecturas:
+            self.agregar(fecha_hora, temperatura, humedad, sensor_id)
+            primera = fecha_hora if primera is None else primera
+        if hay_mas and primera is not None:
+            # Puede haber más lecturas con la misma fecha_hora en la BD; no cuenta como cubierta
+            self.cota = max(self.cota, a_microsegundos(primera))
+
+    def cubre(self, desde: Optional[datetime]) -> bool:
+        """True si todas las lecturas con fecha_hora >= `desde` están en el buffer."""
+        if desde is None:
+            return self.cota == _SIN_COTA
+        return a_microsegundos(desde) > self.cota
+
+    def _ordenado(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Vistas en orden de llegada (la más vieja primero)."""
+        if self._cantidad < self.capacidad:
+            rango = slice(0, self._cantidad)
+            return self._fecha[rango], self._temperatura[rango], self._humedad[rango], self._sensor[rango]
+        orden = np.roll(np.arange(self.capacidad), -self._siguiente)
+        return self._fecha[orden], self._temperatura[orden], self._humedad[orden], self._sensor[orden]
+
+    def ventana(self, desde: Optional[datetime] = None, hasta: Optional[datetime] = None,
+                sensor_id: Optional[int] = None):
+        """
+        (fecha_us, temperatura, humedad) dentro de [desde, hasta), ordenados por
+        fecha_hora; de un solo equipo si se pasa `sensor_id`, si no de toda la flota.
+        """
+        fecha, temperatura, humedad, sensor = self._ordenado()
+        mascara = np.ones(len(fecha), dtype=bool)
+        if sensor_id is not None:
+            mascara &= sensor == sensor_id
+        if desde is not None:
+            mascara &= fecha >= a_microsegundos(desde)
+        if hasta is not None:
+            mascara &= fecha < a_microsegundos(hasta)
+        fecha, temperatura, humedad = fecha[mascara], temperatura[mascara], humedad[mascara]
+        # Un equipo puede mandar lecturas atrasadas: se ordena por fecha, estable por llegada
+        orden = np.argsort(fecha, kind="stable")
+        return fecha[orden], temperatura[orden], humedad[orden]
+
+    def ultima(self, sensor_id: Optional[int] = None) -> Optional[Tuple[int, float, float, int]]:
+        """(fecha_us, temperatura, humedad, sensor_id) de la lectura más reciente, del equipo o de la flota."""
+        fecha = self._fecha[:self._cantidad]
+        candidatas = np.arange(self._cantidad)
+        if sensor_id is not None:
+            candidatas = candidatas[self._sensor[:self._cantidad] == sensor_id]
+        if not len(candidatas):
+            return None
+        i = int(candidatas[np.argmax(fecha[candidatas])])
+        return int(fecha[i]), float(self._temperatura[i]), float(self._humedad[i]), int(self._sensor[i])
+
+
+def submuestrear(fecha: np.ndarray, temperatura: np.ndarray, humedad: np.ndarray, puntos: int):
+    """Promedia en `puntos` tramos iguales para que el gráfico no reciba miles de lecturas."""
+    if puntos <= 0 or len(fecha) <= puntos:
+        return fecha, temperatura, humedad
+    tramo = np.minimum((np.arange(len(fecha)) * puntos) // len(fecha), puntos - 1)
+    cantidad = np.bincount(tramo, minlength=puntos)
+    return (
+        (np.bincount(tramo, weights=fecha.astype(np.float64), minlength=puntos) / cantidad).astype(np.int64),
+        np.bincount(tramo, weights=temperatura, minlength=puntos) / cantidad,
+        np.bincount(tramo, weights=humedad, minlength=puntos) / cantidad,
+    )
@@ -0,0 +1,105 @@
+# Fastapi_React/Backend/app/models/anomalias.py
+"""
+Detección de anomalías en línea para lecturas de sensor, O(1) por lectura.
+
+Por cada equipo y variable se guarda una media y varianza exponenciales (EWMA)
+y el último valor. Una lectura es anómala si:
+
+- `tasa`: cambió más rápido que `TASA_MAXIMA` por segundo respecto de la lectura
+  anterior (y al menos `SALTO_MINIMO`, para no marcar ruido de décimas); o
+- `zscore`: se aleja más de `Z_MAXIMO` desviaciones de la media, una vez que el
+  equipo lleva `CALENTAMIENTO` lecturas.
+
+La desviación tiene un piso (`DESVIO_MINIMO`) porque un DHT22 estable da
+varianza casi cero y cualquier décima daría un z enorme; el de humedad es su
+exactitud (±2 %RH), así un salto de 71.6 % a 75 % como el del volcado queda en
+ruido. Ej. del volcado: 31.9 °C / 72.3 % -> 34.9 °C / 92 % en 6 s supera la
+tasa de ambas variables.
+"""
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+VARIABLES = ("temperatura", "humedad")
+ALFA = 0.1  # Peso de la lectura nueva en la media exponencial
+CALENTAMIENTO = 5
+Z_MAXIMO = 4.0
+TASA_MAXIMA = {"temperatura": 0.25, "humedad": 1.5}  # Unidades por segundo
+SALTO_MINIMO = {"temperatura": 1.5, "humedad": 8.0}
+DESVIO_MINIMO = {"temperatura": 0.2, "humedad": 2.0}
+# Tras un corte largo la lectura anterior ya no sirve para medir la tasa
+MAX_HUECO_TASA_SEG = 300
+
+
+class _Estado:
+    __slots__ = ("media", "varianza", "anterior", "n")
+
+    def __init__(self, valor: float):
+        self.media = valor
+        self.varianza = 0.0
+        self.anterior = valor
+        self.n = 1
+
+
+class EstadoSensor:
+    __slots__ = ("fecha_hora", "variables")
+
+    def __init__(self, fecha_hora: datetime, valores: Dict[str, float]):
+        self.fecha_hora = fecha_hora
+        self.variables = {v: _Estado(valores[v]) for v in VARIABLES}
+
+
+class DetectorAnomalias:
+    def __init__(self):
+        self._estados: Dict[int, EstadoSensor] = {}
+
+    def evaluar(self, sensor_id: int, fecha_hora: datetime, valores: Dict[str, float]) -> List[dict]:
+        """Actualiza el estado del equipo y devuelve las anomalías de esta lectura (una por variable)."""
+        estado = self._estados.get(sensor_id)
+        if estado is None:
+            self._estados[sensor_id] = EstadoSensor(fecha_hora, valores)
+            return []
+        segundos = (fecha_hora - estado.fecha_hora).total_seconds()
+        # Lecturas atrasadas (fuera de orden) no sirven para la tasa, pero sí para el z-score
+        usar_tasa = 0 < segundos <= MAX_HUECO_TASA_SEG
+        anomalias = []
+        for variable in VARIABLES:
+            valor, e = valores[variable], estado.variables[variable]
+            salto = valor - e.anterior
+            tasa = salto / max(segundos, 1.0) if usar_tasa else None
+            desvio = max(math.sqrt(e.varianza), DESVIO_MINIMO[variable])
+            z = (valor - e.media) / desvio
+            regla = None
+            if tasa is not None and abs(salto) >= SALTO_MINIMO[variable] and abs(tasa) > TASA_MAXIMA[variable]:
+                regla = "tasa"
+            elif e.n >= CALENTAMIENTO and abs(z) > Z_MAXIMO:
+                regla = "zscore"
+            if regla:
+                anomalias.append({
+                    "sensor_id": sensor_id,
+                    "fecha_hora": fecha_hora,
+                    "variable": variable,
+                    "regla": regla,
+                    "valor": valor,
+                    "anterior": e.anterior,
+                    "esperado": round(e.media, 3),
+                    "puntaje": round(z, 2),
+                    "tasa": round(tasa, 4) if tasa is not None else None,
+                })
+            # EWMA de media y varianza (forma incremental de West)
+            diferencia = valor - e.media
+            e.media += ALFA * diferencia
+            e.varianza = (1 - ALFA) * (e.varianza + ALFA * diferencia * diferencia)
+            e.n += 1
+            if segundos >= 0:
+                e.anterior = valor
+        if segundos >= 0:
+            estado.fecha_hora = fecha_hora
+        return anomalias
+
+    def estado(self, sensor_id: int) -> Optional[Dict[str, Tuple[float, float]]]:
+        """(media, desvío) actuales por variable, o None si el equipo no mandó lecturas."""
+        estado = self._estados.get(sensor_id)
+        if estado is None:
+            return None
+        return {v: (e.media, math.sqrt(e.varianza)) for v, e in estado.variables.items()}
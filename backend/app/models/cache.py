@@ -0,0 +1,165 @@
+# Fastapi_React/Backend/app/models/cache.py
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, Optional, Set, Tuple
+
+
+class CacheLRU:
+    """
+    Caché LRU pequeño y seguro entre hilos, usado para resultados derivados del almacén.
+
+    `calcular()` corre fuera del lock; si mientras tanto hubo una invalidación, el
+    valor se devuelve pero no se guarda (pudo leer datos de antes del cambio).
+    """
+    def __init__(self, max_entradas: int = 32):
+        self._max_entradas = max_entradas
+        self._datos: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generacion = 0  # Se incrementa en cada invalidación
+
+    def obtener(self, clave: Hashable, calcular):
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                return self._datos[clave]
+            generacion = self._generacion
+        valor = calcular()
+        with self._lock:
+            if generacion != self._generacion:
+                return valor
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self._max_entradas:
+                self._datos.popitem(last=False)
+        return valor
+
+    def invalidar(self, predicado=None):
+        """Borra todas las entradas, o solo aquellas cuya clave cumple `predicado`."""
+        with self._lock:
+            self._generacion += 1
+            if predicado is None:
+                self._datos.clear()
+                return
+            for clave in [c for c in self._datos if predicado(c)]:
+                del self._datos[clave]
+
+    def __len__(self):
+        return len(self._datos)
+
+
+Tile = Tuple[int, int, int]
+_HUELLA = re.compile(r"^\d+-\d+-\d+$")
+
+
+class CacheTilesDisco:
+    """
+    Tiles en disco bajo `raiz/<huella>/<clave_filtros>/z/x/y.mvt`, con un índice en
+    memoria de los archivos escritos. Invalidar cuesta O(tiles afectados) sin
+    recorrer directorios.
+
+    - Cada combinación de filtros (p.ej. un par fecha_desde/fecha_hasta) crea un
+      directorio; se guardan como mucho `max_filtros` y se borra el de uso más viejo.
+    - Al cambiar la huella del almacén (recarga con otros datos) se borran los
+      directorios de huellas anteriores.
+    - Como en `CacheLRU`, un tile armado mientras hubo una invalidación no se escribe.
+    """
+    def __init__(self, raiz: str, max_filtros: int = 32):
+        self.raiz = Path(raiz)
+        self.max_filtros = max_filtros
+        self._lock = threading.Lock()
+        self._huella: Optional[str] = None
+        self._tiles: Dict[Tile, Set[str]] = {}  # tile -> claves de filtros con archivo en disco
+        self._por_filtros: "OrderedDict[str, Set[Tile]]" = OrderedDict()  # En orden de uso (LRU)
+        self.generacion = 0  # Se incrementa en cada invalidación
+
+    def _ruta(self, clave: str, tile: Tile) -> Path:
+        z, x, y = tile
+        return self.raiz / self._huella / clave / str(z) / str(x) / f"{y}.mvt"
+
+    def _registrar(self, clave: str, tile: Tile):
+        self._tiles.setdefault(tile, set()).add(clave)
+        self._por_filtros.setdefault(clave, set()).add(tile)
+        self._por_filtros.move_to_end(clave)
+
+    def _preparar(self, huella: str) -> bool:
+        """Con el lock tomado: adopta `huella` y reconstruye el índice desde el disco si cambió."""
+        if not huella:
+            return False
+        if huella == self._huella:
+            return True
+        self.generacion += 1
+        self._huella = huella
+        self._tiles.clear()
+        self._por_filtros.clear()
+        if not self.raiz.is_dir():
+            return True
+        for directorio in self.raiz.iterdir():
+            if directorio.name != huella and directorio.is_dir() and _HUELLA.match(directorio.name):
+                shutil.rmtree(directorio, ignore_errors=True)
+        base = self.raiz / huella
+        if base.is_dir():
+            for directorio in sorted(base.iterdir(), key=lambda d: d.stat().st_mtime):
+                for ruta in directorio.glob("*/*/*.mvt"):
+                    self._registrar(directorio.name, (int(ruta.parent.parent.name), int(ruta.parent.name), int(ruta.stem)))
+            self._podar()
+        return True
+
+    def _podar(self):
+        while len(self._por_filtros) > self.max_filtros:
+            clave, tiles = self._por_filtros.popitem(last=False)
+            for tile in tiles:
+                claves = self._tiles.get(tile)
+                if claves is not None:
+                    claves.discard(clave)
+                    if not claves:
+                        del self._tiles[tile]
+            shutil.rmtree(self.raiz / self._huella / clave, ignore_errors=True)
+
+    def leer(self, huella: str, clave: str, tile: Tile) -> Optional[bytes]:
+        with self._lock:
+            if not self._preparar(huella):
+                return None
+            ruta = self._ruta(clave, tile)
+            try:
+                contenido = ruta.read_bytes()
+            except FileNotFoundError:
+                return None
+            # Puede haberlo escrito otro proceso: desde ahora también se invalida desde acá
+            self._registrar(clave, tile)
+            return contenido
+
+    def guardar(self, clave: str, tile: Tile, contenido: bytes, generacion: int):
+        """Escribe el tile salvo que haya habido una invalidación desde `generacion`."""
+        with self._lock:
+            if generacion != self.generacion or self._huella is None:
+                return
+            ruta = self._ruta(clave, tile)
+        # Escritura atómica: otro proceso nunca ve un archivo a medio escribir
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = ruta.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        temporal.write_bytes(contenido)
+        with self._lock:
+            if generacion != self.generacion:
+                temporal.unlink(missing_ok=True)
+                return
+            os.replace(temporal, ruta)
+            self._registrar(clave, tile)
+            self._podar()
+
+    def invalidar(self, huella: str, tiles: Iterable[Tile]):
+        """Borra, para todas las combinaciones de filtros, los archivos de `tiles`."""
+        with self._lock:
+            self.generacion += 1
+            if not self._preparar(huella):
+                return
+            for tile in tiles:
+                for clave in self._tiles.pop(tile, ()):
+                    self._ruta(clave, tile).unlink(missing_ok=True)
+                    self._por_filtros[clave].discard(tile)
+
+    def __len__(self):
+        return len(self._tiles)
@@ -0,0 +1,43 @@
+# Fastapi_React/Backend/app/models/cargas.py
+"""
+Estrategias de carga compartidas, una por esquema de respuesta.
+
+Cada tupla precarga exactamente las relaciones que el esquema Pydantic
+correspondiente va a leer al serializar, con `selectinload`: una consulta
+`... WHERE id IN (...)` por relación y por lote, en lugar de una consulta
+perezosa por fila (N+1) o de un JOIN cartesiano con todas las tablas.
+"""
+from sqlalchemy.orm import selectinload
+
+from app.models.modelos import Accidente, Barrio, Ubicacion, Via
+
+
+def _ubicacion_completa():
+    ubicacion = selectinload(Accidente.ubicacion)
+    return (
+        ubicacion.selectinload(Ubicacion.barrio).selectinload(Barrio.zona),
+        ubicacion.selectinload(Ubicacion.primer_via).selectinload(Via.tipo_via),
+        ubicacion.selectinload(Ubicacion.segunda_via).selectinload(Via.tipo_via),
+    )
+
+
+# schemas.AccidenteRead: 1 consulta principal + 11 por lote de filas.
+CARGA_ACCIDENTE_READ = (
+    selectinload(Accidente.usuario),
+    selectinload(Accidente.tipo_accidente),
+    selectinload(Accidente.condicion_victima),
+    selectinload(Accidente.gravedad),
+    *_ubicacion_completa(),
+)
+
+# Puntos del mapa: nombres de tipo, gravedad, barrio y vías para la descripción.
+CARGA_MAPA = (
+    selectinload(Accidente.tipo_accidente),
+    selectinload(Accidente.gravedad),
+    selectinload(Accidente.ubicacion).selectinload(Ubicacion.barrio),
+    selectinload(Accidente.ubicacion).selectinload(Ubicacion.primer_via),
+    selectinload(Accidente.ubicacion).selectinload(Ubicacion.segunda_via),
+)
+
+# Máximo de sentencias esperado al serializar un lote (≤ 500 filas) de AccidenteRead.
+MAX_CONSULTAS_ACCIDENTE_READ = 1 + 11
@@ -0,0 +1,96 @@
+# Fastapi_React/Backend/app/models/clusters.py
+"""
+Agrupamiento jerárquico de puntos del mapa por nivel de zoom.
+
+Cada punto se proyecta a Web Mercator y, para cada zoom, se asigna a una celda
+de 64×64 píxeles de pantalla (4 por eje en cada tile de 256 px). Como una celda del zoom z cubre exactamente
+cuatro celdas del zoom z + 1, los clusters quedan anidados entre niveles (igual
+que los tiles del mapa). Todos los niveles se calculan una vez por combinación
+de filtros y se guardan en un caché LRU.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from app.models.indice_espacial import BBox
+
+# log2 de celdas por eje en un tile; debe ser entero para que los niveles aniden
+CELDAS_POR_TILE_LOG2 = 2
+MAX_ZOOM = 18
+
+
+def mercator(lat: np.ndarray, lng: np.ndarray):
+    """Coordenadas Web Mercator normalizadas a [0, 1)."""
+    x = (lng + 180.0) / 360.0
+    sen = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1 + sen) / (1 - sen)) / (4 * np.pi)
+    return x, np.clip(y, 0.0, 1.0)
+
+
+class _Nivel:
+    __slots__ = ("lat", "lng", "conteo", "por_gravedad", "id_unico")
+
+    def __init__(self, lat, lng, conteo, por_gravedad, id_unico):
+        self.lat = lat
+        self.lng = lng
+        self.conteo = conteo
+        self.por_gravedad = por_gravedad
+        self.id_unico = id_unico
+
+
+class IndiceClusters:
+    def __init__(self, ids: np.ndarray, lat: np.ndarray, lng: np.ndarray, gravedad_id: np.ndarray):
+        self.total = len(ids)
+        self.gravedades = np.unique(gravedad_id)
+        x, y = mercator(lat, lng)
+        gravedad_idx = np.searchsorted(self.gravedades, gravedad_id)
+        g = len(self.gravedades)
+
+        self.niveles: List[_Nivel] = []
+        for zoom in range(MAX_ZOOM + 1):
+            celdas_por_eje = 1 << (zoom + CELDAS_POR_TILE_LOG2)
+            cx = np.minimum((x * celdas_por_eje).astype(np.int64), celdas_por_eje - 1)
+            cy = np.minimum((y * celdas_por_eje).astype(np.int64), celdas_por_eje - 1)
+            _, inversa = np.unique(cy * celdas_por_eje + cx, return_inverse=True)
+            k = int(inversa.max()) + 1 if self.total else 0
+            conteo = np.bincount(inversa, minlength=k)
+            por_gravedad = np.bincount(inversa * g + gravedad_idx, minlength=k * g).reshape(k, g)
+            # En clusters de un solo punto se conserva el id para enlazar al detalle
+            id_unico = np.full(k, -1, dtype=np.int64)
+            solos = conteo[inversa] == 1
+            id_unico[inversa[solos]] = ids[solos]
+            self.niveles.append(_Nivel(
+                lat=np.bincount(inversa, weights=lat, minlength=k) / np.maximum(conteo, 1),
+                lng=np.bincount(inversa, weights=lng, minlength=k) / np.maximum(conteo, 1),
+                conteo=conteo,
+                por_gravedad=por_gravedad,
+                id_unico=id_unico,
+            ))
+
+    def consultar(self, zoom: int, bbox: Optional[BBox] = None) -> List[dict]:
+        nivel = self.niveles[min(max(zoom, 0), MAX_ZOOM)]
+        seleccion = np.arange(len(nivel.conteo))
+        if bbox is not None:
+            min_lng, min_lat, max_lng, max_lat = bbox
+            dentro = (nivel.lng >= min_lng) & (nivel.lng <= max_lng) & (nivel.lat >= min_lat) & (nivel.lat <= max_lat)
+            seleccion = seleccion[dentro]
+
+        gravedades = [str(g) for g in self.gravedades.tolist()]
+        resultado = []
+        for lat, lng, conteo, por_gravedad, id_unico in zip(
+            nivel.lat[seleccion].tolist(),
+            nivel.lng[seleccion].tolist(),
+            nivel.conteo[seleccion].tolist(),
+            nivel.por_gravedad[seleccion].tolist(),
+            nivel.id_unico[seleccion].tolist(),
+        ):
+            cluster = {
+                "lat": lat,
+                "lng": lng,
+                "count": conteo,
+                "gravedad": {g: n for g, n in zip(gravedades, por_gravedad) if n},
+            }
+            if id_unico >= 0:
+                cluster["id"] = id_unico
+            resultado.append(cluster)
+        return resultado
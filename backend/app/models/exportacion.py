@@ -0,0 +1,141 @@
+# Fastapi_React/Backend/app/models/exportacion.py
+"""
+Escritores por lotes para exportar accidentes en CSV, GeoJSON y Parquet.
+
+Cada función recibe un iterador de lotes (listas de filas con las columnas de
+`COLUMNAS`) y devuelve un generador de bytes que emite un trozo por lote, así
+la respuesta empieza a salir con el primer lote y la memoria no depende del
+total exportado. Parquet necesita `pyarrow` (opcional): cada lote se escribe
+como un row group y los bytes se entregan apenas el escritor los suelta.
+"""
+import csv
+import io
+import json
+from typing import Iterable, Iterator, List, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dependencia opcional
+    pa = pq = None
+
+# (nombre, tipo) en el orden en que se exportan; el tipo define el esquema Parquet
+COLUMNAS = (
+    ("id", "int"),
+    ("fecha", "date"),
+    ("sexo_victima", "str"),
+    ("edad_victima", "int"),
+    ("cantidad_victima", "int"),
+    ("latitud", "float"),
+    ("longitud", "float"),
+    ("complemento", "str"),
+    ("primer_via", "str"),
+    ("segunda_via", "str"),
+    ("barrio_id", "int"),
+    ("barrio", "str"),
+    ("zona_id", "int"),
+    ("zona", "str"),
+    ("tipo_accidente_id", "int"),
+    ("tipo_accidente", "str"),
+    ("gravedad_id", "int"),
+    ("gravedad", "str"),
+    ("condicion_victima_id", "int"),
+    ("condicion_victima", "str"),
+)
+NOMBRES = tuple(nombre for nombre, _ in COLUMNAS)
+
+FORMATOS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "geojson": ("application/geo+json", "geojson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def parquet_disponible() -> bool:
+    return pa is not None
+
+
+def csv_lotes(lotes: Iterable[Sequence[Sequence]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(NOMBRES)
+    for lote in lotes:
+        escritor.writerows(lote)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def geojson_lotes(lotes: Iterable[Sequence[Sequence]]) -> Iterator[bytes]:
+    yield b'{"type":"FeatureCollection","features":['
+    primero = True
+    for lote in lotes:
+        features = []
+        for fila in lote:
+            propiedades = dict(zip(NOMBRES, fila))
+            lat, lng = propiedades.pop("latitud"), propiedades.pop("longitud")
+            geometria = {"type": "Point", "coordinates": [lng, lat]} if lat is not None and lng is not None else None
+            features.append(json.dumps(
+                {"type": "Feature", "id": propiedades["id"], "geometry": geometria, "properties": propiedades},
+                default=str, ensure_ascii=False, separators=(",", ":"),
+            ))
+        if features:
+            yield (("" if primero else ",") + ",".join(features)).encode("utf-8")
+            primero = False
+    yield b"]}"
+
+
+class _Sumidero(io.RawIOBase):
+    """Archivo de solo escritura que acumula lo escrito hasta que se vacía con `vaciar`."""
+    def __init__(self):
+        self._partes: List[bytes] = []
+        self._posicion = 0
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        datos = bytes(datos)
+        self._partes.append(datos)
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def vaciar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def _esquema_parquet():
+    tipos = {"int": pa.int64(), "float": pa.float64(), "str": pa.string(), "date": pa.date32()}
+    return pa.schema([(nombre, tipos[tipo]) for nombre, tipo in COLUMNAS])
+
+
+def parquet_lotes(lotes: Iterable[Sequence[Sequence]]) -> Iterator[bytes]:
+    """Un row group por lote. Lanza RuntimeError si `pyarrow` no está instalado."""
+    if pa is None:
+        raise RuntimeError("La exportación a Parquet requiere pyarrow")
+    esquema = _esquema_parquet()
+    sumidero = _Sumidero()
+    escritor = pq.ParquetWriter(sumidero, esquema, compression="snappy")
+    try:
+        for lote in lotes:
+            columnas = list(zip(*lote)) if lote else [()] * len(NOMBRES)
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, esquema)],
+                schema=esquema,
+            ))
+            datos = sumidero.vaciar()
+            if datos:
+                yield datos
+    finally:
+        escritor.close()
+    yield sumidero.vaciar()
+
+
+ESCRITORES = {"csv": csv_lotes, "geojson": geojson_lotes, "parquet": parquet_lotes}
@@ -0,0 +1,248 @@
+# Fastapi_React/Backend/app/models/hotspots.py
+"""
+Detección de hotspots por densidad sobre una grilla (estilo DBSCAN por celdas).
+
+Cada accidente suma a su celda un peso según la gravedad. Son "núcleo" las
+celdas del 5% con más peso (y con al menos `PESO_MINIMO`); un umbral relativo
+evita que, al crecer los datos, todo el centro quede en un único grupo. Los
+hotspots son los grupos de celdas núcleo vecinas (8-conectividad) y las celdas
+no núcleo pegadas a un grupo se le suman como borde, igual que los puntos
+frontera de DBSCAN. Trabajar por celdas hace que el costo dependa de las celdas
+ocupadas y no de la cantidad de accidentes.
+
+`GrillaHotspots` guarda el resultado de una corrida y, ante cambios en algunas
+celdas, rearma solo los grupos cercanos mientras el umbral de núcleo no cambie.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# ~0.002° ≈ 220 m en Barranquilla (del orden de una manzana más sus cruces)
+TAMANO_CELDA_GRADOS = 0.002
+# Peso por gravedad_victima_id: 1 = Herido, 2 = Muerto, 3 = Sin definir
+PESO_GRAVEDAD = {1: 1.0, 2: 5.0, 3: 0.5}
+PESO_POR_DEFECTO = 1.0
+PESO_MINIMO = 8.0
+CUANTIL_NUCLEO = 0.95
+
+Celda = Tuple[int, int]
+# (accidentes, peso, suma_lat, suma_lng)
+Acumulado = Tuple[int, float, float, float]
+
+
+def pesos(gravedad_id: np.ndarray) -> np.ndarray:
+    resultado = np.full(len(gravedad_id), PESO_POR_DEFECTO)
+    for gravedad, peso in PESO_GRAVEDAD.items():
+        resultado[gravedad_id == gravedad] = peso
+    return resultado
+
+
+def celda(lat: float, lng: float) -> Celda:
+    return int(np.floor(lng / TAMANO_CELDA_GRADOS)), int(np.floor(lat / TAMANO_CELDA_GRADOS))
+
+
+def bbox_celdas(celdas: Iterable[Celda]) -> Tuple[float, float, float, float]:
+    """(min_lng, min_lat, max_lng, max_lat) que cubre todas las celdas."""
+    xs, ys = zip(*celdas)
+    return (
+        min(xs) * TAMANO_CELDA_GRADOS, min(ys) * TAMANO_CELDA_GRADOS,
+        (max(xs) + 1) * TAMANO_CELDA_GRADOS, (max(ys) + 1) * TAMANO_CELDA_GRADOS,
+    )
+
+
+def acumular_celdas(lat: np.ndarray, lng: np.ndarray, gravedad_id: np.ndarray) -> Dict[Celda, Acumulado]:
+    """Acumulados por celda de la grilla, calculados con un solo `np.unique` + `bincount`."""
+    if len(lat) == 0:
+        return {}
+    cx = np.floor(lng / TAMANO_CELDA_GRADOS).astype(np.int64)
+    cy = np.floor(lat / TAMANO_CELDA_GRADOS).astype(np.int64)
+    celdas, inversa = np.unique(np.stack([cx, cy], axis=1), axis=0, return_inverse=True)
+    inversa = inversa.ravel()
+    accidentes = np.bincount(inversa)
+    peso = np.bincount(inversa, weights=pesos(gravedad_id))
+    suma_lat = np.bincount(inversa, weights=lat)
+    suma_lng = np.bincount(inversa, weights=lng)
+    return {
+        (x, y): (n, p, sl, sg)
+        for (x, y), n, p, sl, sg in zip(
+            celdas.tolist(), accidentes.tolist(), peso.tolist(), suma_lat.tolist(), suma_lng.tolist()
+        )
+    }
+
+
+def celdas_cambiadas(anteriores: Dict[Celda, Acumulado], nuevas: Dict[Celda, Acumulado]) -> List[Celda]:
+    """Celdas que aparecieron, desaparecieron o cambiaron de conteo/peso desde la última corrida."""
+    cambiadas = [c for c in anteriores.keys() - nuevas.keys()]
+    for celda, acumulado in nuevas.items():
+        previo = anteriores.get(celda)
+        if previo is None or previo[0] != acumulado[0] or not np.isclose(previo[1], acumulado[1]):
+            cambiadas.append(celda)
+    return cambiadas
+
+
+def _vecinas(celda: Celda):
+    x, y = celda
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            if dx or dy:
+                yield x + dx, y + dy
+
+
+def entorno(celdas: Iterable[Celda], radio: int) -> Set[Celda]:
+    """Las celdas dadas y todas las que están a `radio` celdas o menos (en las 8 direcciones)."""
+    rango = range(-radio, radio + 1)
+    return {(x + dx, y + dy) for x, y in celdas for dx in rango for dy in rango}
+
+
+def umbral_nucleo(celdas: Dict[Celda, Acumulado]) -> float:
+    if not celdas:
+        return PESO_MINIMO
+    return max(PESO_MINIMO, float(np.quantile([peso for _, peso, _, _ in celdas.values()], CUANTIL_NUCLEO)))
+
+
+def detectar(
+    celdas: Dict[Celda, Acumulado],
+    peso_minimo: Optional[float] = None,
+    semillas: Optional[Iterable[Celda]] = None,
+) -> List[dict]:
+    """
+    Hotspots ordenados por peso descendente, con centroide ponderado por cantidad y bbox.
+    Con `semillas` solo se arman los grupos que contienen alguna de esas celdas
+    núcleo. Cada hotspot lleva en "miembros" sus celdas (núcleos primero).
+    """
+    if peso_minimo is None:
+        peso_minimo = umbral_nucleo(celdas)
+
+    def es_nucleo(c: Celda) -> bool:
+        acumulado = celdas.get(c)
+        return acumulado is not None and acumulado[1] >= peso_minimo
+
+    if semillas is None:
+        semillas = [c for c, (_, peso, _, _) in celdas.items() if peso >= peso_minimo]
+    grupo_de: Dict[Celda, int] = {}
+    grupos: List[List[Celda]] = []
+    for inicio in semillas:
+        if inicio in grupo_de or not es_nucleo(inicio):
+            continue
+        grupo_de[inicio] = len(grupos)
+        pendientes, miembros = [inicio], []
+        while pendientes:
+            actual = pendientes.pop()
+            miembros.append(actual)
+            for vecina in _vecinas(actual):
+                if vecina not in grupo_de and es_nucleo(vecina):
+                    grupo_de[vecina] = len(grupos)
+                    pendientes.append(vecina)
+        grupos.append(miembros)
+
+    # Celdas borde: ocupadas, no núcleo y pegadas a un grupo (se asignan al de su primera vecina núcleo)
+    bordes = {
+        vecina for miembros in grupos for c in miembros for vecina in _vecinas(c)
+        if vecina in celdas and not es_nucleo(vecina)
+    }
+    for borde in bordes:
+        for vecina in _vecinas(borde):
+            if es_nucleo(vecina):
+                if vecina in grupo_de:
+                    grupos[grupo_de[vecina]].append(borde)
+                break
+
+    hotspots = []
+    for miembros in grupos:
+        accidentes = sum(celdas[c][0] for c in miembros)
+        xs = [c[0] for c in miembros]
+        ys = [c[1] for c in miembros]
+        hotspots.append({
+            "accidentes": accidentes,
+            "peso": round(sum(celdas[c][1] for c in miembros), 2),
+            "celdas": len(miembros),
+            "latitud": sum(celdas[c][2] for c in miembros) / accidentes,
+            "longitud": sum(celdas[c][3] for c in miembros) / accidentes,
+            "min_lat": min(ys) * TAMANO_CELDA_GRADOS,
+            "min_lng": min(xs) * TAMANO_CELDA_GRADOS,
+            "max_lat": (max(ys) + 1) * TAMANO_CELDA_GRADOS,
+            "max_lng": (max(xs) + 1) * TAMANO_CELDA_GRADOS,
+            "miembros": miembros,
+        })
+    return ordenar(hotspots)
+
+
+def ordenar(hotspots: List[dict]) -> List[dict]:
+    """Ordena por peso y asigna `rango` (1 = el más pesado)."""
+    hotspots.sort(key=lambda h: (-h["peso"], -h["accidentes"]))
+    for rango, hotspot in enumerate(hotspots, start=1):
+        hotspot["rango"] = rango
+    return hotspots
+
+
+class GrillaHotspots:
+    """
+    Acumulados por celda y hotspots de la última corrida, con un id estable por
+    hotspot. Si cambian algunas celdas y el umbral de núcleo sigue igual, solo
+    pueden cambiar los grupos con alguna celda a 2 o menos de una celda cambiada
+    (un cambio de núcleo altera a sus vecinas, y el borde se asigna según las
+    vecinas de la vecina); el resto se conserva y solo puede cambiar de rango.
+    """
+    def __init__(self, celdas: Dict[Celda, Acumulado]):
+        self.celdas = dict(celdas)
+        self.umbral = umbral_nucleo(self.celdas)
+        self.hotspots: Dict[int, dict] = {}  # id -> hotspot (sin "miembros")
+        self._miembros: Dict[int, List[Celda]] = {}
+        self._hotspot_de: Dict[Celda, int] = {}
+        self._siguiente_id = 1
+        self._incorporar(detectar(self.celdas, self.umbral))
+
+    def _incorporar(self, detectados: List[dict]) -> List[dict]:
+        for hotspot in detectados:
+            hotspot_id = hotspot["id"] = self._siguiente_id
+            self._siguiente_id += 1
+            self._miembros[hotspot_id] = hotspot.pop("miembros")
+            for c in self._miembros[hotspot_id]:
+                self._hotspot_de[c] = hotspot_id
+            self.hotspots[hotspot_id] = hotspot
+        return detectados
+
+    def _quitar(self, hotspot_id: int) -> List[Celda]:
+        del self.hotspots[hotspot_id]
+        miembros = self._miembros.pop(hotspot_id)
+        for c in miembros:
+            del self._hotspot_de[c]
+        return miembros
+
+    def actualizar(self, cambios: Dict[Celda, Optional[Acumulado]]) -> Tuple[List[int], List[dict], Dict[int, int]]:
+        """
+        Aplica los acumulados nuevos (None = la celda quedó vacía). Devuelve los ids
+        de hotspots que desaparecen, los hotspots nuevos (con id) y {id: rango} de
+        los que se conservan pero cambiaron de rango.
+        """
+        for c, acumulado in cambios.items():
+            if acumulado is None:
+                self.celdas.pop(c, None)
+            else:
+                self.celdas[c] = acumulado
+        if not cambios:
+            return [], [], {}
+
+        umbral = umbral_nucleo(self.celdas)
+        rangos_previos = {hotspot_id: h["rango"] for hotspot_id, h in self.hotspots.items()}
+        if not np.isclose(umbral, self.umbral):
+            # Con otro umbral cualquier celda puede entrar o salir del núcleo: todo de nuevo
+            self.umbral = umbral
+            borrados = list(self.hotspots)
+            for hotspot_id in borrados:
+                self._quitar(hotspot_id)
+            semillas = None
+        else:
+            cercanas = entorno(cambios, 2)
+            borrados = sorted({self._hotspot_de[c] for c in cercanas if c in self._hotspot_de})
+            semillas = set(cambios)
+            for hotspot_id in borrados:
+                semillas.update(self._quitar(hotspot_id))
+            semillas.update(c for c in entorno(cambios, 1) if c in self.celdas)
+        nuevos = self._incorporar(detectar(self.celdas, umbral, semillas))
+        ordenar(list(self.hotspots.values()))
+        rangos = {
+            hotspot_id: rango for hotspot_id, rango in rangos_previos.items()
+            if hotspot_id in self.hotspots and self.hotspots[hotspot_id]["rango"] != rango
+        }
+        return borrados, nuevos, rangos
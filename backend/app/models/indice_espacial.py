@@ -0,0 +1,92 @@
+# Fastapi_React/Backend/app/models/indice_espacial.py
+"""
+Índice espacial de grilla uniforme sobre las coordenadas del almacén de accidentes.
+
+Las filas se ordenan por celda (formato CSR: `orden` + `offsets`), de modo que
+las celdas de una misma fila de la grilla quedan contiguas y una consulta por
+bbox lee un tramo de `orden` por cada fila de celdas que toca. El costo depende
+de los puntos dentro del bbox, no del tamaño de la tabla.
+"""
+import math
+from typing import Tuple
+
+import numpy as np
+
+BBox = Tuple[float, float, float, float]  # (min_lng, min_lat, max_lng, max_lat)
+
+# ~0.005° ≈ 550 m en Barranquilla: unas pocas decenas de puntos por celda en el centro
+TAMANO_CELDA_GRADOS = 0.005
+
+
+def parsear_bbox(texto: str) -> BBox:
+    """
+    'minLng,minLat,maxLng,maxLat' -> tupla de floats, recortada a ±180/±90.
+    Lanza ValueError si no es válido (incluidos inf y nan).
+    """
+    partes = [float(valor) for valor in texto.split(",")]
+    if len(partes) != 4:
+        raise ValueError("El bbox debe tener 4 valores: minLng,minLat,maxLng,maxLat")
+    if not all(math.isfinite(valor) for valor in partes):
+        raise ValueError("El bbox solo admite valores finitos")
+    min_lng, min_lat, max_lng, max_lat = partes
+    if not (min_lng <= max_lng and min_lat <= max_lat):
+        raise ValueError("El bbox debe cumplir minLng <= maxLng y minLat <= maxLat")
+    def recortar(valor, limite):
+        return min(max(valor, -limite), limite)
+
+    return recortar(min_lng, 180.0), recortar(min_lat, 90.0), recortar(max_lng, 180.0), recortar(max_lat, 90.0)
+
+
+class GrillaEspacial:
+    def __init__(self, lat: np.ndarray, lng: np.ndarray, filas: np.ndarray, tamano_celda: float = TAMANO_CELDA_GRADOS):
+        """
+        `lat`/`lng` son las columnas completas del almacén y `filas` los índices
+        que se indexan (filas vivas con coordenadas).
+        """
+        self.tamano_celda = tamano_celda
+        self._lat = lat
+        self._lng = lng
+        if len(filas) == 0:
+            self.origen_lng = self.origen_lat = 0.0
+            self.nx = self.ny = 1
+            self.orden = np.empty(0, dtype=np.int64)
+            self.offsets = np.zeros(2, dtype=np.int64)
+            return
+
+        lng_f, lat_f = lng[filas], lat[filas]
+        self.origen_lng = float(lng_f.min())
+        self.origen_lat = float(lat_f.min())
+        ix = ((lng_f - self.origen_lng) / tamano_celda).astype(np.int64)
+        iy = ((lat_f - self.origen_lat) / tamano_celda).astype(np.int64)
+        self.nx = int(ix.max()) + 1
+        self.ny = int(iy.max()) + 1
+
+        celda = iy * self.nx + ix
+        permutacion = np.argsort(celda, kind="stable")
+        self.orden = filas[permutacion]
+        conteo = np.bincount(celda, minlength=self.nx * self.ny)
+        self.offsets = np.zeros(self.nx * self.ny + 1, dtype=np.int64)
+        np.cumsum(conteo, out=self.offsets[1:])
+
+    def _rango(self, minimo: float, maximo: float, origen: float, n: int) -> Tuple[int, int]:
+        inicio = int(np.floor((minimo - origen) / self.tamano_celda))
+        fin = int(np.floor((maximo - origen) / self.tamano_celda))
+        return max(inicio, 0), min(fin, n - 1)
+
+    def consultar(self, bbox: BBox) -> np.ndarray:
+        """Índices de fila cuyas coordenadas caen dentro de `bbox` (bordes incluidos)."""
+        min_lng, min_lat, max_lng, max_lat = bbox
+        ix0, ix1 = self._rango(min_lng, max_lng, self.origen_lng, self.nx)
+        iy0, iy1 = self._rango(min_lat, max_lat, self.origen_lat, self.ny)
+        if ix0 > ix1 or iy0 > iy1:
+            return np.empty(0, dtype=np.int64)
+
+        tramos = [
+            self.orden[self.offsets[iy * self.nx + ix0]:self.offsets[iy * self.nx + ix1 + 1]]
+            for iy in range(iy0, iy1 + 1)
+        ]
+        candidatos = np.concatenate(tramos) if tramos else np.empty(0, dtype=np.int64)
+        # Las celdas del borde pueden tener puntos fuera del bbox
+        lat, lng = self._lat[candidatos], self._lng[candidatos]
+        dentro = (lng >= min_lng) & (lng <= max_lng) & (lat >= min_lat) & (lat <= max_lat)
+        return candidatos[dentro]
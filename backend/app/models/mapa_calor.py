@@ -0,0 +1,125 @@
+# Fastapi_React/Backend/app/models/mapa_calor.py
+"""
+Tiles de mapa de calor (densidad por kernel gaussiano) en el esquema XYZ de Leaflet.
+
+Por tile se toman solo los puntos del tile más un margen de 3σ (para que no
+haya cortes entre tiles vecinos), se acumulan en un histograma de píxeles y se
+suavizan con dos productos de matrices (el kernel gaussiano es separable).
+La escala de color depende solo del zoom, no de los datos del tile, así un
+accidente nuevo solo cambia los tiles que toca.
+"""
+import math
+import struct
+import zlib
+from typing import List, Set, Tuple
+
+import numpy as np
+
+from app.models.clusters import mercator
+from app.models.indice_espacial import BBox
+
+TAMANO_TILE = 256
+SIGMA_PX = 8
+MARGEN_PX = 3 * SIGMA_PX
+
+# Densidad que satura al ~63% en ZOOM_REFERENCIA; por cada zoom menos, cada píxel
+# cubre 4 veces más área y la referencia crece en la misma proporción.
+ZOOM_REFERENCIA = 16
+DENSIDAD_REFERENCIA = 0.5
+
+
+def _matriz_kernel() -> np.ndarray:
+    # T[i, j] = g(i - MARGEN_PX - j): lleva un eje con margen al eje del tile
+    desplazamiento = np.arange(TAMANO_TILE + 2 * MARGEN_PX)[:, None] - MARGEN_PX - np.arange(TAMANO_TILE)[None, :]
+    return np.exp(-(desplazamiento ** 2) / (2 * SIGMA_PX ** 2))
+
+_KERNEL = _matriz_kernel()
+
+
+def bbox_tile(z: int, x: int, y: int, margen_px: int = 0) -> BBox:
+    """(min_lng, min_lat, max_lng, max_lat) del tile, ampliado `margen_px` píxeles por lado."""
+    n = 2 ** z
+    m = margen_px / TAMANO_TILE
+
+    def lng(tx):
+        return tx / n * 360.0 - 180.0
+
+    def lat(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return lng(x - m), lat(y + 1 + m), lng(x + 1 + m), lat(y - m)
+
+
+def tiles_afectados(lat, lng, zooms: range) -> Set[Tuple[int, int, int]]:
+    """
+    (z, x, y) de los tiles cuyo mapa de calor cambia si se agregan o quitan puntos
+    en (lat, lng). Acepta un punto o arreglos de puntos (cargas masivas).
+    """
+    mx, my = mercator(np.atleast_1d(np.asarray(lat, dtype=np.float64)), np.atleast_1d(np.asarray(lng, dtype=np.float64)))
+    afectados = set()
+    for z in zooms:
+        px, py = mx * TAMANO_TILE * 2 ** z, my * TAMANO_TILE * 2 ** z
+        esquinas = [
+            np.stack([(px + dx) // TAMANO_TILE, (py + dy) // TAMANO_TILE], axis=1)
+            for dx in (-MARGEN_PX, MARGEN_PX) for dy in (-MARGEN_PX, MARGEN_PX)
+        ]
+        tiles = np.unique(np.concatenate(esquinas).astype(np.int64), axis=0)
+        afectados.update((z, tx, ty) for tx, ty in tiles.tolist())
+    return afectados
+
+
+def densidad(lat: np.ndarray, lng: np.ndarray, z: int, x: int, y: int) -> np.ndarray:
+    """Matriz 256x256 (filas = y) con la suma de kernels de los puntos dados."""
+    mx, my = mercator(lat, lng)
+    escala = TAMANO_TILE * 2 ** z
+    px = mx * escala - x * TAMANO_TILE + MARGEN_PX
+    py = my * escala - y * TAMANO_TILE + MARGEN_PX
+    lado = TAMANO_TILE + 2 * MARGEN_PX
+    histograma, _, _ = np.histogram2d(py, px, bins=lado, range=[[0, lado], [0, lado]])
+    return _KERNEL.T @ histograma @ _KERNEL
+
+
+def intensidad(dens: np.ndarray, z: int) -> np.ndarray:
+    referencia = DENSIDAD_REFERENCIA * 4.0 ** (ZOOM_REFERENCIA - z)
+    return 1.0 - np.exp(-dens / referencia)
+
+
+# Rampa azul -> cian -> verde -> amarillo -> rojo
+_RAMPA = np.array([
+    [0, 0, 255], [0, 255, 255], [0, 255, 0], [255, 255, 0], [255, 0, 0],
+], dtype=np.float64)
+
+
+def colorear(valores: np.ndarray) -> np.ndarray:
+    """Intensidades en [0, 1] -> imagen RGBA uint8 (transparente donde no hay densidad)."""
+    posicion = np.clip(valores, 0, 1) * (len(_RAMPA) - 1)
+    base = np.minimum(posicion.astype(np.int64), len(_RAMPA) - 2)
+    fraccion = (posicion - base)[..., None]
+    rgb = _RAMPA[base] * (1 - fraccion) + _RAMPA[base + 1] * fraccion
+    alfa = np.clip(valores * 1.5, 0, 0.85) * 255
+    return np.dstack([rgb, alfa]).round().astype(np.uint8)
+
+
+def codificar_png(rgba: np.ndarray) -> bytes:
+    """PNG RGBA de 8 bits sin dependencias externas (zlib de la biblioteca estándar)."""
+    alto, ancho, _ = rgba.shape
+
+    def bloque(tipo: bytes, datos: bytes) -> bytes:
+        return struct.pack(">I", len(datos)) + tipo + datos + struct.pack(">I", zlib.crc32(tipo + datos) & 0xFFFFFFFF)
+
+    # Cada fila lleva un byte de filtro (0 = ninguno) al inicio
+    filas = np.zeros((alto, ancho * 4 + 1), dtype=np.uint8)
+    filas[:, 1:] = rgba.reshape(alto, ancho * 4)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + bloque(b"IHDR", struct.pack(">IIBBBBB", ancho, alto, 8, 6, 0, 0, 0))
+        + bloque(b"IDAT", zlib.compress(filas.tobytes(), 6))
+        + bloque(b"IEND", b"")
+    )
+
+
+def grilla_json(dens: np.ndarray, z: int, resolucion: int = 64) -> List[List[float]]:
+    """Densidad normalizada promediada en bloques, para clientes que pintan su propia capa."""
+    bloque = TAMANO_TILE // resolucion
+    reducida = intensidad(dens, z).reshape(resolucion, bloque, resolucion, bloque).mean(axis=(1, 3))
+    return np.round(reducida, 4).tolist()
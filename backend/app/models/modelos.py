@@ -1,7 +1,7 @@
 # Fastapi_React/Backend/app/models/modelos.py
-from datetime import date
+from datetime import date, datetime
 from typing import List, Optional
-from sqlalchemy import CHAR, Column, Integer, String, Date, DateTime, ForeignKey, Float # Asegúrate de importar Float si lo usas
+from sqlalchemy import CHAR, Column, Integer, String, Date, DateTime, ForeignKey, Float, func # Asegúrate de importar Float si lo usas
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.orm import Mapped, mapped_column
 # from .modelos import Zona, TipoVia, TipoAccidente, CondicionVictima, GravedadVictima, Barrio, Via, Ubicacion, Usuario, Accidente
@@ -103,6 +103,9 @@ class Accidente(Base):
     sexo_victima: Mapped[Optional[str]] = mapped_column(CHAR(1), nullable=True)
     edad_victima: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     cantidad_victima: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Columnas de auditoría ya presentes en la tabla; `updated` es la marca de agua del AccidentProxy
+    created: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    updated: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now(), index=True)
     
     usuario_id: Mapped[int] = mapped_column(ForeignKey('autenticacion_usuario.id'), index=True) # FK indexada
     condicion_victima_id: Mapped[int] = mapped_column(ForeignKey('accidente_condicionvictima.id'), index=True) # FK indexada
@@ -116,3 +119,45 @@ class Accidente(Base):
     tipo_accidente: Mapped["TipoAccidente"] = relationship(back_populates="accidentes")
     ubicacion: Mapped["Ubicacion"] = relationship(back_populates="accidentes")
 
+class ResumenAccidenteDiario(Base):
+    """
+    Rollup por (día, barrio, tipo, gravedad), mantenido en la misma transacción que
+    cada alta o baja de accidente. `barrio_id` = 0 agrupa los accidentes sin barrio
+    (una PK no admite NULL), por eso no se declara como FK.
+    """
+    __tablename__ = "accidente_resumen_diario"
+    fecha: Mapped[date] = mapped_column(Date, primary_key=True)
+    barrio_id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    tipo_accidente_id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    gravedad_victima_id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    accidentes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    victimas: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class HotspotCelda(Base):
+    """Acumulado por celda de la grilla de hotspots; el job solo reescribe las celdas que cambiaron."""
+    __tablename__ = "accidente_hotspot_celda"
+    celda_x: Mapped[int] = mapped_column(Integer, primary_key=True)
+    celda_y: Mapped[int] = mapped_column(Integer, primary_key=True)
+    accidentes: Mapped[int] = mapped_column(Integer, nullable=False)
+    peso: Mapped[float] = mapped_column(Float, nullable=False)
+    suma_lat: Mapped[float] = mapped_column(Float, nullable=False)
+    suma_lng: Mapped[float] = mapped_column(Float, nullable=False)
+
+
+class Hotspot(Base):
+    """Zona de alta concentración de accidentes (celdas densas contiguas), ordenada por `rango`."""
+    __tablename__ = "accidente_hotspot"
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    rango: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    accidentes: Mapped[int] = mapped_column(Integer, nullable=False)
+    peso: Mapped[float] = mapped_column(Float, nullable=False)
+    celdas: Mapped[int] = mapped_column(Integer, nullable=False)
+    latitud: Mapped[float] = mapped_column(Float, nullable=False)
+    longitud: Mapped[float] = mapped_column(Float, nullable=False)
+    min_lat: Mapped[float] = mapped_column(Float, nullable=False)
+    min_lng: Mapped[float] = mapped_column(Float, nullable=False)
+    max_lat: Mapped[float] = mapped_column(Float, nullable=False)
+    max_lng: Mapped[float] = mapped_column(Float, nullable=False)
+    calculado: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
@@ -0,0 +1,132 @@
+# Fastapi_React/Backend/app/models/mvt.py
+"""
+Codificación de Mapbox Vector Tiles (especificación 2.1) para los puntos de accidentes.
+
+El formato es un mensaje protobuf sencillo; se escribe a mano (varints y campos
+de longitud) para no depender de librerías con extensiones nativas. Cada tile
+lleva dos capas:
+
+* "accidentes": un punto por accidente con `id`, `tipo_accidente_id` y `gravedad_id`.
+* "barrios": un punto por barrio en el centroide de sus accidentes dentro del
+  tile, con `barrio_id`, `count` y `gravedad_<id>` (cantidad por gravedad).
+
+Como ambas capas dependen solo de los puntos del tile (más el buffer), un
+accidente nuevo o borrado solo invalida los tiles que lo contienen.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.models.clusters import mercator
+
+EXTENT = 4096
+BUFFER = 64  # unidades de tile alrededor del borde que también se incluyen
+MIN_ZOOM_PUNTOS = 11  # por debajo, solo la capa de barrios
+
+
+def _varint(valor: int) -> bytes:
+    salida = bytearray()
+    while True:
+        byte = valor & 0x7F
+        valor >>= 7
+        if valor:
+            salida.append(byte | 0x80)
+        else:
+            salida.append(byte)
+            return bytes(salida)
+
+
+def _zigzag(valor: int) -> int:
+    return (valor << 1) ^ (valor >> 63)
+
+
+def _campo_varint(numero: int, valor: int) -> bytes:
+    return _varint(numero << 3) + _varint(valor)
+
+
+def _campo_bytes(numero: int, datos: bytes) -> bytes:
+    return _varint((numero << 3) | 2) + _varint(len(datos)) + datos
+
+
+def _valor(valor) -> bytes:
+    # Value: string_value = 1, double_value = 3, sint_value = 6
+    if isinstance(valor, str):
+        return _campo_bytes(1, valor.encode("utf-8"))
+    if isinstance(valor, float):
+        return _varint((3 << 3) | 1) + np.float64(valor).tobytes()
+    return _campo_varint(6, _zigzag(int(valor)))
+
+
+def codificar_capa(nombre: str, features: List[Tuple[int, int, int, Dict[str, object]]]) -> bytes:
+    """`features` = [(id, x, y, propiedades)] con x/y ya en coordenadas del tile (0..EXTENT)."""
+    claves: Dict[str, int] = {}
+    valores: Dict[object, int] = {}
+    cuerpo = bytearray()
+    for feature_id, x, y, propiedades in features:
+        tags = bytearray()
+        for clave, valor in propiedades.items():
+            tags += _varint(claves.setdefault(clave, len(claves)))
+            tags += _varint(valores.setdefault((type(valor), valor), len(valores)))
+        # MoveTo con un punto: comando (id 1, count 1) y el desplazamiento desde (0, 0)
+        geometria = _varint(9) + _varint(_zigzag(x)) + _varint(_zigzag(y))
+        feature = (
+            _campo_varint(1, feature_id)
+            + _campo_bytes(2, bytes(tags))
+            + _campo_varint(3, 1)  # GeomType POINT
+            + _campo_bytes(4, geometria)
+        )
+        cuerpo += _campo_bytes(2, feature)
+
+    capa = _campo_varint(15, 2) + _campo_bytes(1, nombre.encode("utf-8")) + bytes(cuerpo)
+    capa += b"".join(_campo_bytes(3, clave.encode("utf-8")) for clave in claves)
+    capa += b"".join(_campo_bytes(4, _valor(valor)) for (_, valor) in valores)
+    capa += _campo_varint(5, EXTENT)
+    return _campo_bytes(3, capa)
+
+
+def coordenadas_tile(lat: np.ndarray, lng: np.ndarray, z: int, x: int, y: int):
+    """Coordenadas enteras en el sistema del tile y máscara de las que caen dentro del buffer."""
+    mx, my = mercator(lat, lng)
+    tx = np.floor((mx * 2 ** z - x) * EXTENT).astype(np.int64)
+    ty = np.floor((my * 2 ** z - y) * EXTENT).astype(np.int64)
+    dentro = (tx >= -BUFFER) & (tx < EXTENT + BUFFER) & (ty >= -BUFFER) & (ty < EXTENT + BUFFER)
+    return tx, ty, dentro
+
+
+def construir_tile(
+    z: int, x: int, y: int,
+    ids: np.ndarray, lat: np.ndarray, lng: np.ndarray,
+    tipo_accidente_id: np.ndarray, gravedad_id: np.ndarray, barrio_id: np.ndarray,
+) -> bytes:
+    tx, ty, dentro = coordenadas_tile(lat, lng, z, x, y)
+    tx, ty = tx[dentro], ty[dentro]
+    ids, lat, lng = ids[dentro], lat[dentro], lng[dentro]
+    tipo_accidente_id, gravedad_id, barrio_id = tipo_accidente_id[dentro], gravedad_id[dentro], barrio_id[dentro]
+
+    tile = b""
+    if z >= MIN_ZOOM_PUNTOS and len(ids):
+        tile += codificar_capa("accidentes", [
+            (acc_id, px, py, {"id": acc_id, "tipo_accidente_id": tipo, "gravedad_id": gravedad})
+            for acc_id, px, py, tipo, gravedad in zip(
+                ids.tolist(), tx.tolist(), ty.tolist(), tipo_accidente_id.tolist(), gravedad_id.tolist()
+            )
+        ])
+
+    con_barrio = barrio_id >= 0
+    if con_barrio.any():
+        barrios, inversa = np.unique(barrio_id[con_barrio], return_inverse=True)
+        conteo = np.bincount(inversa)
+        cx = np.round(np.bincount(inversa, weights=tx[con_barrio]) / conteo).astype(np.int64)
+        cy = np.round(np.bincount(inversa, weights=ty[con_barrio]) / conteo).astype(np.int64)
+        gravedades = np.unique(gravedad_id[con_barrio])
+        por_gravedad = {
+            int(g): np.bincount(inversa[gravedad_id[con_barrio] == g], minlength=len(barrios))
+            for g in gravedades
+        }
+        features = []
+        for i, barrio in enumerate(barrios.tolist()):
+            propiedades = {"barrio_id": barrio, "count": int(conteo[i])}
+            propiedades.update({f"gravedad_{g}": int(n[i]) for g, n in por_gravedad.items() if n[i]})
+            features.append((barrio, int(cx[i]), int(cy[i]), propiedades))
+        tile += codificar_capa("barrios", features)
+    return tile
@@ -1,54 +1,161 @@
+import gzip
+import hashlib
 import logging
-from sqlalchemy.orm import joinedload
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Collection, Dict, List, NamedTuple, Optional, Set
+from pydantic import TypeAdapter
 from app.database import SessionLocal
 from app.schemas.schemas import AccidenteRead  # Asegúrate que este esquema usa from_attributes=True
 
 logger = logging.getLogger(__name__)
 
+_lista_accidentes = TypeAdapter(List[AccidenteRead])
+# Una fila puede hacer commit con un `updated` anterior a la marca de agua (transacción
+# larga, default tomado al inicio de la sentencia); cada refresco relee este margen
+MARGEN_MARCA_AGUA = timedelta(minutes=5)
+MAX_IDS_POR_CONSULTA = 1000
+
+
+class SnapshotJSON(NamedTuple):
+    """Respuesta de /proxy/ ya codificada: JSON, su versión gzip y el ETag (hash del JSON)."""
+    etag: str
+    cuerpo: bytes
+    cuerpo_gzip: bytes
+    total: int
+
 class AccidentesDB:
     def __init__(self, session):
         self.session = session
 
-    def get_accidentes(self):
+    def get_accidentes(self, desde: Optional[datetime] = None, ids: Optional[Collection[int]] = None):
+        """Todos los accidentes o, con `desde`/`ids`, solo los que tienen `updated >= desde` o esos ids."""
         try:
             # Importación local para evitar circularidad
-            from app.models.modelos import Accidente, Ubicacion, Via, Barrio
-            result = self.session.query(Accidente)\
-                .options(
-                    joinedload(Accidente.gravedad),
-                    joinedload(Accidente.condicion_victima),
-                    joinedload(Accidente.ubicacion)
-                        .joinedload(Ubicacion.barrio)
-                            .joinedload(Barrio.zona),
-                    joinedload(Accidente.ubicacion)
-                        .joinedload(Ubicacion.primer_via)
-                            .joinedload(Via.tipo_via),
-                    joinedload(Accidente.ubicacion)
-                        .joinedload(Ubicacion.segunda_via)
-                            .joinedload(Via.tipo_via)
-                )\
-                .all()
-            logger.debug("Consulta realizada correctamente: %s", result)
+            from app.models.modelos import Accidente
+            from app.models.cargas import CARGA_ACCIDENTE_READ
+            query = self.session.query(Accidente).options(*CARGA_ACCIDENTE_READ)
+            if desde is not None:
+                query = query.filter(Accidente.updated >= desde)
+            if ids is not None:
+                query = query.filter(Accidente.id.in_(ids))
+            result = query.all()
+            logger.debug("Consulta realizada correctamente: %s registros", len(result))
             return result
         except Exception as e:
             logger.exception("Error en get_accidentes:")
             raise e
 
+    def contar_accidentes(self) -> int:
+        from app.models.modelos import Accidente
+        from sqlalchemy import func
+        return self.session.query(func.count(Accidente.id)).scalar()
+
+    def get_ids(self) -> Set[int]:
+        from app.models.modelos import Accidente
+        return {fila.id for fila in self.session.query(Accidente.id)}
+
 class AccidentProxy:
-    def __init__(self):
+    """
+    Caché en memoria de todos los accidentes serializados como AccidenteRead.
+
+    La primera carga lee la tabla completa. A partir de ahí cada refresco es
+    incremental: trae solo las filas con `updated` >= la marca de agua guardada
+    menos `MARGEN_MARCA_AGUA` y compara el COUNT(*) con el tamaño del caché. Solo
+    si difieren se reconcilian los ids en ambos sentidos: se quitan los borrados
+    y se cargan las filas vivas que faltan (las que hicieron commit con un
+    `updated` anterior al margen). Así el caché se puede refrescar solo cada
+    `intervalo_refresco` segundos con un costo proporcional a los cambios.
+
+    Cada vez que el contenido cambia se codifica una sola vez a JSON (y gzip);
+    `obtener_snapshot` entrega esos bytes para servirlos sin volver a validar
+    ni serializar miles de objetos por petición.
+    """
+    def __init__(self, intervalo_refresco: float = 30.0):
         self._cache = None
+        self._snapshot: Optional[SnapshotJSON] = None
+        self._por_id: Dict[int, AccidenteRead] = {}
+        self._marca_agua: Optional[datetime] = None
+        self._ultima_sync = 0.0
+        self._intervalo_refresco = intervalo_refresco
+        self._lock = threading.Lock()
 
     def obtener_accidentes(self, refrescar: bool = False):
-        session = SessionLocal()
-        db = AccidentesDB(session)
-        try:
-            if refrescar or self._cache is None:
-                # Convertir las instancias ORM a su representación serializada (por ejemplo, dicionarios)
-                registros = db.get_accidentes()
-                # Usa el esquema configurado para ORM (asegúrate de tener `from_attributes=True`)
-                self._cache = [AccidenteRead.from_orm(reg) for reg in registros]
-            else:
-                logger.debug("Obteniendo datos desde el caché")
-        finally:
-            session.close()
-        return self._cache
\ No newline at end of file
+        with self._lock:
+            self._refrescar_si_corresponde(refrescar)
+            return self._cache
+
+    def obtener_snapshot(self, refrescar: bool = False) -> SnapshotJSON:
+        with self._lock:
+            self._refrescar_si_corresponde(refrescar)
+            return self._snapshot
+
+    def _refrescar_si_corresponde(self, refrescar: bool):
+        vencido = time.monotonic() - self._ultima_sync >= self._intervalo_refresco
+        if refrescar or vencido or self._cache is None:
+            session = SessionLocal()
+            db = AccidentesDB(session)
+            try:
+                if self._cache is None:
+                    self._cargar_todo(db)
+                else:
+                    self._sincronizar(db)
+                self._ultima_sync = time.monotonic()
+            finally:
+                session.close()
+        else:
+            logger.debug("Obteniendo datos desde el caché")
+
+    def _cargar_todo(self, db: AccidentesDB):
+        registros = db.get_accidentes()
+        # Usa el esquema configurado para ORM (asegúrate de tener `from_attributes=True`)
+        self._por_id = {reg.id: AccidenteRead.from_orm(reg) for reg in registros}
+        self._marca_agua = max((reg.updated for reg in registros), default=None)
+        self._reconstruir()
+
+    def _fusionar(self, registros) -> int:
+        """Agrega o reemplaza las filas que cambiaron y avanza la marca de agua; devuelve cuántas cambiaron."""
+        cambiadas = 0
+        for reg in registros:
+            nuevo = AccidenteRead.from_orm(reg)
+            if self._por_id.get(reg.id) != nuevo:
+                self._por_id[reg.id] = nuevo
+                cambiadas += 1
+            if self._marca_agua is None or reg.updated > self._marca_agua:
+                self._marca_agua = reg.updated
+        return cambiadas
+
+    def _sincronizar(self, db: AccidentesDB):
+        # Las filas que ya estaban y no cambiaron se vuelven a leer por el margen;
+        # fusionarlas otra vez no cambia nada.
+        desde = self._marca_agua - MARGEN_MARCA_AGUA if self._marca_agua is not None else None
+        cambiadas = self._fusionar(db.get_accidentes(desde=desde))
+
+        # Si el caché no tiene tantas filas como la tabla hubo borrados o altas que
+        # hicieron commit por detrás del margen: se reconcilian los ids
+        if db.contar_accidentes() != len(self._por_id):
+            vivos = db.get_ids()
+            borrados = self._por_id.keys() - vivos
+            for accidente_id in borrados:
+                del self._por_id[accidente_id]
+            faltantes = sorted(vivos - self._por_id.keys())
+            for i in range(0, len(faltantes), MAX_IDS_POR_CONSULTA):
+                cambiadas += self._fusionar(db.get_accidentes(ids=faltantes[i:i + MAX_IDS_POR_CONSULTA]))
+            cambiadas += len(borrados)
+            if faltantes:
+                logger.info("Proxy: %s accidentes llegaron por detrás de la marca de agua", len(faltantes))
+
+        if cambiadas:
+            logger.debug("Proxy sincronizado: %s filas nuevas, modificadas o borradas", cambiadas)
+            self._reconstruir()
+
+    def _reconstruir(self):
+        self._cache = [self._por_id[accidente_id] for accidente_id in sorted(self._por_id)]
+        cuerpo = _lista_accidentes.dump_json(self._cache)
+        self._snapshot = SnapshotJSON(
+            etag=f'"{hashlib.blake2b(cuerpo, digest_size=16).hexdigest()}"',
+            cuerpo=cuerpo,
+            cuerpo_gzip=gzip.compress(cuerpo, compresslevel=6),
+            total=len(self._cache),
+        )
@@ -1,14 +1,74 @@
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, func
 from sqlalchemy.orm import relationship, declarative_base
 
 
 Base = declarative_base()
 
 
+class Sensor(Base):
+    """Equipo de medición (ESP32 en la vía); el id es el SENSOR_ID configurado en el firmware."""
+    __tablename__ = 'sensor'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    nombre = Column(String(100), nullable=True)
+    latitud = Column(Float, nullable=True)
+    longitud = Column(Float, nullable=True)
+    creado = Column(DateTime, nullable=False, server_default=func.now())
+
+    lecturas = relationship("LecturaSensor", back_populates="sensor", lazy="noload")
+
+
 class LecturaSensor(Base):
     __tablename__ = 'lectura_sensor'  # specify your actual table name
+    __table_args__ = (
+        # Consultas por equipo y rango: no recorren el historial de los demás equipos
+        Index('ix_lectura_sensor_sensor_fecha', 'sensor_id', 'fecha_hora'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    sensor_id = Column(Integer, ForeignKey('sensor.id'), nullable=True)
     temperatura = Column(Float, nullable=False)
     humedad = Column(Float, nullable=False)
-    fecha_hora = Column(DateTime, nullable=False)
\ No newline at end of file
+    fecha_hora = Column(DateTime, nullable=False, index=True)  # Consultas por rango desde/hasta
+
+    sensor = relationship("Sensor", back_populates="lecturas")
+
+
+class ResumenLecturaSensor(Base):
+    """Mín/máx/suma por equipo y minuto, hora y día; se actualiza con cada lote que se inserta."""
+    __tablename__ = 'lectura_sensor_resumen'
+    __table_args__ = (
+        # La serie de toda la flota agrupa por periodo sin recorrer equipo por equipo
+        Index('ix_lectura_sensor_resumen_resolucion_periodo', 'resolucion', 'periodo'),
+    )
+
+    resolucion = Column(String(6), primary_key=True)  # minute | hour | day
+    sensor_id = Column(Integer, primary_key=True, autoincrement=False)
+    periodo = Column(DateTime, primary_key=True)  # Inicio del intervalo
+    lecturas = Column(Integer, nullable=False)
+    temperatura_min = Column(Float, nullable=False)
+    temperatura_max = Column(Float, nullable=False)
+    temperatura_suma = Column(Float, nullable=False)
+    humedad_min = Column(Float, nullable=False)
+    humedad_max = Column(Float, nullable=False)
+    humedad_suma = Column(Float, nullable=False)
+
+
+class AnomaliaSensor(Base):
+    """Lectura marcada por el detector en línea (ver `app/models/anomalias.py`)."""
+    __tablename__ = 'lectura_sensor_anomalia'
+    __table_args__ = (
+        Index('ix_lectura_sensor_anomalia_sensor_fecha', 'sensor_id', 'fecha_hora'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    sensor_id = Column(Integer, ForeignKey('sensor.id'), nullable=False)
+    fecha_hora = Column(DateTime, nullable=False, index=True)  # De la lectura, no de la detección
+    variable = Column(String(20), nullable=False)  # temperatura | humedad
+    regla = Column(String(10), nullable=False)  # tasa | zscore
+    valor = Column(Float, nullable=False)
+    anterior = Column(Float, nullable=False)  # Lectura previa del mismo equipo
+    esperado = Column(Float, nullable=False)  # Media exponencial antes de esta lectura
+    puntaje = Column(Float, nullable=False)  # z-score
+    tasa = Column(Float, nullable=True)  # Unidades por segundo
+    detectado = Column(DateTime, nullable=False, server_default=func.now())
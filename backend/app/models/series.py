@@ -0,0 +1,123 @@
+# Fastapi_React/Backend/app/models/series.py
+"""
+Series de tiempo de accidentes y víctimas calculadas con NumPy.
+
+Se parte de los conteos diarios (una fila por día con datos), se expanden a un
+calendario continuo y se agregan al periodo pedido con `np.add.at`; las medias
+móviles salen de sumas acumuladas y la variación interanual de desplazar el
+arreglo. Nada recorre filas en Python salvo la serialización final.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+FRECUENCIAS = ("day", "week", "month")
+
+# Ventana de la media móvil por defecto, en periodos
+VENTANA_POR_DEFECTO = {"day": 7, "week": 4, "month": 3}
+# Periodos entre un punto y el mismo punto del año anterior
+# (364 días y 52 semanas para comparar el mismo día de la semana)
+DESFASE_ANUAL = {"day": 364, "week": 52, "month": 12}
+
+
+def _inicio_periodo(dias: np.ndarray, freq: str) -> np.ndarray:
+    """Fecha (datetime64[D]) en que empieza el periodo de cada día."""
+    if freq == "day":
+        return dias
+    if freq == "week":
+        # 1970-01-01 fue jueves: (n + 3) % 7 es el día de la semana con lunes = 0
+        return dias - ((dias.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+    return dias.astype("datetime64[M]").astype("datetime64[D]")
+
+
+def _estacion(periodos: np.ndarray, freq: str) -> np.ndarray:
+    """Posición estacional del periodo: día de la semana, semana del año o mes del año."""
+    if freq == "day":
+        return (periodos.astype(np.int64) + 3) % 7
+    if freq == "week":
+        dia_del_anio = (periodos - periodos.astype("datetime64[Y]").astype("datetime64[D]")).astype(np.int64)
+        return np.minimum(dia_del_anio // 7, 51)
+    return periodos.astype("datetime64[M]").astype(np.int64) % 12
+
+
+def agregar_por_periodo(fechas: np.ndarray, valores: Dict[str, np.ndarray], freq: str):
+    """
+    `fechas` son los días con datos (datetime64[D], sin repetir) y `valores` sus
+    conteos. Devuelve (periodos, {nombre: suma por periodo}) sobre un calendario
+    continuo, con ceros en los periodos sin accidentes.
+    """
+    if len(fechas) == 0:
+        return np.empty(0, dtype="datetime64[D]"), {nombre: np.zeros(0) for nombre in valores}
+    if freq == "day":
+        paso = np.timedelta64(1, "D")
+        periodos = np.arange(fechas.min(), fechas.max() + paso, paso)
+    elif freq == "week":
+        paso = np.timedelta64(7, "D")
+        inicio = _inicio_periodo(fechas, freq)
+        periodos = np.arange(inicio.min(), inicio.max() + paso, paso)
+    else:
+        meses = fechas.astype("datetime64[M]")
+        periodos = np.arange(meses.min(), meses.max() + np.timedelta64(1, "M")).astype("datetime64[D]")
+
+    posicion = np.searchsorted(periodos, _inicio_periodo(fechas, freq))
+    sumas = {}
+    for nombre, columna in valores.items():
+        suma = np.zeros(len(periodos), dtype=np.float64)
+        np.add.at(suma, posicion, columna)
+        sumas[nombre] = suma
+    return periodos, sumas
+
+
+def media_movil(valores: np.ndarray, ventana: int) -> np.ndarray:
+    """Media de los últimos `ventana` periodos (incluido el actual); NaN mientras no hay suficientes."""
+    resultado = np.full(len(valores), np.nan)
+    if ventana <= len(valores):
+        acumulada = np.concatenate(([0.0], np.cumsum(valores)))
+        resultado[ventana - 1:] = (acumulada[ventana:] - acumulada[:-ventana]) / ventana
+    return resultado
+
+
+def anio_anterior(valores: np.ndarray, desfase: int) -> np.ndarray:
+    """Valor del mismo periodo un año antes; NaN si la serie no llega tan atrás."""
+    resultado = np.full(len(valores), np.nan)
+    if desfase < len(valores):
+        resultado[desfase:] = valores[:-desfase]
+    return resultado
+
+
+def linea_base_estacional(valores: np.ndarray, estacion: np.ndarray) -> np.ndarray:
+    """Promedio histórico de la misma posición estacional, asignado a cada periodo."""
+    if len(valores) == 0:
+        return np.zeros(0)
+    suma = np.bincount(estacion, weights=valores)
+    cantidad = np.bincount(estacion)
+    return (suma / np.maximum(cantidad, 1))[estacion]
+
+
+def _a_lista(valores: np.ndarray, decimales: int = 2) -> List[Optional[float]]:
+    redondeados = np.round(valores, decimales)
+    return [None if np.isnan(v) else v for v in redondeados.tolist()]
+
+
+def _etiqueta(periodos: np.ndarray, freq: str) -> List[str]:
+    if freq == "month":
+        return [str(p) for p in periodos.astype("datetime64[M]")]
+    return [str(p) for p in periodos]
+
+
+def construir_serie(fechas: np.ndarray, accidentes: np.ndarray, victimas: np.ndarray, freq: str, ventana: int) -> dict:
+    periodos, sumas = agregar_por_periodo(fechas, {"accidentes": accidentes, "victimas": victimas}, freq)
+    estacion = _estacion(periodos, freq)
+    desfase = DESFASE_ANUAL[freq]
+    serie = {"periodo": _etiqueta(periodos, freq)}
+    for nombre, valores in sumas.items():
+        previo = anio_anterior(valores, desfase)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            porcentaje = np.where(previo > 0, (valores - previo) / previo * 100, np.nan)
+        serie[nombre] = valores.astype(np.int64).tolist()
+        serie[f"{nombre}_media_movil"] = _a_lista(media_movil(valores, ventana))
+        serie[f"{nombre}_anio_anterior"] = _a_lista(previo)
+        serie[f"{nombre}_variacion_anual"] = _a_lista(valores - previo)
+        serie[f"{nombre}_variacion_anual_pct"] = _a_lista(porcentaje)
+        serie[f"{nombre}_linea_base"] = _a_lista(linea_base_estacional(valores, estacion))
+    return {"freq": freq, "ventana": ventana, "serie": serie}
@@ -0,0 +1,74 @@
+# Fastapi_React/Backend/app/models/trama_sensor.py
+"""
+Formato binario compacto para subir lotes de lecturas desde el ESP32.
+
+Todo en little-endian (el orden nativo del ESP32, así el firmware copia sus
+structs tal cual):
+
+    encabezado (10 bytes): "LS" | versión u8 | reservado u8 | epoch_base u32 | cantidad u16
+    lectura    (8 bytes):  sensor_id u16 | desfase_seg u16 | temperatura i16 | humedad i16
+
+`epoch_base` son segundos Unix UTC y cada lectura guarda su desfase respecto a
+él (hasta ~18 h por trama). Temperatura y humedad van en centésimas. Una
+lectura ocupa 8 bytes frente a los ~90 del JSON, y la trama entera se decodifica
+con un solo `np.frombuffer`.
+"""
+import struct
+from typing import Tuple
+
+import numpy as np
+
+MAGIA = b"LS"
+VERSION = 1
+ESCALA = 100  # Centésimas de grado / de punto de humedad
+MEDIA_TYPE = "application/vnd.pryaccidentes.lecturas"
+
+ENCABEZADO = struct.Struct("<2sBBIH")
+LECTURA = np.dtype([
+    ("sensor_id", "<u2"),
+    ("desfase", "<u2"),
+    ("temperatura", "<i2"),
+    ("humedad", "<i2"),
+])
+
+
+def decodificar(trama: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (sensor_id, fecha_hora como datetime64[s] UTC, temperatura, humedad).
+    Lanza ValueError si la trama está mal formada.
+    """
+    if len(trama) < ENCABEZADO.size:
+        raise ValueError("Trama demasiado corta")
+    magia, version, _, epoch_base, cantidad = ENCABEZADO.unpack_from(trama)
+    if magia != MAGIA:
+        raise ValueError("La trama no empieza con 'LS'")
+    if version != VERSION:
+        raise ValueError(f"Versión de trama no soportada: {version}")
+    esperado = ENCABEZADO.size + cantidad * LECTURA.itemsize
+    if len(trama) != esperado:
+        raise ValueError(f"La trama declara {cantidad} lecturas ({esperado} bytes) pero tiene {len(trama)} bytes")
+    lecturas = np.frombuffer(trama, dtype=LECTURA, count=cantidad, offset=ENCABEZADO.size)
+    if cantidad and not lecturas["sensor_id"].all():
+        raise ValueError("sensor_id 0 no es válido (los equipos se numeran desde 1)")
+    fecha_hora = (np.int64(epoch_base) + lecturas["desfase"].astype(np.int64)).astype("datetime64[s]")
+    return (
+        lecturas["sensor_id"].astype(np.int64),
+        fecha_hora,
+        lecturas["temperatura"] / ESCALA,
+        lecturas["humedad"] / ESCALA,
+    )
+
+
+def codificar(sensor_id, epoch: np.ndarray, temperatura, humedad) -> bytes:
+    """Inverso de `decodificar` (para simuladores y pruebas); `epoch` en segundos Unix."""
+    epoch = np.asarray(epoch, dtype=np.int64)
+    base = int(epoch.min()) if len(epoch) else 0
+    desfase = epoch - base
+    if len(desfase) and desfase.max() > np.iinfo(np.uint16).max:
+        raise ValueError("Las lecturas de una trama deben caber en ~18 h desde la primera")
+    lecturas = np.empty(len(epoch), dtype=LECTURA)
+    lecturas["sensor_id"] = sensor_id
+    lecturas["desfase"] = desfase
+    lecturas["temperatura"] = np.round(np.asarray(temperatura) * ESCALA)
+    lecturas["humedad"] = np.round(np.asarray(humedad) * ESCALA)
+    return ENCABEZADO.pack(MAGIA, VERSION, 0, base, len(lecturas)) + lecturas.tobytes()
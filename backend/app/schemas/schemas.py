@@ -1,5 +1,5 @@
 # Fastapi_React/Backend/app/schemas/schemas.py
-from pydantic import BaseModel, EmailStr # Importar EmailStr para validación de email
+from pydantic import BaseModel, EmailStr, Field # Importar EmailStr para validación de email
 from typing import Optional
 from datetime import date, datetime
 
@@ -161,12 +161,47 @@ class AccidenteRead(AccidenteBase):
     class Config:
         from_attributes = True
 
+# ----------- HOTSPOTS ------------ #
+
+class HotspotRead(BaseModel):
+    rango: int
+    accidentes: int
+    peso: float
+    celdas: int
+    latitud: float
+    longitud: float
+    min_lat: float
+    min_lng: float
+    max_lat: float
+    max_lng: float
+    calculado: datetime
+
+    class Config:
+        from_attributes = True
+
 # ----------- SENSOR ------------ #
 
+class SensorUpdate(BaseModel):
+    nombre: Optional[str] = None
+    latitud: Optional[float] = None
+    longitud: Optional[float] = None
+
+class SensorRead(SensorUpdate):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+SENSOR_ID_MAXIMO = 65535  # sensor_id viaja como u16 en la trama binaria
+
 class LecturaSensorCreate(BaseModel):
     temperatura: float
     humedad: float
     fecha_hora: datetime
+    sensor_id: int = Field(1, ge=1, le=SENSOR_ID_MAXIMO)  # El firmware JSON original no lo envía
+
+class LecturaSensorAceptada(BaseModel):
+    pendientes: int  # Lecturas aceptadas que aún no se insertaron en la BD
 
 class LecturaSensorOut(LecturaSensorCreate):
     id: int
@@ -1,9 +1,90 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from app.api.routers import auth, accidente
+from app.crud import accidente as crud_accidente
+from app.crud import sensor as crud_sensor
+from app.database import AsyncSessionLocal, SessionLocal, async_engine, engine, metricas_pool
+from app.core.config import settings
 from fastapi.middleware.cors import CORSMiddleware
 
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+def _correr_hotspots():
+    db = SessionLocal()
+    try:
+        resultado = crud_accidente.actualizar_hotspots(db)
+        if resultado["hotspots"] is not None:
+            logger.info("Hotspots actualizados: %s", resultado)
+    finally:
+        db.close()
+
+
+async def job_hotspots(intervalo: int):
+    # Job periódico en segundo plano; corre en el threadpool para no bloquear el event loop
+    while True:
+        try:
+            await run_in_threadpool(_correr_hotspots)
+        except Exception:
+            logger.exception("Falló el job de hotspots")
+        await asyncio.sleep(intervalo)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Precarga del almacén columnar del mapa; si la BD no responde, se carga en la primera petición
+    db = SessionLocal()
+    try:
+        crud_accidente.almacen.cargar(db)
+    except Exception:
+        logger.exception("No se pudo precargar el almacén de accidentes")
+    try:
+        # Crea y llena el rollup diario la primera vez que arranca con esta versión
+        crud_accidente.asegurar_resumen(db)
+    except Exception:
+        db.rollback()
+        logger.exception("No se pudo preparar el resumen diario de accidentes")
+    try:
+        # El filtro `updated >= marca_agua` del proxy necesita su índice en tablas ya existentes
+        creados = crud_accidente.asegurar_indices_accidente(db)
+        if creados:
+            logger.info("Índices de accidentes creados: %s", ", ".join(creados))
+    except Exception:
+        logger.exception("No se pudieron crear los índices de accidentes")
+    try:
+        crud_accidente.asegurar_tablas_hotspots(db)
+    except Exception:
+        logger.exception("No se pudieron crear las tablas de hotspots")
+    try:
+        crud_sensor.asegurar_tablas_sensor(db)
+    except Exception:
+        db.rollback()
+        logger.exception("No se pudo preparar el resumen de lecturas de sensor")
+    finally:
+        db.close()
+
+    tarea_hotspots = None
+    if settings.HOTSPOTS_INTERVALO_SEG > 0:
+        tarea_hotspots = asyncio.create_task(job_hotspots(settings.HOTSPOTS_INTERVALO_SEG))
+    # Recupera lo que haya quedado en el spill y arranca el volcado por lotes de lecturas
+    await crud_sensor.buffer_lecturas.iniciar(async_engine)
+    try:
+        # Buffer circular y replay del stream: una sola lectura de la BD al arrancar
+        async with AsyncSessionLocal() as adb:
+            await crud_sensor.precargar_memoria(adb)
+    except Exception:
+        logger.exception("No se pudieron precargar las lecturas recientes de sensores")
+    yield
+    if tarea_hotspots is not None:
+        tarea_hotspots.cancel()
+    await crud_sensor.buffer_lecturas.detener(async_engine)
+    await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",  # React
@@ -24,6 +105,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -33,4 +115,9 @@ app.include_router(accidente.router)
 
 @app.get("/")
 def read_root():
-    return {"message": "API funcionando correctamente"}
\ No newline at end of file
+    return {"message": "API funcionando correctamente"}
+
+@app.get("/api/db/pool")
+def estado_pool():
+    """Conexiones en uso, overflow, esperas por conexión y edad de las conexiones de cada motor."""
+    return {"sync": metricas_pool(engine), "async": metricas_pool(async_engine)}
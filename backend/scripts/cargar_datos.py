@@ -0,0 +1,259 @@
+# Fastapi_React/Backend/scripts/cargar_datos.py
+"""
+Carga rápida del volcado `accidentes_barrq.sql` (o de un CSV) en cualquier URL de
+SQLAlchemy, incluida SQLite, sin pasar por un servidor MySQL.
+
+El archivo se lee línea a línea: cada tupla de un `REPLACE INTO` / `INSERT INTO`
+se convierte al tipo de su columna y se acumula hasta completar un lote, que se
+envía como un único executemany. Durante la carga se desactivan las
+verificaciones de claves foráneas (y en SQLite el fsync por transacción); al
+final se informa la cantidad de filas por segundo.
+
+Uso (desde la carpeta Backend):
+    python scripts/cargar_datos.py ../accidentes_barrq.sql --url sqlite:///accidentes.db
+    python scripts/cargar_datos.py lecturas.csv --tabla lectura_sensor
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from sqlalchemy import MetaData, Table, create_engine, insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import modelos, sensor
+from app.crud import accidente as crud_accidente
+from app.crud import sensor as crud_sensor
+
+_ENCABEZADO = re.compile(r"^(?:REPLACE|INSERT)(?:\s+IGNORE)?\s+INTO\s+`?(\w+)`?\s*\(([^)]*)\)\s*VALUES\s*(.*)$", re.I)
+_VALOR = re.compile(r"\s*('(?:[^'\\]|\\.|'')*'|NULL|[-+0-9.eE]+)\s*(,|\))", re.I)
+_ESCAPES = {"0": "\0", "n": "\n", "r": "\r", "t": "\t", "Z": "\x1a", "b": "\b"}
+
+Fila = Tuple[Optional[str], ...]
+
+
+def _texto(literal: str) -> str:
+    cuerpo = literal[1:-1].replace("''", "'")
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), cuerpo)
+
+
+def _parsear_tuplas(texto: str) -> Iterator[Fila]:
+    """Tuplas `(v1, v2, ...)` de una línea del volcado; los valores quedan como texto o None."""
+    posicion = 0
+    while True:
+        inicio = texto.find("(", posicion)
+        if inicio < 0:
+            return
+        posicion = inicio + 1
+        valores: List[Optional[str]] = []
+        while True:
+            coincidencia = _VALOR.match(texto, posicion)
+            if coincidencia is None:
+                raise ValueError(f"No se pudo leer la tupla: {texto[inicio:inicio + 80]!r}")
+            literal, separador = coincidencia.groups()
+            if literal.upper() == "NULL":
+                valores.append(None)
+            elif literal.startswith("'"):
+                valores.append(_texto(literal))
+            else:
+                valores.append(literal)
+            posicion = coincidencia.end()
+            if separador == ")":
+                break
+        yield tuple(valores)
+
+
+def leer_volcado(ruta: str) -> Iterator[Tuple[str, List[str], Fila]]:
+    """(tabla, columnas, fila) por cada tupla de las sentencias INSERT/REPLACE del volcado."""
+    tabla, columnas = None, []
+    with open(ruta, encoding="utf-8") as archivo:
+        for linea in archivo:
+            linea = linea.strip()
+            encabezado = _ENCABEZADO.match(linea)
+            if encabezado:
+                tabla = encabezado.group(1)
+                columnas = [c.strip(" `") for c in encabezado.group(2).split(",")]
+                linea = encabezado.group(3)
+            elif tabla is None or not linea.startswith("("):
+                continue
+            for fila in _parsear_tuplas(linea):
+                yield tabla, columnas, fila
+            if linea.endswith(";"):
+                tabla = None
+
+
+def leer_csv(ruta: str, tabla: str) -> Iterator[Tuple[str, List[str], Fila]]:
+    """CSV con encabezado; las celdas vacías se cargan como NULL."""
+    with open(ruta, encoding="utf-8", newline="") as archivo:
+        lector = csv.reader(archivo)
+        columnas = next(lector)
+        for fila in lector:
+            yield tabla, columnas, tuple(valor if valor != "" else None for valor in fila)
+
+
+def _conversor(columna):
+    try:
+        tipo = columna.type.python_type
+    except NotImplementedError:
+        return lambda valor: valor
+    if tipo is datetime:
+        return datetime.fromisoformat
+    if tipo is date:
+        return lambda valor: date.fromisoformat(valor[:10])
+    if tipo is bool:
+        return lambda valor: valor not in ("0", "false", "False")
+    if tipo in (int, float):
+        return tipo
+    return str
+
+
+@contextmanager
+def restricciones_diferidas(conexion: Connection):
+    dialecto = conexion.dialect.name
+    if dialecto == "sqlite":
+        conexion.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        conexion.exec_driver_sql("PRAGMA synchronous=OFF")
+    elif dialecto == "mysql":
+        conexion.exec_driver_sql("SET FOREIGN_KEY_CHECKS=0, UNIQUE_CHECKS=0")
+    elif dialecto == "postgresql":
+        conexion.exec_driver_sql("SET session_replication_role = replica")
+    try:
+        yield
+    finally:
+        # Cada lote ya hizo commit; si uno falló, se descarta antes de restaurar
+        conexion.rollback()
+        if dialecto == "sqlite":
+            conexion.exec_driver_sql("PRAGMA synchronous=FULL")
+        elif dialecto == "mysql":
+            conexion.exec_driver_sql("SET FOREIGN_KEY_CHECKS=1, UNIQUE_CHECKS=1")
+        elif dialecto == "postgresql":
+            conexion.exec_driver_sql("SET session_replication_role = DEFAULT")
+
+
+def _sentencia(tabla: Table, dialecto: str, reemplazar: bool):
+    """INSERT simple, o con semántica de REPLACE (upsert por PK) según el dialecto."""
+    if not reemplazar:
+        return insert(tabla)
+    if dialecto == "sqlite":
+        return insert(tabla).prefix_with("OR REPLACE")
+    if dialecto == "mysql":
+        from sqlalchemy.dialects.mysql import insert as insert_mysql
+        sentencia = insert_mysql(tabla)
+        return sentencia.on_duplicate_key_update({c.name: sentencia.inserted[c.name] for c in tabla.columns if not c.primary_key})
+    if dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as insert_pg
+        sentencia = insert_pg(tabla)
+        return sentencia.on_conflict_do_update(
+            index_elements=list(tabla.primary_key.columns),
+            set_={c.name: sentencia.excluded[c.name] for c in tabla.columns if not c.primary_key},
+        )
+    raise NotImplementedError(f"--reemplazar no está soportado para {dialecto}")
+
+
+class Cargador:
+    def __init__(self, engine: Engine, tamano_lote: int = 5000, reemplazar: bool = True):
+        self.engine = engine
+        self.tamano_lote = tamano_lote
+        self.reemplazar = reemplazar
+        self.metadata = MetaData()
+        self.metadata.reflect(bind=engine)
+        self.filas_por_tabla: Dict[str, int] = {}
+        self.omitidas: Dict[str, str] = {}
+
+    def _preparar(self, nombre_tabla: str, columnas: Sequence[str]):
+        tabla = self.metadata.tables.get(nombre_tabla)
+        if tabla is None:
+            self.omitidas[nombre_tabla] = "la tabla no existe en el destino"
+            return None
+        faltantes = [c for c in columnas if c not in tabla.c]
+        if faltantes:
+            self.omitidas[nombre_tabla] = f"columnas ignoradas: {', '.join(faltantes)}"
+        indices = [i for i, c in enumerate(columnas) if c in tabla.c]
+        conversores = [(columnas[i], i, _conversor(tabla.c[columnas[i]])) for i in indices]
+        return tabla, conversores
+
+    def cargar(self, registros: Iterator[Tuple[str, List[str], Fila]]) -> int:
+        total = 0
+        with self.engine.connect() as conexion, restricciones_diferidas(conexion):
+            actual, preparado, lote = None, None, []
+
+            def enviar():
+                if preparado and lote:
+                    tabla = preparado[0]
+                    conexion.execute(_sentencia(tabla, conexion.dialect.name, self.reemplazar), lote)
+                    conexion.commit()
+                    self.filas_por_tabla[tabla.name] = self.filas_por_tabla.get(tabla.name, 0) + len(lote)
+                lote.clear()
+
+            for nombre_tabla, columnas, fila in registros:
+                if (nombre_tabla, columnas) != actual:
+                    enviar()
+                    actual = (nombre_tabla, columnas)
+                    preparado = self._preparar(nombre_tabla, columnas)
+                if preparado is None:
+                    continue
+                lote.append({
+                    nombre: (convertir(fila[i]) if fila[i] is not None else None)
+                    for nombre, i, convertir in preparado[1]
+                })
+                total += 1
+                if len(lote) >= self.tamano_lote:
+                    enviar()
+            enviar()
+        return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga el volcado SQL o un CSV en una base de datos")
+    parser.add_argument("fuente", help="Archivo .sql (volcado con INSERT/REPLACE) o .csv")
+    parser.add_argument("--url", default=settings.DATABASE_URL, help="URL de SQLAlchemy de destino")
+    parser.add_argument("--tabla", help="Tabla destino (obligatoria para CSV)")
+    parser.add_argument("--lote", type=int, default=5000, help="Filas por executemany")
+    parser.add_argument("--sin-esquema", action="store_true", help="No crear las tablas de los modelos si faltan")
+    parser.add_argument("--solo-insertar", action="store_true", help="INSERT simple en vez de REPLACE (BD vacía)")
+    args = parser.parse_args()
+
+    es_csv = args.fuente.lower().endswith(".csv")
+    if es_csv and not args.tabla:
+        parser.error("--tabla es obligatoria para archivos CSV")
+
+    engine = create_engine(args.url)
+    if not args.sin_esquema:
+        modelos.Base.metadata.create_all(engine)
+        sensor.Base.metadata.create_all(engine)
+
+    cargador = Cargador(engine, tamano_lote=args.lote, reemplazar=not args.solo_insertar)
+    registros = leer_csv(args.fuente, args.tabla) if es_csv else leer_volcado(args.fuente)
+    inicio = time.perf_counter()
+    total = cargador.cargar(registros)
+    segundos = time.perf_counter() - inicio
+
+    for tabla, filas in sorted(cargador.filas_por_tabla.items()):
+        print(f"  {tabla}: {filas} filas")
+    for tabla, motivo in sorted(cargador.omitidas.items()):
+        print(f"  {tabla}: {motivo}")
+    print(f"{total} filas en {segundos:.2f} s ({total / segundos if segundos else 0:.0f} filas/s)")
+
+    tabla_resumen = modelos.ResumenAccidenteDiario.__tablename__
+    if modelos.Accidente.__tablename__ in cargador.filas_por_tabla and tabla_resumen in cargador.metadata.tables:
+        # El rollup diario se mantiene en cada alta; una carga directa lo deja desactualizado
+        with Session(engine) as db:
+            print(f"Resumen diario reconstruido: {crud_accidente.reconstruir_resumen(db)} filas")
+    if sensor.LecturaSensor.__tablename__ in cargador.filas_por_tabla and \
+            sensor.ResumenLecturaSensor.__tablename__ in cargador.metadata.tables:
+        with Session(engine) as db:
+            print(f"Resumen de sensor reconstruido: {crud_sensor.reconstruir_resumen_sensor(db)} filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# Fastapi_React/Backend/scripts/hotspots.py
+"""
+Corre una vez el job de hotspots fuera de la API (p. ej. desde cron). Solo se
+reescriben las celdas de la grilla que cambiaron desde la corrida anterior.
+Es una corrida completa: si la API también corre el job, conviene desactivarlo
+ahí (HOTSPOTS_INTERVALO_SEG=0).
+
+Uso (desde la carpeta Backend):
+    python scripts/hotspots.py [--forzar]
+"""
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from app.database import SessionLocal
+from app.crud import accidente as crud_accidente
+
+
+def main():
+    db = SessionLocal()
+    try:
+        crud_accidente.asegurar_tablas_hotspots(db)
+        resultado = crud_accidente.actualizar_hotspots(db, forzar="--forzar" in sys.argv)
+        print(f"Celdas actualizadas: {resultado['celdas_actualizadas']}, "
+              f"hotspots: {resultado['hotspots']}, en {resultado['segundos']} s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
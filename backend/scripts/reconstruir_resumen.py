@@ -0,0 +1,34 @@
+# Fastapi_React/Backend/scripts/reconstruir_resumen.py
+"""
+Recalcula desde cero la tabla `accidente_resumen_diario` (rollup por día, barrio,
+tipo y gravedad). La API la mantiene al día en cada alta o baja; este script
+sirve para el llenado inicial o si se cargaron accidentes directo en la BD.
+
+Uso (desde la carpeta Backend):
+    python scripts/reconstruir_resumen.py
+"""
+import os
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from app.database import SessionLocal
+from app.crud import accidente as crud_accidente
+from app.models import modelos
+
+
+def main():
+    db = SessionLocal()
+    try:
+        modelos.ResumenAccidenteDiario.__table__.create(db.get_bind(), checkfirst=True)
+        inicio = time.perf_counter()
+        filas = crud_accidente.reconstruir_resumen(db)
+        print(f"Resumen reconstruido: {filas} filas en {time.perf_counter() - inicio:.2f} s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
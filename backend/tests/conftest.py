@@ -0,0 +1,74 @@
+# Fastapi_React/Backend/tests/conftest.py
+"""
+Los tests corren contra una SQLite temporal cargada con el volcado
+`accidentes_barrq.sql`. La URL se fija en el entorno antes de importar `app`,
+porque los motores se crean al importar `app.database`.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[1]
+VOLCADO = BACKEND.parent / "accidentes_barrq.sql"
+_TEMPORAL = tempfile.mkdtemp(prefix="pryaccidentes-tests-")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{_TEMPORAL}/accidentes.db"
+os.environ["DB_ECHO"] = "false"
+os.environ["TILES_CACHE_DIR"] = f"{_TEMPORAL}/tiles"
+os.environ["HOTSPOTS_INTERVALO_SEG"] = "0"
+os.environ["SENSOR_SPILL"] = ""
+sys.path[:0] = [str(BACKEND), str(BACKEND / "scripts")]
+
+
+def _cargar_volcado():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from app.crud import accidente as crud_accidente
+    from app.models import modelos, sensor
+    from cargar_datos import Cargador, leer_volcado
+
+    motor = create_engine(os.environ["DATABASE_URL"])
+    modelos.Base.metadata.create_all(motor)
+    sensor.Base.metadata.create_all(motor)
+    Cargador(motor).cargar(leer_volcado(str(VOLCADO)))
+    # Igual que `cargar_datos.py`: la carga directa no pasa por el rollup diario
+    with Session(motor) as db:
+        crud_accidente.reconstruir_resumen(db)
+    motor.dispose()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient con el lifespan corriendo (migraciones, almacén y buffer de sensor)."""
+    _cargar_volcado()
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as cliente:
+        yield cliente
+
+
+@pytest.fixture
+def db(client):
+    from app.database import SessionLocal
+
+    sesion = SessionLocal()
+    try:
+        yield sesion
+    finally:
+        sesion.close()
+
+
+@pytest.fixture
+def autorizacion(db):
+    """Header Authorization con un token válido para el primer usuario del volcado."""
+    from app.crud.auth import crear_token
+    from app.models import modelos
+
+    usuario = db.query(modelos.Usuario).order_by(modelos.Usuario.id).first()
+    return {"Authorization": f"Bearer {crear_token({'sub': usuario.username})}"}
@@ -0,0 +1,36 @@
+# Fastapi_React/Backend/tests/test_accidentes.py
+from datetime import date
+
+import pytest
+
+from app.crud import accidente as crud_accidente
+from app.models import modelos
+
+
+def test_cursor_ida_y_vuelta():
+    accidente = modelos.Accidente(id=1234, fecha=date(2024, 2, 29))
+    cursor = crud_accidente.codificar_cursor(accidente)
+    assert crud_accidente.decodificar_cursor(cursor) == (date(2024, 2, 29), 1234)
+
+
+@pytest.mark.parametrize("cursor", ["2024-02-30_1", "2024-01-01_x", "basura"])
+def test_cursor_invalido_responde_400(client, cursor):
+    with pytest.raises(ValueError):
+        crud_accidente.decodificar_cursor(cursor)
+    assert client.get("/accidentes/", params={"limit": 10, "after": cursor}).status_code == 400
+
+
+def test_paginas_por_cursor_coinciden_con_el_listado(client):
+    completo = [a["id"] for a in client.get("/accidentes/?limit=150").json()]
+    paginado, after = [], None
+    while len(paginado) < len(completo):
+        params = {"limit": 50} if after is None else {"limit": 50, "after": after}
+        respuesta = client.get("/accidentes/", params=params)
+        paginado += [a["id"] for a in respuesta.json()]
+        after = respuesta.headers["X-Next-Cursor"]
+    assert paginado == completo
+
+
+def test_iterar_accidentes_recorre_todo_sin_repetir(db):
+    ids = [a.id for lote in crud_accidente.iterar_accidentes(db, tamano_lote=997) for a in lote]
+    assert len(ids) == len(set(ids)) == db.query(modelos.Accidente).count()
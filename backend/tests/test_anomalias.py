@@ -0,0 +1,22 @@
+# Fastapi_React/Backend/tests/test_anomalias.py
+from datetime import datetime
+
+from app.models import anomalias
+from cargar_datos import leer_volcado
+from conftest import VOLCADO
+
+
+def test_volcado_solo_marca_el_salto_real():
+    filas = [dict(zip(columnas, fila)) for tabla, columnas, fila in leer_volcado(str(VOLCADO))
+             if tabla == "lectura_sensor"]
+    assert len(filas) == 12
+    detector = anomalias.DetectorAnomalias()
+    marcadas = {}
+    for fila in sorted(filas, key=lambda f: int(f["id"])):
+        detectadas = detector.evaluar(1, datetime.fromisoformat(fila["fecha_hora"]), {
+            "temperatura": float(fila["temperatura"]), "humedad": float(fila["humedad"]),
+        })
+        if detectadas:
+            marcadas[int(fila["id"])] = {(a["variable"], a["regla"]) for a in detectadas}
+    # La fila 9 (humedad 71.6 -> 75) es ruido del DHT22; la 11 sube 3 °C y 20 % en 6 s
+    assert marcadas == {11: {("temperatura", "tasa"), ("humedad", "tasa")}}
@@ -0,0 +1,81 @@
+# Fastapi_React/Backend/tests/test_bulk.py
+import json
+
+import pytest
+
+from app.api.routers import accidente as router_accidente
+from app.crud import accidente as crud_accidente
+from app.models import modelos
+
+
+@pytest.fixture
+def registro(db):
+    """Un accidente válido para la API, con las FK de uno del volcado."""
+    modelo = db.query(modelos.Accidente).first()
+    return {
+        "fecha": modelo.fecha.isoformat(), "cantidad_victima": 2,
+        "condicion_victima_id": modelo.condicion_victima_id, "gravedad_victima_id": modelo.gravedad_victima_id,
+        "tipo_accidente_id": modelo.tipo_accidente_id, "ubicacion_id": modelo.ubicacion_id,
+    }
+
+
+@pytest.fixture
+def creados(db):
+    """Ids que el test da de alta; se borran por el CRUD para dejar rollups y cachés como estaban."""
+    ids = []
+    yield ids
+    for accidente_id in ids:
+        crud_accidente.eliminar_accidente(db, accidente_id)
+
+
+def test_bulk_reporta_errores_por_registro(client, autorizacion, registro, creados):
+    cuerpo = "\n".join(json.dumps(r) for r in [
+        registro,
+        {**registro, "fecha": "no-es-fecha"},
+        {**registro, "tipo_accidente_id": 999_999},
+        {**registro, "cantidad_victima": 5},
+    ])
+    respuesta = client.post("/accidentes/bulk", content=cuerpo,
+                            headers={**autorizacion, "Content-Type": "application/x-ndjson"})
+    assert respuesta.status_code == 200
+    datos = respuesta.json()
+    creados.extend(r["id"] for r in datos["resultados"] if "id" in r)
+    assert (datos["insertados"], datos["errores"]) == (2, 2)
+    assert [r["indice"] for r in datos["resultados"]] == [0, 1, 2, 3]
+    assert "fecha" in datos["resultados"][1]["error"]
+    assert "tipo_accidente_id" in datos["resultados"][2]["error"]
+
+
+def test_bulk_sin_token_responde_401(client, registro):
+    assert client.post("/accidentes/bulk", json=[registro]).status_code == 401
+
+
+def test_bulk_limita_bytes_y_registros(client, autorizacion, registro, monkeypatch):
+    monkeypatch.setattr(router_accidente, "MAX_BYTES_BULK", 1024)
+    grande = json.dumps([registro] * 20)
+    assert len(grande) > 1024
+    assert client.post("/accidentes/bulk", content=grande, headers=autorizacion).status_code == 413
+    # Sin Content-Length (chunked) también corta al pasar el límite
+    partes = (grande[i:i + 256].encode() for i in range(0, len(grande), 256))
+    assert client.post("/accidentes/bulk", content=partes, headers=autorizacion).status_code == 413
+
+    monkeypatch.setattr(router_accidente, "MAX_BYTES_BULK", 1024 * 1024)
+    monkeypatch.setattr(router_accidente, "MAX_ACCIDENTES_BULK", 3)
+    respuesta = client.post("/accidentes/bulk", json=[registro] * 4, headers=autorizacion)
+    assert respuesta.status_code == 413
+
+
+@pytest.mark.parametrize("con_returning", [True, False])
+def test_bulk_devuelve_el_id_de_cada_registro(client, autorizacion, registro, creados, db, monkeypatch,
+                                              con_returning):
+    if not con_returning:
+        # Como MySQL / MariaDB < 10.5, que no tienen RETURNING
+        monkeypatch.setattr(db.get_bind().dialect, "insert_executemany_returning", False)
+    registros = [{**registro, "cantidad_victima": 100 + i} for i in range(5)]
+    registros.insert(2, {**registro, "ubicacion_id": 999_999})
+    datos = client.post("/accidentes/bulk", json=registros, headers=autorizacion).json()
+    creados.extend(r["id"] for r in datos["resultados"] if "id" in r)
+    assert datos["insertados"] == 5
+    for resultado, enviado in zip(datos["resultados"], registros):
+        if "id" in resultado:
+            assert db.get(modelos.Accidente, resultado["id"]).cantidad_victima == enviado["cantidad_victima"]
@@ -0,0 +1,57 @@
+# Fastapi_React/Backend/tests/test_cache.py
+from app.models.cache import CacheLRU, CacheTilesDisco
+
+
+def test_valor_calculado_durante_una_invalidacion_no_se_guarda():
+    cache = CacheLRU()
+
+    def calcular_mientras_cambia():
+        cache.invalidar(lambda clave: clave == (1, 2, 3))  # p.ej. un alta concurrente en el tile
+        return "viejo"
+
+    assert cache.obtener((1, 2, 3), calcular_mientras_cambia) == "viejo"
+    assert cache.obtener((1, 2, 3), lambda: "nuevo") == "nuevo"
+    assert cache.obtener((1, 2, 3), lambda: "otro") == "nuevo"
+
+
+def test_lru_descarta_la_entrada_mas_vieja():
+    cache = CacheLRU(max_entradas=2)
+    for clave in "abc":
+        cache.obtener(clave, lambda: clave)
+    assert len(cache) == 2
+    assert cache.obtener("a", lambda: "recalculado") == "recalculado"
+
+
+def test_tiles_en_disco_invalidacion_y_huella(tmp_path):
+    cache = CacheTilesDisco(str(tmp_path), max_filtros=8)
+    assert cache.leer("10-55-10", "sin_filtros", (1, 2, 3)) is None
+    cache.guardar("sin_filtros", (1, 2, 3), b"tile", cache.generacion)
+    assert cache.leer("10-55-10", "sin_filtros", (1, 2, 3)) == b"tile"
+
+    cache.invalidar("10-55-10", [(1, 2, 3)])
+    assert cache.leer("10-55-10", "sin_filtros", (1, 2, 3)) is None
+    assert not (tmp_path / "10-55-10" / "sin_filtros" / "1" / "2" / "3.mvt").exists()
+
+    # Un alta mientras se armaba el tile: no se escribe el tile viejo
+    generacion = cache.generacion
+    cache.invalidar("10-55-10", [(9, 9, 9)])
+    cache.guardar("sin_filtros", (1, 2, 3), b"viejo", generacion)
+    assert cache.leer("10-55-10", "sin_filtros", (1, 2, 3)) is None
+
+    # Otra carga de datos: el directorio de la huella anterior se borra
+    cache.guardar("sin_filtros", (1, 2, 3), b"tile", cache.generacion)
+    assert cache.leer("11-66-11", "sin_filtros", (1, 2, 3)) is None
+    assert not (tmp_path / "10-55-10").exists()
+
+
+def test_tiles_en_disco_limita_combinaciones_de_filtros(tmp_path):
+    cache = CacheTilesDisco(str(tmp_path), max_filtros=2)
+    cache.leer("1-1-1", "a", (0, 0, 0))
+    for clave in "abc":
+        cache.guardar(clave, (0, 0, 0), clave.encode(), cache.generacion)
+    assert sorted(d.name for d in (tmp_path / "1-1-1").iterdir()) == ["b", "c"]
+
+    # El índice se reconstruye desde el disco en otro proceso
+    otro = CacheTilesDisco(str(tmp_path), max_filtros=2)
+    otro.invalidar("1-1-1", [(0, 0, 0)])
+    assert not list((tmp_path / "1-1-1").glob("*/*/*/*.mvt"))
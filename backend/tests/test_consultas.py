@@ -0,0 +1,18 @@
+# Fastapi_React/Backend/tests/test_consultas.py
+from app.database import max_consultas
+from app.models.cargas import MAX_CONSULTAS_ACCIDENTE_READ
+
+
+def test_listado_de_accidentes_sin_n_mas_1(client):
+    with max_consultas(MAX_CONSULTAS_ACCIDENTE_READ):
+        respuesta = client.get("/accidentes/?limit=100")
+    assert respuesta.status_code == 200
+    assert len(respuesta.json()) == 100
+
+
+def test_detalle_de_accidente_sin_n_mas_1(client):
+    accidente_id = client.get("/accidentes/?limit=1").json()[0]["id"]
+    with max_consultas(MAX_CONSULTAS_ACCIDENTE_READ):
+        respuesta = client.get(f"/accidentes/{accidente_id}")
+    assert respuesta.status_code == 200
+    assert respuesta.json()["id"] == accidente_id
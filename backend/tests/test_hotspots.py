@@ -0,0 +1,71 @@
+# Fastapi_React/Backend/tests/test_hotspots.py
+import random
+
+from app.crud import accidente as crud_accidente
+from app.models import hotspots, modelos
+from app.schemas import schemas
+
+
+def _firma(lista) -> list:
+    campos = ("accidentes", "peso", "celdas", "min_lat", "min_lng", "max_lat", "max_lng")
+    return sorted(tuple(round(h[c], 6) for c in campos) for h in lista)
+
+
+def _acumulado(rng: random.Random):
+    n = rng.randint(1, 12)
+    return n, float(n * rng.choice([1.0, 1.0, 5.0])), 0.0, 0.0
+
+
+def test_actualizacion_local_igual_a_recalcular_todo():
+    rng = random.Random(13)
+    celdas = {(rng.randint(0, 40), rng.randint(0, 40)): _acumulado(rng) for _ in range(600)}
+    grilla = hotspots.GrillaHotspots(celdas)
+    for _ in range(200):
+        cambios = {}
+        for _ in range(rng.randint(1, 3)):
+            celda = (rng.randint(0, 40), rng.randint(0, 40))
+            cambios[celda] = None if celda in grilla.celdas and rng.random() < 0.3 else _acumulado(rng)
+        antes = set(grilla.hotspots)
+        borrados, nuevos, rangos = grilla.actualizar(cambios)
+        assert set(grilla.hotspots) == (antes - set(borrados)) | {h["id"] for h in nuevos}
+
+        esperados = hotspots.detectar(grilla.celdas)
+        assert _firma(grilla.hotspots.values()) == _firma(esperados)
+        assert sorted(h["rango"] for h in grilla.hotspots.values()) == list(range(1, len(esperados) + 1))
+
+    # Muchas celdas pesadas de golpe mueven el umbral de núcleo: se recalcula todo
+    umbral = grilla.umbral
+    borrados, nuevos, _ = grilla.actualizar({(x, 50): (40, 200.0, 0.0, 0.0) for x in range(0, 80, 2)})
+    assert grilla.umbral > umbral
+    assert _firma(grilla.hotspots.values()) == _firma(hotspots.detectar(grilla.celdas))
+
+
+def test_job_solo_recalcula_las_celdas_marcadas(db):
+    crud_accidente.actualizar_hotspots(db, forzar=True)
+    assert crud_accidente.actualizar_hotspots(db)["hotspots"] is None  # Sin cambios no toca la BD
+
+    modelo = db.query(modelos.Accidente).filter(modelos.Accidente.id == int(crud_accidente.almacen.columna("id")[0])).one()
+    datos = schemas.AccidenteCreateInput(
+        fecha=modelo.fecha, condicion_victima_id=modelo.condicion_victima_id, gravedad_victima_id=2,
+        tipo_accidente_id=modelo.tipo_accidente_id, ubicacion_id=modelo.ubicacion_id,
+    )
+    creados = [crud_accidente.crear_accidente(db, datos, usuario_id=modelo.usuario_id) for _ in range(3)]
+    try:
+        resultado = crud_accidente.actualizar_hotspots(db)
+        assert resultado["celdas_actualizadas"] == 1
+        with crud_accidente.almacen.lock:
+            mascara = crud_accidente.almacen.mascara(con_coordenadas=True)
+            todas = hotspots.acumular_celdas(*(crud_accidente.almacen.columna(c)[mascara] for c in ("lat", "lng", "gravedad_id")))
+        assert crud_accidente._grilla_hotspots.celdas.keys() == todas.keys()
+
+        guardados = [
+            {c: getattr(h, c) for c in ("accidentes", "peso", "celdas", "min_lat", "min_lng", "max_lat", "max_lng", "rango")}
+            for h in db.query(modelos.Hotspot)
+        ]
+        completos = hotspots.detectar(crud_accidente._grilla_hotspots.celdas)
+        assert _firma(guardados) == _firma(completos)
+        assert sorted(h["rango"] for h in guardados) == list(range(1, len(completos) + 1))
+    finally:
+        for creado in creados:
+            crud_accidente.eliminar_accidente(db, creado.id)
+        crud_accidente.actualizar_hotspots(db)
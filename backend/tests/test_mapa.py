@@ -0,0 +1,21 @@
+# Fastapi_React/Backend/tests/test_mapa.py
+import pytest
+
+from app.models.indice_espacial import parsear_bbox
+
+
+def test_bbox_se_recorta_al_mundo():
+    assert parsear_bbox("-200,-95,1e308,91") == (-180.0, -90.0, 180.0, 90.0)
+
+
+@pytest.mark.parametrize("bbox", ["-inf,-inf,inf,inf", "nan,10,-74,11", "-75,10,-74", "-74,11,-75,10", "a,b,c,d"])
+def test_bbox_invalido_responde_400(client, bbox):
+    with pytest.raises(ValueError):
+        parsear_bbox(bbox)
+    assert client.get("/api/accidentes/mapa", params={"bbox": bbox}).status_code == 400
+
+
+def test_bbox_fuera_del_mundo_no_falla(client):
+    respuesta = client.get("/api/accidentes/mapa", params={"bbox": "1e308,1e308,1e308,1e308"})
+    assert respuesta.status_code == 200
+    assert respuesta.json() == []
@@ -0,0 +1,72 @@
+# Fastapi_React/Backend/tests/test_mvt.py
+import numpy as np
+import pytest
+
+from app.crud import accidente as crud_accidente
+from app.models import mvt
+from app.models.clusters import mercator
+
+mapbox_vector_tile = pytest.importorskip("mapbox_vector_tile")
+
+
+def _tile_de(lat: float, lng: float, z: int):
+    mx, my = mercator(np.array([lat]), np.array([lng]))
+    return int(mx[0] * 2 ** z), int(my[0] * 2 ** z)
+
+
+def _decodificar(tile: bytes) -> dict:
+    return mapbox_vector_tile.decode(tile, default_options={"y_coord_down": True})
+
+
+def test_tile_sintetico_se_decodifica():
+    z = 15
+    x, y = _tile_de(10.98, -74.80, z)
+    lat = np.array([10.98, 10.9801, 10.9802, 45.0])
+    lng = np.array([-74.80, -74.8001, -74.8002, 10.0])
+    tile = mvt.construir_tile(
+        z, x, y,
+        ids=np.array([1, 2, 3, 4]), lat=lat, lng=lng,
+        tipo_accidente_id=np.array([5, 6, 5, 5]),
+        gravedad_id=np.array([1, 2, 2, 1]),
+        barrio_id=np.array([7, 7, -1, 7]),
+    )
+    capas = _decodificar(tile)
+    assert capas["accidentes"]["extent"] == mvt.EXTENT
+
+    accidentes = {f["properties"]["id"]: f for f in capas["accidentes"]["features"]}
+    assert sorted(accidentes) == [1, 2, 3]  # El 4 está en otro continente
+    tx, ty, _ = mvt.coordenadas_tile(lat[:3], lng[:3], z, x, y)
+    for i, acc_id in enumerate([1, 2, 3]):
+        assert accidentes[acc_id]["geometry"] == {"type": "Point", "coordinates": [int(tx[i]), int(ty[i])]}
+    assert accidentes[2]["properties"] == {"id": 2, "tipo_accidente_id": 6, "gravedad_id": 2}
+
+    (barrio,) = capas["barrios"]["features"]
+    assert barrio["properties"] == {"barrio_id": 7, "count": 2, "gravedad_1": 1, "gravedad_2": 1}
+
+
+def test_zoom_bajo_solo_lleva_barrios():
+    x, y = _tile_de(10.98, -74.80, 8)
+    tile = mvt.construir_tile(
+        8, x, y, ids=np.array([1]), lat=np.array([10.98]), lng=np.array([-74.80]),
+        tipo_accidente_id=np.array([1]), gravedad_id=np.array([1]), barrio_id=np.array([3]),
+    )
+    assert list(_decodificar(tile)) == ["barrios"]
+
+
+def test_endpoint_sirve_el_accidente_y_lo_guarda_en_disco(client):
+    almacen = crud_accidente.almacen
+    fila = int(np.flatnonzero(~np.isnan(almacen.columna("lat")))[0])
+    acc_id = int(almacen.columna("id")[fila])
+    lat, lng = almacen.coordenadas(acc_id)
+    z = 16
+    x, y = _tile_de(lat, lng, z)
+
+    respuesta = client.get(f"/tiles/accidentes/{z}/{x}/{y}.mvt")
+    assert respuesta.status_code == 200
+    ids = {f["properties"]["id"] for f in _decodificar(respuesta.content)["accidentes"]["features"]}
+    assert acc_id in ids
+    assert client.get(f"/tiles/accidentes/{z}/{x}/{y}.mvt").content == respuesta.content
+    assert len(crud_accidente.cache_tiles_mvt) >= 1
+
+    crud_accidente.invalidar_tiles_mvt((lat, lng))
+    assert len(crud_accidente.cache_tiles_mvt) == 0
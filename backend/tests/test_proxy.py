@@ -0,0 +1,142 @@
+# Fastapi_React/Backend/tests/test_proxy.py
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.crud import accidente as crud_accidente
+from app.models import modelos, proxy as modulo_proxy
+
+
+@pytest.fixture
+def altas(db):
+    """Crea accidentes copiando las FK de uno del volcado, sin pasar por el CRUD; los borra al terminar."""
+    modelo = db.query(modelos.Accidente).first()
+    creados = []
+
+    def crear(updated: datetime, cantidad_victima: int = 1) -> modelos.Accidente:
+        accidente = modelos.Accidente(
+            fecha=modelo.fecha, cantidad_victima=cantidad_victima, created=updated, updated=updated,
+            usuario_id=modelo.usuario_id, condicion_victima_id=modelo.condicion_victima_id,
+            gravedad_victima_id=modelo.gravedad_victima_id, tipo_accidente_id=modelo.tipo_accidente_id,
+            ubicacion_id=modelo.ubicacion_id,
+        )
+        db.add(accidente)
+        db.commit()
+        creados.append(accidente.id)
+        return accidente
+
+    yield crear
+    db.query(modelos.Accidente).filter(modelos.Accidente.id.in_(creados)).delete(synchronize_session=False)
+    db.commit()
+
+
+@pytest.fixture
+def cache(client):
+    """El proxy de la app: cargarlo entero cuesta segundos, así que los tests lo comparten."""
+    crud_accidente.proxy.obtener_snapshot(refrescar=True)  # Absorbe lo que dejó el test anterior
+    return crud_accidente.proxy
+
+
+def _ids(snapshot) -> set:
+    return {accidente["id"] for accidente in json.loads(snapshot.cuerpo)}
+
+
+def test_refresco_incremental_fusiona_cambios(db, altas, cache):
+    inicial = cache.obtener_snapshot(refrescar=True)
+    assert cache.obtener_snapshot(refrescar=True) is inicial  # Sin cambios no se recodifica
+
+    accidente = altas(cache._marca_agua + timedelta(seconds=1))
+    con_alta = cache.obtener_snapshot(refrescar=True)
+    assert con_alta.total == inicial.total + 1 and con_alta.etag != inicial.etag
+
+    accidente.cantidad_victima, accidente.updated = 7, cache._marca_agua + timedelta(seconds=1)
+    db.commit()
+    modificado = cache.obtener_snapshot(refrescar=True)
+    [fila] = [a for a in json.loads(modificado.cuerpo) if a["id"] == accidente.id]
+    assert fila["cantidad_victima"] == 7 and modificado.total == con_alta.total
+
+
+def test_alta_tardia_detras_de_la_marca_de_agua(db, altas, cache, monkeypatch):
+    inicial = cache.obtener_snapshot(refrescar=True)
+    tardio = altas(datetime(2000, 1, 1))  # Hizo commit con un `updated` muy anterior a la marca
+    sincronizado = cache.obtener_snapshot(refrescar=True)
+    assert tardio.id in _ids(sincronizado) and sincronizado.total == inicial.total + 1
+
+    # Ya reconciliado, el siguiente refresco no vuelve a recorrer todos los ids
+    def sin_escaneo(self):
+        raise AssertionError("get_ids no debería llamarse si el conteo coincide")
+    monkeypatch.setattr(modulo_proxy.AccidentesDB, "get_ids", sin_escaneo)
+    assert cache.obtener_snapshot(refrescar=True) is sincronizado
+
+
+def test_baja_y_alta_tardia_que_se_compensan_en_el_conteo(db, altas, cache):
+    borrado = altas(datetime.now())
+    altas(datetime.now())  # Así el id borrado no es el máximo y SQLite no lo reutiliza
+    inicial = cache.obtener_snapshot(refrescar=True)
+    assert borrado.id in _ids(inicial)
+
+    db.delete(borrado)
+    db.commit()
+    tardio = altas(cache._marca_agua - timedelta(minutes=1))  # Dentro del margen de la marca de agua
+    sincronizado = cache.obtener_snapshot(refrescar=True)
+    ids = _ids(sincronizado)
+    assert tardio.id in ids and borrado.id not in ids
+    assert sincronizado.total == inicial.total
+
+
+def test_proxy_responde_304_y_gzip(client):
+    respuesta = client.get("/proxy/", headers={"Accept-Encoding": "identity"})
+    assert respuesta.status_code == 200
+    assert "content-encoding" not in respuesta.headers
+    etag, cuerpo = respuesta.headers["etag"], respuesta.content
+
+    comprimida = client.get("/proxy/", headers={"Accept-Encoding": "gzip, deflate"})
+    assert comprimida.headers["content-encoding"] == "gzip"
+    assert comprimida.headers["etag"] == etag
+    assert json.loads(comprimida.content) == json.loads(cuerpo)  # httpx ya la descomprime
+
+    no_modificada = client.get("/proxy/", headers={"If-None-Match": etag})
+    assert no_modificada.status_code == 304
+    assert not no_modificada.content
+    assert no_modificada.headers["etag"] == etag
+    assert "accept-encoding" in no_modificada.headers["vary"].lower()
+
+
+def test_asegurar_indices_crea_el_de_updated_una_sola_vez(db):
+    from sqlalchemy import inspect, text
+
+    def indices():
+        return {i["name"]: tuple(i["column_names"]) for i in inspect(db.get_bind()).get_indexes("accidente_accidente")}
+
+    # Como en el volcado: sin índice en `updated` y el de `fecha` con otro nombre
+    db.execute(text("DROP INDEX ix_accidente_accidente_updated"))
+    db.execute(text("DROP INDEX ix_accidente_accidente_fecha"))
+    db.execute(text("CREATE INDEX accidente_fecha_django ON accidente_accidente (fecha)"))
+    db.commit()
+    try:
+        assert crud_accidente.asegurar_indices_accidente(db) == ["ix_accidente_accidente_updated"]
+        assert indices()["ix_accidente_accidente_updated"] == ("updated",)
+        assert crud_accidente.asegurar_indices_accidente(db) == []
+    finally:
+        db.execute(text("DROP INDEX accidente_fecha_django"))
+        db.execute(text("CREATE INDEX ix_accidente_accidente_fecha ON accidente_accidente (fecha)"))
+        db.commit()
+
+
+@pytest.mark.parametrize("accept_encoding, gzip", [
+    ("gzip", True),
+    ("br, GZIP;q=0.5", True),
+    ("*", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, identity", False),
+    ("*;q=0, identity", False),
+    ("gzip;q=0, *", False),  # La mención explícita manda sobre el comodín
+    ("deflate", False),
+    ("", False),
+])
+def test_negociacion_gzip_respeta_q(client, accept_encoding, gzip):
+    respuesta = client.get("/proxy/", headers={"Accept-Encoding": accept_encoding})
+    assert respuesta.status_code == 200
+    assert (respuesta.headers.get("content-encoding") == "gzip") is gzip
+    assert "accept-encoding" in respuesta.headers["vary"].lower()
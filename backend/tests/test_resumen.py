@@ -0,0 +1,55 @@
+# Fastapi_React/Backend/tests/test_resumen.py
+from datetime import date
+
+from app.crud import accidente as crud_accidente
+from app.models import modelos
+from app.schemas import schemas
+
+
+def _resumen(db) -> dict:
+    R = modelos.ResumenAccidenteDiario
+    return {
+        (r.fecha, r.barrio_id, r.tipo_accidente_id, r.gravedad_victima_id): (r.accidentes, r.victimas)
+        for r in db.query(R)
+    }
+
+
+def test_sumar_y_restar_deja_el_rollup_como_estaba(db):
+    antes = _resumen(db)
+    existente = next(iter(antes))
+    nueva = (date(1999, 1, 1), 0, existente[2], existente[3])
+    filas = [
+        (existente[0], existente[1], existente[2], existente[3], 2),
+        (existente[0], existente[1], existente[2], existente[3], None),
+        (nueva[0], None, nueva[2], nueva[3], 1),
+    ]
+    try:
+        crud_accidente.ajustar_resumen(db, filas, signo=1)
+        db.flush()
+        despues = _resumen(db)
+        assert despues[existente] == (antes[existente][0] + 2, antes[existente][1] + 2)
+        assert despues[nueva] == (1, 1)
+
+        crud_accidente.ajustar_resumen(db, filas, signo=-1)
+        db.flush()
+        assert _resumen(db) == antes  # La celda nueva quedó en cero y se borró
+    finally:
+        db.rollback()
+
+
+def test_alta_y_baja_de_accidente_mantienen_el_rollup(db):
+    antes = _resumen(db)
+    modelo = db.query(modelos.Accidente).first()
+    datos = schemas.AccidenteCreateInput(
+        fecha=modelo.fecha, cantidad_victima=3,
+        condicion_victima_id=modelo.condicion_victima_id, gravedad_victima_id=modelo.gravedad_victima_id,
+        tipo_accidente_id=modelo.tipo_accidente_id, ubicacion_id=modelo.ubicacion_id,
+    )
+    creado = crud_accidente.crear_accidente(db, datos, usuario_id=modelo.usuario_id)
+    clave = crud_accidente._clave_resumen(db, creado)
+    celda = (clave[0], clave[1] or 0, clave[2], clave[3])
+    accidentes, victimas = antes[celda]
+    assert _resumen(db)[celda] == (accidentes + 1, victimas + 3)
+
+    crud_accidente.eliminar_accidente(db, creado.id)
+    assert _resumen(db) == antes
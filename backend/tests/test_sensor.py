@@ -0,0 +1,332 @@
+# Fastapi_React/Backend/tests/test_sensor.py
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.crud import sensor as crud_sensor
+from app.models import anillo_sensor
+from app.schemas import schemas
+
+
+def _filas(n: int, sensor_id: int = 1, inicio: datetime = datetime(2030, 1, 1)):
+    return [
+        {"sensor_id": sensor_id, "temperatura": 25.0 + i / 10, "humedad": 70.0, "fecha_hora": inicio + timedelta(seconds=6 * i)}
+        for i in range(n)
+    ]
+
+
+def test_spill_recupera_lo_pendiente_tras_una_caida(tmp_path):
+    ruta = str(tmp_path / "pendientes.jsonl")
+
+    async def escenario():
+        caido = crud_sensor.BufferLecturas(intervalo=3600, ruta_spill=ruta)
+        await caido.iniciar(engine=None)
+        caido.agregar_filas(_filas(3))
+        caido._tarea.cancel()
+        # Otro worker vivo no puede tomar el mismo archivo
+        vecino = crud_sensor.BufferLecturas(intervalo=3600, ruta_spill=ruta)
+        await vecino.iniciar(engine=None)
+        assert vecino.estado()["spill"] == str(tmp_path / "pendientes.1.jsonl")
+        assert vecino.pendientes == 0
+        vecino._tarea.cancel()
+        vecino._soltar_spill()
+
+        caido._soltar_spill()  # El SO suelta el lock cuando el proceso muere
+        nuevo = crud_sensor.BufferLecturas(intervalo=3600, ruta_spill=ruta)
+        await nuevo.iniciar(engine=None)
+        nuevo._tarea.cancel()
+        assert nuevo.estado()["spill"] == ruta
+        assert [f["temperatura"] for f in nuevo._pendientes] == [25.0, 25.1, 25.2]
+        nuevo._soltar_spill()
+
+    asyncio.run(escenario())
+
+
+def test_spill_se_reemplaza_sin_truncar(tmp_path):
+    ruta = tmp_path / "pendientes.jsonl"
+    buffer = crud_sensor.BufferLecturas(ruta_spill=str(ruta))
+    buffer._tomar_spill()
+    buffer._reescribir_spill(_filas(2))
+    buffer._escribir_spill(_filas(1, sensor_id=2))
+    assert [json.loads(linea)["sensor_id"] for linea in ruta.read_text().splitlines()] == [1, 1, 2]
+    assert not (tmp_path / "pendientes.jsonl.tmp").exists()
+    buffer._soltar_spill()
+
+
+def test_reescribir_spill_no_frena_el_event_loop(tmp_path):
+    import threading
+
+    ruta = tmp_path / "pendientes.jsonl"
+    buffer = crud_sensor.BufferLecturas(ruta_spill=str(ruta))
+    buffer._tomar_spill()
+    buffer.agregar_filas(_filas(3))
+    escribiendo, seguir = threading.Event(), threading.Event()
+    original = buffer._escribir_temporal
+
+    def escritura_lenta(filas):
+        escribiendo.set()
+        assert seguir.wait(5)
+        return original(filas)
+
+    buffer._escribir_temporal = escritura_lenta
+
+    async def escenario():
+        tarea = asyncio.create_task(buffer._reescribir_spill_async())
+        while not escribiendo.is_set():
+            await asyncio.sleep(0.01)  # El loop sigue atendiendo mientras el hilo escribe
+        buffer.agregar_filas(_filas(2, sensor_id=2))
+        seguir.set()
+        await tarea
+
+    asyncio.run(escenario())
+    assert [json.loads(linea)["sensor_id"] for linea in ruta.read_text().splitlines()] == [1, 1, 1, 2, 2]
+    buffer.agregar_filas(_filas(1, sensor_id=3))  # Sigue escribiendo en el spill nuevo
+    assert len(ruta.read_text().splitlines()) == 6
+    buffer._soltar_spill()
+
+
+def _ids(cola) -> list:
+    eventos = []
+    while not cola.empty():
+        eventos.append(cola.get_nowait())
+    return [int(evento.split("\n")[0].removeprefix("id: ")) for evento in eventos]
+
+
+def test_ids_sse_sobreviven_a_un_reinicio():
+    lecturas = _filas(5, inicio=datetime(2025, 6, 1, 12))
+    lecturas.insert(2, dict(lecturas[1], sensor_id=2))  # Dos equipos en el mismo segundo
+
+    async def escenario():
+        antes = crud_sensor.HubLecturas(max_replay=10)
+        for lectura in lecturas:
+            antes.publicar(lectura)
+        ids = _ids(antes.suscribir(replay=10))
+        assert ids == sorted(set(ids))
+
+        # El proceso nuevo precarga el replay desde la BD y el cliente vuelve con Last-Event-ID
+        despues = crud_sensor.HubLecturas(max_replay=10)
+        despues.precargar(lecturas)
+        assert _ids(despues.suscribir(ultimo_id=ids[2])) == ids[3:]
+
+        # Una lectura con el reloj del equipo adelantado no se come los ids futuros
+        despues.publicar(dict(lecturas[0], fecha_hora=datetime(2100, 1, 1)))
+        assert despues.secuencia <= time.time_ns() // 1000
+
+    asyncio.run(escenario())
+
+
+def test_anillo_sin_precarga_no_cubre_ninguna_ventana():
+    anillo = anillo_sensor.AnilloLecturas(4)
+    assert not anillo.cubre(None)
+    anillo.agregar(datetime(2030, 1, 1), 25.0, 70.0, 1)
+    assert not anillo.cubre(datetime(2029, 1, 1))  # La BD puede tener lecturas que el buffer no vio
+
+    anillo.precargar([], hay_mas=False)  # Tabla vacía confirmada
+    assert anillo.cubre(None)
+
+    otro = anillo_sensor.AnilloLecturas(4)
+    otro.precargar([(datetime(2030, 1, 1, 0, 0, s), 25.0, 70.0, 1) for s in range(4)], hay_mas=True)
+    assert not otro.cubre(datetime(2030, 1, 1))
+    assert otro.cubre(datetime(2030, 1, 1, 0, 0, 1))
+
+
+def test_anillo_separa_equipos():
+    anillo = anillo_sensor.AnilloLecturas(4)
+    anillo.precargar([], hay_mas=False)
+    inicio = np.datetime64("2030-01-01T00:00:00", "us").astype(np.int64)
+    segundo = 1_000_000
+    anillo.agregar_lote(inicio + segundo * np.arange(5), np.array([20.0, 21.0, 30.0, 22.0, 31.0]),
+                        np.full(5, 70.0), np.array([1, 1, 2, 1, 2]))
+    fecha, temperatura, _ = anillo.ventana(datetime(2030, 1, 1), sensor_id=1)
+    assert temperatura.tolist() == [21.0, 22.0]  # La primera del equipo 1 se descartó al llenarse
+    assert anillo.ventana(datetime(2030, 1, 1))[1].tolist() == [21.0, 30.0, 22.0, 31.0]
+    assert anillo.ultima(sensor_id=1)[1:] == (22.0, 70.0, 1)
+    assert anillo.ultima()[1:] == (31.0, 70.0, 2)
+    assert anillo.ultima(sensor_id=3) is None
+
+
+@pytest.mark.skipif(not hasattr(time, "tzset"), reason="Requiere time.tzset")
+def test_ventana_reciente_en_utc_aunque_el_servidor_no_lo_este(client, monkeypatch):
+    monkeypatch.setenv("TZ", "Asia/Tokyo")
+    time.tzset()
+    try:
+        ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+        crud_sensor.recibir_lectura(schemas.LecturaSensorCreate(
+            sensor_id=7, temperatura=26.5, humedad=71.0, fecha_hora=ahora - timedelta(minutes=1),
+        ))
+        respuesta = client.get("/lectura_sensor/reciente", params={"minutos": 5}).json()
+        assert respuesta["lecturas"] >= 1
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
+
+
+def test_rollback_no_deja_equipos_marcados_como_registrados(client, db, monkeypatch):
+    from sqlalchemy import delete
+
+    from app.database import crear_engine_async
+    from app.models.sensor import LecturaSensor, Sensor
+
+    lote = _filas(2, sensor_id=77, inicio=datetime(2031, 1, 1))
+
+    async def falla_tras_registrar(conexion, filas):
+        raise RuntimeError("Falla después de dar de alta el equipo")
+
+    async def escenario():
+        motor = crear_engine_async()
+        buffer = crud_sensor.BufferLecturas(intervalo=3600)
+        await buffer.iniciar(motor)
+        buffer._tarea.cancel()
+        buffer.agregar_filas(lote)
+        try:
+            with monkeypatch.context() as parche:
+                parche.setattr(crud_sensor, "sumar_al_resumen", falla_tras_registrar)
+                with pytest.raises(RuntimeError):
+                    await buffer.volcar(motor)
+            assert 77 not in crud_sensor._sensores_registrados
+            assert buffer.pendientes == 2
+            # El siguiente volcado vuelve a insertar el equipo que deshizo el rollback
+            assert await buffer.volcar(motor) == 2
+            assert 77 in crud_sensor._sensores_registrados
+        finally:
+            await motor.dispose()
+
+    try:
+        asyncio.run(escenario())
+        assert db.get(Sensor, 77) is not None
+    finally:
+        db.execute(delete(LecturaSensor).where(LecturaSensor.sensor_id == 77))
+        db.execute(delete(Sensor).where(Sensor.id == 77))
+        db.commit()
+        crud_sensor.reconstruir_resumen_sensor(db)
+        crud_sensor._sensores_registrados.discard(77)
+
+
+def test_resumen_y_ultima_por_equipo(client, db):
+    from sqlalchemy import delete, insert
+
+    from app.models.sensor import LecturaSensor, Sensor
+
+    inicio = datetime(2032, 3, 1, 10)
+    db.execute(insert(Sensor), [{"id": 88, "nombre": "Sensor 88"}, {"id": 89, "nombre": "Sensor 89"}])
+    db.execute(insert(LecturaSensor), [
+        {"sensor_id": 88, "temperatura": 20.0, "humedad": 60.0, "fecha_hora": inicio},
+        {"sensor_id": 88, "temperatura": 22.0, "humedad": 62.0, "fecha_hora": inicio + timedelta(seconds=30)},
+        {"sensor_id": 89, "temperatura": 35.0, "humedad": 90.0, "fecha_hora": inicio + timedelta(seconds=10)},
+    ])
+    db.commit()
+    crud_sensor.reconstruir_resumen_sensor(db)
+    try:
+        ventana = {"resolucion": "minute", "desde": inicio.isoformat(), "hasta": (inicio + timedelta(minutes=1)).isoformat()}
+        [equipo] = client.get("/lectura_sensor/resumen", params={**ventana, "sensor_id": 88}).json()["serie"]
+        assert (equipo["lecturas"], equipo["temperatura_max"], equipo["humedad_promedio"]) == (2, 22.0, 61.0)
+        [flota] = client.get("/lectura_sensor/resumen", params=ventana).json()["serie"]
+        assert (flota["lecturas"], flota["temperatura_min"], flota["temperatura_max"]) == (3, 20.0, 35.0)
+
+        ultima = client.get("/lectura_sensor/ultima", params={"sensor_id": 89}).json()
+        assert (ultima["sensor_id"], ultima["temperatura"]) == (89, 35.0)
+    finally:
+        db.execute(delete(LecturaSensor).where(LecturaSensor.sensor_id.in_([88, 89])))
+        db.execute(delete(Sensor).where(Sensor.id.in_([88, 89])))
+        db.commit()
+        crud_sensor.reconstruir_resumen_sensor(db)
+
+
+def test_resumen_sin_equipos_se_recalcula_al_migrar(tmp_path):
+    from sqlalchemy import create_engine, inspect, insert, text
+    from sqlalchemy.orm import Session
+
+    from app.models import sensor
+    from app.models.sensor import LecturaSensor, ResumenLecturaSensor
+
+    motor = create_engine(f"sqlite:///{tmp_path / 'antigua.db'}")
+    with motor.begin() as conexion:
+        conexion.execute(text(
+            "CREATE TABLE lectura_sensor (id INTEGER PRIMARY KEY, temperatura FLOAT NOT NULL, "
+            "humedad FLOAT NOT NULL, fecha_hora DATETIME NOT NULL)"
+        ))
+        conexion.execute(text(
+            "CREATE TABLE lectura_sensor_resumen (resolucion VARCHAR(6), periodo DATETIME, lecturas INTEGER, "
+            "temperatura_min FLOAT, temperatura_max FLOAT, temperatura_suma FLOAT, humedad_min FLOAT, "
+            "humedad_max FLOAT, humedad_suma FLOAT, PRIMARY KEY (resolucion, periodo))"
+        ))
+        conexion.execute(text("INSERT INTO lectura_sensor_resumen VALUES ('day', '2024-01-01', 9, 0, 0, 0, 0, 0, 0)"))
+    sensor.Base.metadata.create_all(motor, tables=[sensor.Sensor.__table__])
+    with Session(motor) as antigua:
+        antigua.execute(insert(LecturaSensor).values(temperatura=25.0, humedad=70.0, fecha_hora=datetime(2024, 5, 1)))
+        antigua.commit()
+        crud_sensor.asegurar_tablas_sensor(antigua)
+        assert "sensor_id" in {c["name"] for c in inspect(motor).get_columns(ResumenLecturaSensor.__tablename__)}
+        filas = antigua.query(ResumenLecturaSensor).filter_by(resolucion="day").all()
+        assert [(f.sensor_id, f.periodo, f.lecturas) for f in filas] == [(1, datetime(2024, 5, 1), 1)]
+    motor.dispose()
+
+
+def test_una_fila_invalida_no_bloquea_el_lote(client, db, tmp_path):
+    from sqlalchemy import delete, func, select
+
+    from app.database import crear_engine_async
+    from app.models.sensor import LecturaSensor, Sensor
+
+    lote = _filas(6, sensor_id=90, inicio=datetime(2033, 1, 1))
+    lote[3]["sensor_id"] = 2 ** 70  # No entra en la columna: la BD lo rechaza siempre
+    ruta = tmp_path / "pendientes.jsonl"
+
+    async def escenario():
+        motor = crear_engine_async()
+        buffer = crud_sensor.BufferLecturas(intervalo=3600, ruta_spill=str(ruta))
+        await buffer.iniciar(motor)
+        buffer._tarea.cancel()
+        buffer.agregar_filas(lote)
+        try:
+            await buffer.volcar(motor)
+            return buffer.estado()
+        finally:
+            buffer._soltar_spill()
+            await motor.dispose()
+
+    try:
+        estado = asyncio.run(escenario())
+        assert (estado["pendientes"], estado["insertadas"], estado["rechazadas"]) == (0, 5, 1)
+        assert ruta.read_text() == ""  # El spill ya no la arrastra al próximo arranque
+        [rechazada] = [json.loads(linea) for linea in (tmp_path / "pendientes.rechazadas.jsonl").read_text().splitlines()]
+        assert rechazada["tabla"] == "lectura_sensor" and rechazada["fila"]["sensor_id"] == 2 ** 70
+        guardadas = db.scalar(select(func.count()).where(LecturaSensor.sensor_id == 90))
+        assert guardadas == 5
+    finally:
+        db.execute(delete(LecturaSensor).where(LecturaSensor.sensor_id == 90))
+        db.execute(delete(Sensor).where(Sensor.id == 90))
+        db.commit()
+        crud_sensor.reconstruir_resumen_sensor(db)
+        crud_sensor._sensores_registrados.discard(90)
+
+
+@pytest.mark.parametrize("sensor_id", [0, -1, 65_536, 2 ** 31])
+def test_sensor_id_fuera_de_rango_responde_422(client, sensor_id):
+    lectura = {"temperatura": 25.0, "humedad": 70.0, "fecha_hora": "2030-01-01T00:00:00", "sensor_id": sensor_id}
+    pendientes = crud_sensor.buffer_lecturas.pendientes
+    assert client.post("/lectura_sensor/", json=lectura).status_code == 422
+    assert crud_sensor.buffer_lecturas.pendientes == pendientes  # No llegó a la cola
+    assert client.get(f"/sensores/{sensor_id}/ultima").status_code == 422
+    assert client.get(f"/sensores/{sensor_id}/lecturas").status_code == 422
+
+
+def test_guardar_sensor_requiere_token(client, autorizacion):
+    from sqlalchemy import delete
+
+    from app.database import SessionLocal
+    from app.models.sensor import Sensor
+
+    assert client.put("/sensores/91", json={"nombre": "Sin token"}).status_code == 401
+    try:
+        respuesta = client.put("/sensores/91", json={"nombre": "Puente"}, headers=autorizacion)
+        assert respuesta.status_code == 200 and respuesta.json()["nombre"] == "Puente"
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(Sensor).where(Sensor.id == 91))
+            db.commit()
+        crud_sensor._sensores_registrados.discard(91)
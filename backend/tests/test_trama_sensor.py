@@ -0,0 +1,60 @@
+# Fastapi_React/Backend/tests/test_trama_sensor.py
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.api.routers.accidente import MAX_BYTES_TRAMA, MAX_LECTURAS_TRAMA
+from app.models import trama_sensor
+
+
+def test_codificar_y_decodificar_ida_y_vuelta():
+    epoch = np.array([1_750_000_000, 1_750_000_006, 1_750_000_012, 1_750_003_600])
+    temperatura = np.array([31.9, 34.95, -4.5, 0.0])
+    humedad = np.array([72.3, 92.0, 100.0, 5.55])
+    trama = trama_sensor.codificar(3, epoch, temperatura, humedad)
+    assert len(trama) == trama_sensor.ENCABEZADO.size + 4 * trama_sensor.LECTURA.itemsize
+
+    sensor_id, fecha_hora, t, h = trama_sensor.decodificar(trama)
+    assert sensor_id.tolist() == [3, 3, 3, 3]
+    assert fecha_hora.astype(np.int64).tolist() == epoch.tolist()
+    assert fecha_hora[0].astype(datetime) == datetime(2025, 6, 15, 15, 6, 40)
+    np.testing.assert_allclose(t, temperatura, atol=0.005)
+    np.testing.assert_allclose(h, humedad, atol=0.005)
+
+
+def test_trama_vacia():
+    sensor_id, fecha_hora, _, _ = trama_sensor.decodificar(trama_sensor.codificar(1, [], [], []))
+    assert len(sensor_id) == len(fecha_hora) == 0
+
+
+@pytest.mark.parametrize("trama", [
+    b"LS",
+    b"XX" + trama_sensor.codificar(1, [0], [1.0], [1.0])[2:],
+    trama_sensor.codificar(1, [0], [1.0], [1.0])[:-1],
+    trama_sensor.codificar(1, [0, 1], [1.0, 2.0], [1.0, 2.0]) + b"\0",
+    trama_sensor.codificar([2, 0], [0, 1], [1.0, 2.0], [1.0, 2.0]),  # sensor_id 0
+])
+def test_trama_mal_formada(trama):
+    with pytest.raises(ValueError):
+        trama_sensor.decodificar(trama)
+
+
+def test_endpoint_acepta_la_trama(client):
+    trama = trama_sensor.codificar(1, [1_750_000_000, 1_750_000_006], [25.0, 25.1], [70.0, 70.5])
+    respuesta = client.post("/lectura_sensor/lote", content=trama, headers={"Content-Type": trama_sensor.MEDIA_TYPE})
+    assert respuesta.status_code == 202
+    assert respuesta.json()["aceptadas"] == 2
+    assert client.post("/lectura_sensor/lote", content=b"LS").status_code == 400
+
+
+def test_endpoint_corta_tramas_grandes(client):
+    demasiado = b"\0" * (MAX_BYTES_TRAMA + 1)
+    assert client.post("/lectura_sensor/lote", content=demasiado).status_code == 413
+
+    # Sin Content-Length (chunked) el tope se aplica mientras se lee el cuerpo
+    def partes():
+        for _ in range(MAX_LECTURAS_TRAMA):
+            yield b"\0" * 64
+
+    assert client.post("/lectura_sensor/lote", content=partes()).status_code == 413
@@ -14,6 +14,8 @@ import '../styles/LecturaSensor.css'; // Para el contenido específico de esta p
 
 const API_BASE_URL = "http://localhost:8000"; 
 const API_ENDPOINT = "/lectura_sensor/";
+const API_STREAM_ENDPOINT = "/lectura_sensor/stream";
+const HISTORIAL_LIMITE = 200; // Filas del historial por consulta
 const APP_NAME = "Sistema de Accidentes Barranquilla"; // Coincidir con Inicio.jsx
 
 const LecturaSensor = () => {
@@ -64,8 +66,10 @@ const LecturaSensor = () => {
       }
       
       const apiUrl = `${API_BASE_URL}${API_ENDPOINT}`;
+      // Solo las lecturas más recientes: el backend filtra por fecha_hora indexada
       const response = await axios.get(apiUrl, {
         headers: { Authorization: `Bearer ${token}` },
+        params: { limit: HISTORIAL_LIMITE },
       });
 
       let sortedLecturas = [];
@@ -130,7 +134,7 @@ const LecturaSensor = () => {
     setAutoRefresh(prev => {
       const newState = !prev;
       if (newState) {
-        toast.success('Actualización automática activada (cada 10s)', { position: "bottom-right" });
+        toast.success('Actualización en vivo activada', { position: "bottom-right" });
       } else {
         toast.warn('Actualización automática desactivada', { position: "bottom-right" });
       }
@@ -138,16 +142,30 @@ const LecturaSensor = () => {
     });
   };
 
+  // En vivo: el backend empuja cada lectura nueva por SSE en lugar de volver a pedir la lista
   useEffect(() => {
-    let intervalId = null;
-    if (autoRefresh && localStorage.getItem('token')) { // Solo refrescar si hay token
-      intervalId = setInterval(() => {
-        fetchLecturas(false); 
-        toast.info('Datos actualizados automáticamente.', { autoClose: 2000, position: "bottom-right" });
-      }, 10000); 
-    }
-    return () => clearInterval(intervalId);
-  }, [autoRefresh, fetchLecturas]);
+    if (!autoRefresh || !localStorage.getItem('token')) return undefined;
+    const fuente = new EventSource(`${API_BASE_URL}${API_STREAM_ENDPOINT}?replay=0`);
+    fuente.addEventListener('lectura', (evento) => {
+      const lectura = { ...JSON.parse(evento.data), id: `live-${evento.lastEventId}` };
+      setLecturas(prev => [lectura, ...prev].slice(0, HISTORIAL_LIMITE));
+      setLatestLectura(lectura);
+      setLastFetched(new Date());
+    });
+    fuente.addEventListener('anomalia', (evento) => {
+      const anomalia = JSON.parse(evento.data);
+      const unidad = anomalia.variable === 'temperatura' ? '°C' : '%';
+      toast.warn(
+        `Anomalía en sensor ${anomalia.sensor_id}: ${anomalia.variable} ${anomalia.anterior} → ${anomalia.valor} ${unidad}`,
+        { position: "bottom-right" }
+      );
+    });
+    fuente.onerror = () => {
+      // EventSource reintenta solo y reenvía Last-Event-ID para recuperar lo perdido
+      console.warn("Conexión del stream de sensores interrumpida, reintentando...");
+    };
+    return () => fuente.close();
+  }, [autoRefresh]);
 
   const handleManualRefresh = () => {
     if (!localStorage.getItem('token')) {
@@ -8,6 +8,7 @@
 
 // —————————————— Ajusta estos valores ——————————————
 const char* API_ENDPOINT = "http://192.168.1.27:8000/lectura_sensor/"; 
+const char* API_LOTE_ENDPOINT = "http://192.168.1.27:8000/lectura_sensor/lote";
 const char* WIFI_SSID     = "MASSIELL";
 const char* WIFI_PASS     = "l01041419051515m";
 // ————————————————————————————————————————————————
@@ -24,6 +25,37 @@ LiquidCrystal_I2C lcd(LCD_ADDR, LCD_COLS, LCD_ROWS);
 unsigned long lastSendTime = 0;
 const unsigned long SEND_INTERVAL = 5000;  // 5 s
 
+// —————————————— Modo por lotes ——————————————
+// 1: acumula LOTE_MAX lecturas y las envía en una trama binaria (8 bytes c/u)
+//    por una conexión HTTP keep-alive. 0: un JSON por lectura (modo original).
+#define MODO_LOTE 1
+const uint16_t SENSOR_ID = 1;
+const uint16_t LOTE_MAX  = 12;  // 12 x 5 s = una trama por minuto
+
+// Mismo formato que backend/app/models/trama_sensor.py (little-endian, como el ESP32)
+struct __attribute__((packed)) EncabezadoTrama {
+  char     magia[2];   // "LS"
+  uint8_t  version;    // 1
+  uint8_t  reservado;
+  uint32_t epochBase;  // Segundos Unix UTC de la primera lectura
+  uint16_t cantidad;
+};
+
+struct __attribute__((packed)) LecturaTrama {
+  uint16_t sensorId;
+  uint16_t desfase;      // Segundos desde epochBase
+  int16_t  temperatura;  // Centésimas de °C
+  int16_t  humedad;      // Centésimas de %
+};
+
+LecturaTrama lote[LOTE_MAX];
+uint16_t loteCantidad = 0;
+uint32_t loteEpochBase = 0;
+uint8_t  tramaBuf[sizeof(EncabezadoTrama) + sizeof(lote)];
+
+WiFiClient loteClient;  // Se conserva entre envíos para reutilizar el socket
+HTTPClient loteHttp;
+
 void connectToWiFi() {
   lcd.clear();
   lcd.print("Conectando WiFi");
@@ -104,7 +136,7 @@ void sendSensorData(float temperature, float humidity) {
   int httpCode = http.POST(jsonData);
   if (httpCode > 0) {
     Serial.printf("HTTP código: %d\n", httpCode);
-    if (httpCode == HTTP_CODE_OK || httpCode == HTTP_CODE_CREATED) {
+    if (httpCode == HTTP_CODE_OK || httpCode == HTTP_CODE_CREATED || httpCode == HTTP_CODE_ACCEPTED) {
       String resp = http.getString();
       Serial.println("Respuesta API: " + resp);
       lcd.clear();
@@ -129,6 +161,71 @@ void sendSensorData(float temperature, float humidity) {
   http.end();
 }
 
+bool sendBatch() {
+  if (loteCantidad == 0) return true;
+  if (WiFi.status() != WL_CONNECTED) {
+    Serial.println("WiFi desconectado, reconectando...");
+    connectToWiFi();
+    return false;
+  }
+
+  EncabezadoTrama enc = {{'L', 'S'}, 1, 0, loteEpochBase, loteCantidad};
+  size_t largo = sizeof(enc) + loteCantidad * sizeof(LecturaTrama);
+  memcpy(tramaBuf, &enc, sizeof(enc));
+  memcpy(tramaBuf + sizeof(enc), lote, loteCantidad * sizeof(LecturaTrama));
+
+  // Con setReuse(true), end() deja abierto el socket y el próximo begin() lo reutiliza
+  loteHttp.setReuse(true);
+  loteHttp.setTimeout(10000);
+  if (!loteHttp.begin(loteClient, API_LOTE_ENDPOINT)) {
+    Serial.println("Error inicio HTTP (lote)");
+    return false;
+  }
+  loteHttp.addHeader("Content-Type", "application/vnd.pryaccidentes.lecturas");
+  int httpCode = loteHttp.POST(tramaBuf, largo);
+  bool ok = httpCode == HTTP_CODE_OK || httpCode == HTTP_CODE_ACCEPTED;
+  if (ok) {
+    Serial.printf("Lote enviado: %u lecturas, %u bytes\n", loteCantidad, (unsigned) largo);
+    lcd.clear();
+    lcd.print("Lote OK: ");
+    lcd.print(loteCantidad);
+    loteCantidad = 0;
+  } else {
+    Serial.printf("Error enviando lote: %d\n", httpCode);
+    lcd.clear();
+    lcd.print("Lote fallo:");
+    lcd.setCursor(0,1);
+    lcd.print(httpCode);
+  }
+  loteHttp.end();
+  return ok;
+}
+
+void queueReading(float temperature, float humidity) {
+  uint32_t now = (uint32_t) time(nullptr);
+  // Si los envíos fallan, el lote se llena: se descarta la lectura más vieja.
+  // El desfase es de 16 bits, así que tras ~18 h sin enviar se descarta todo el lote.
+  if (loteCantidad > 0 && now - loteEpochBase > 65535) {
+    Serial.println("Lote demasiado viejo, se descarta");
+    loteCantidad = 0;
+  }
+  if (loteCantidad == LOTE_MAX) {
+    memmove(lote, lote + 1, (LOTE_MAX - 1) * sizeof(LecturaTrama));
+    loteCantidad--;
+  }
+  if (loteCantidad == 0) loteEpochBase = now;
+
+  LecturaTrama &l = lote[loteCantidad++];
+  l.sensorId    = SENSOR_ID;
+  l.desfase     = (uint16_t) (now - loteEpochBase);
+  l.temperatura = (int16_t) lroundf(temperature * 100);
+  l.humedad     = (int16_t) lroundf(humidity * 100);
+
+  if (loteCantidad >= LOTE_MAX) {
+    sendBatch();
+  }
+}
+
 void setup() {
   Serial.begin(115200);
   Serial.print("Intentando conectar a ");
@@ -169,7 +266,11 @@ void loop() {
       Serial.printf("T: %.1f C, H: %.1f %%\n", data.temperature, data.humidity);
 
       if (millis() - lastSendTime >= SEND_INTERVAL) {
+#if MODO_LOTE
+        queueReading(data.temperature, data.humidity);
+#else
         sendSensorData(data.temperature, data.humidity);
+#endif
         lastSendTime = millis();
       }
     } else {